@@ -3,6 +3,8 @@ import random
 import math
 import sys
 
+from render_cache import DirtyRectRenderer, TextCache, load_font, vertical_gradient
+
 # 初始化Pygame
 pygame.init()
 
@@ -34,23 +36,13 @@ pygame.display.set_caption("小鸟拍打翅膀 - 躲避障碍物")
 # 时钟
 clock = pygame.time.Clock()
 
-# 字体
-try:
-    # 尝试使用微软雅黑
-    font_large = pygame.font.Font("C:/Windows/Fonts/msyh.ttc", 72)
-    font_medium = pygame.font.Font("C:/Windows/Fonts/msyh.ttc", 48)
-    font_small = pygame.font.Font("C:/Windows/Fonts/msyh.ttc", 36)
-except:
-    try:
-        # 尝试使用宋体
-        font_large = pygame.font.Font("C:/Windows/Fonts/simsun.ttc", 72)
-        font_medium = pygame.font.Font("C:/Windows/Fonts/simsun.ttc", 48)
-        font_small = pygame.font.Font("C:/Windows/Fonts/simsun.ttc", 36)
-    except:
-        # 如果都找不到，使用默认字体
-        font_large = pygame.font.Font(None, 72)
-        font_medium = pygame.font.Font(None, 48)
-        font_small = pygame.font.Font(None, 36)
+# 字体（依次尝试微软雅黑、宋体，都找不到时使用默认字体）
+font_large = load_font(72)
+font_medium = load_font(48)
+font_small = load_font(36)
+
+# 文字渲染缓存
+text_cache = TextCache()
 
 class Bird:
     """小鸟类"""
@@ -94,8 +86,8 @@ class Bird:
             self.wing_direction *= -1
     
     def draw(self):
-        """绘制小鸟"""
-        pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), BIRD_SIZE // 2)
+        """绘制小鸟，返回绘制区域"""
+        body_rect = pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), BIRD_SIZE // 2)
         
         eye_x = self.x + 10
         eye_y = self.y - 5
@@ -104,7 +96,7 @@ class Bird:
         
         beak_x = self.x + BIRD_SIZE // 2
         beak_y = self.y
-        pygame.draw.polygon(screen, ORANGE, [
+        beak_rect = pygame.draw.polygon(screen, ORANGE, [
             (beak_x, beak_y),
             (beak_x + 20, beak_y - 5),
             (beak_x + 20, beak_y + 5)
@@ -114,16 +106,18 @@ class Bird:
         wing_x = self.x - 15
         wing_y = self.y + wing_offset_y
         
-        pygame.draw.ellipse(screen, ORANGE, (wing_x - 15, wing_y - 8, 25, 16))
+        wing_rect = pygame.draw.ellipse(screen, ORANGE, (wing_x - 15, wing_y - 8, 25, 16))
         
         tail_x = self.x - BIRD_SIZE // 2
         tail_y = self.y
-        pygame.draw.polygon(screen, BROWN, [
+        tail_rect = pygame.draw.polygon(screen, BROWN, [
             (tail_x, tail_y - 5),
             (tail_x - 15, tail_y - 10),
             (tail_x - 15, tail_y + 10),
             (tail_x, tail_y + 5)
         ])
+        
+        return body_rect.unionall([beak_rect, wing_rect, tail_rect])
     
     def get_rect(self):
         """获取碰撞矩形"""
@@ -142,15 +136,17 @@ class Pipe:
         self.x -= PIPE_SPEED
     
     def draw(self):
-        """绘制管道"""
+        """绘制管道，返回绘制区域"""
         top_pipe_height = self.gap_y
-        pygame.draw.rect(screen, GREEN, (self.x, 0, PIPE_WIDTH, top_pipe_height))
-        pygame.draw.rect(screen, DARK_GREEN, (self.x - 5, top_pipe_height - 30, PIPE_WIDTH + 10, 30))
+        top_rect = pygame.draw.rect(screen, GREEN, (self.x, 0, PIPE_WIDTH, top_pipe_height))
+        top_cap_rect = pygame.draw.rect(screen, DARK_GREEN, (self.x - 5, top_pipe_height - 30, PIPE_WIDTH + 10, 30))
         
         bottom_pipe_y = self.gap_y + PIPE_GAP
         bottom_pipe_height = SCREEN_HEIGHT - bottom_pipe_y
-        pygame.draw.rect(screen, GREEN, (self.x, bottom_pipe_y, PIPE_WIDTH, bottom_pipe_height))
-        pygame.draw.rect(screen, DARK_GREEN, (self.x - 5, bottom_pipe_y, PIPE_WIDTH + 10, 30))
+        bottom_rect = pygame.draw.rect(screen, GREEN, (self.x, bottom_pipe_y, PIPE_WIDTH, bottom_pipe_height))
+        bottom_cap_rect = pygame.draw.rect(screen, DARK_GREEN, (self.x - 5, bottom_pipe_y, PIPE_WIDTH + 10, 30))
+        
+        return top_rect.unionall([top_cap_rect, bottom_rect, bottom_cap_rect])
     
     def get_top_rect(self):
         """获取上管道碰撞矩形"""
@@ -173,6 +169,7 @@ class Game:
         self.last_pipe_spawn = 0
         self.game_state = "menu"
         self.high_score = self.load_high_score()
+        self.renderer = DirtyRectRenderer(screen, self.create_background())
     
     def load_high_score(self):
         """加载最高分"""
@@ -234,79 +231,63 @@ class Game:
                     self.high_score = self.bird.score
                     self.save_high_score()
     
-    def draw_background(self):
-        """绘制背景"""
-        for y in range(SCREEN_HEIGHT):
-            color = (135, 206 - y // 4, 235 - y // 6)
-            pygame.draw.line(screen, color, (0, y), (SCREEN_WIDTH, y))
+    def create_background(self):
+        """预先渲染背景（天空渐变、地面与草丛），每帧只需恢复被精灵覆盖的区域"""
+        background = vertical_gradient(SCREEN_WIDTH, SCREEN_HEIGHT,
+                                       lambda y: (135, 206 - y // 4, 235 - y // 6)).convert()
         
         ground_height = 50
-        pygame.draw.rect(screen, (34, 139, 34), (0, SCREEN_HEIGHT - ground_height, SCREEN_WIDTH, ground_height))
+        pygame.draw.rect(background, (34, 139, 34), (0, SCREEN_HEIGHT - ground_height, SCREEN_WIDTH, ground_height))
         
+        # 草丛高度固定下来，不再每帧随机闪烁；使用独立的随机数，不影响管道的随机位置
+        grass_random = random.Random(0)
         for x in range(0, SCREEN_WIDTH, 10):
-            grass_height = random.randint(5, 15)
-            pygame.draw.rect(screen, (50, 205, 50), (x, SCREEN_HEIGHT - ground_height - grass_height, 3, grass_height))
+            grass_height = grass_random.randint(5, 15)
+            pygame.draw.rect(background, (50, 205, 50), (x, SCREEN_HEIGHT - ground_height - grass_height, 3, grass_height))
+        return background
+    
+    def blit_text(self, font, text, color, center):
+        """绘制居中的文字（使用缓存的渲染结果）"""
+        surface = text_cache.render(font, text, color)
+        self.renderer.blit(surface, surface.get_rect(center=center))
     
     def draw(self):
         """绘制游戏"""
-        self.draw_background()
+        self.renderer.clear()
         
         for pipe in self.pipes:
-            pipe.draw()
+            self.renderer.add(pipe.draw())
         
-        self.bird.draw()
+        self.renderer.add(self.bird.draw())
         
         if self.game_state == "playing":
-            score_text = font_large.render(str(self.bird.score), True, WHITE)
-            score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 50))
-            screen.blit(score_text, score_rect)
+            self.blit_text(font_large, str(self.bird.score), WHITE, (SCREEN_WIDTH // 2, 50))
         
         if self.game_state == "menu":
             self.draw_menu()
         
         if self.game_state == "gameover":
             self.draw_gameover()
+        
+        self.renderer.present()
     
     def draw_menu(self):
         """绘制菜单界面"""
-        title_text = font_large.render("小鸟拍打翅膀", True, YELLOW)
-        title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 150))
-        screen.blit(title_text, title_rect)
-        
-        instruction_text1 = font_medium.render("鼠标上下移动控制小鸟", True, WHITE)
-        instruction_rect1 = instruction_text1.get_rect(center=(SCREEN_WIDTH // 2, 300))
-        screen.blit(instruction_text1, instruction_rect1)
-        
-        instruction_text2 = font_medium.render("躲避障碍物！", True, WHITE)
-        instruction_rect2 = instruction_text2.get_rect(center=(SCREEN_WIDTH // 2, 350))
-        screen.blit(instruction_text2, instruction_rect2)
+        self.blit_text(font_large, "小鸟拍打翅膀", YELLOW, (SCREEN_WIDTH // 2, 150))
+        self.blit_text(font_medium, "鼠标上下移动控制小鸟", WHITE, (SCREEN_WIDTH // 2, 300))
+        self.blit_text(font_medium, "躲避障碍物！", WHITE, (SCREEN_WIDTH // 2, 350))
         
         if self.high_score > 0:
-            high_score_text = font_small.render(f"最高分: {self.high_score}", True, ORANGE)
-            high_score_rect = high_score_text.get_rect(center=(SCREEN_WIDTH // 2, 420))
-            screen.blit(high_score_text, high_score_rect)
+            self.blit_text(font_small, f"最高分: {self.high_score}", ORANGE, (SCREEN_WIDTH // 2, 420))
         
-        start_text = font_medium.render("点击任意位置开始游戏", True, GREEN)
-        start_rect = start_text.get_rect(center=(SCREEN_WIDTH // 2, 500))
-        screen.blit(start_text, start_rect)
+        self.blit_text(font_medium, "点击任意位置开始游戏", GREEN, (SCREEN_WIDTH // 2, 500))
     
     def draw_gameover(self):
         """绘制游戏结束界面"""
-        gameover_text = font_large.render("游戏结束!", True, RED)
-        gameover_rect = gameover_text.get_rect(center=(SCREEN_WIDTH // 2, 150))
-        screen.blit(gameover_text, gameover_rect)
-        
-        score_text = font_medium.render(f"得分: {self.bird.score}", True, WHITE)
-        score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, 250))
-        screen.blit(score_text, score_rect)
-        
-        high_score_text = font_medium.render(f"最高分: {self.high_score}", True, ORANGE)
-        high_score_rect = high_score_text.get_rect(center=(SCREEN_WIDTH // 2, 300))
-        screen.blit(high_score_text, high_score_rect)
-        
-        restart_text = font_medium.render("点击任意位置重新开始", True, GREEN)
-        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, 400))
-        screen.blit(restart_text, restart_rect)
+        self.blit_text(font_large, "游戏结束!", RED, (SCREEN_WIDTH // 2, 150))
+        self.blit_text(font_medium, f"得分: {self.bird.score}", WHITE, (SCREEN_WIDTH // 2, 250))
+        self.blit_text(font_medium, f"最高分: {self.high_score}", ORANGE, (SCREEN_WIDTH // 2, 300))
+        self.blit_text(font_medium, "点击任意位置重新开始", GREEN, (SCREEN_WIDTH // 2, 400))
     
     def handle_events(self):
         """处理事件"""
@@ -330,7 +311,6 @@ def main():
         running = game.handle_events()
         game.update(mouse_pos)
         game.draw()
-        pygame.display.flip()
         clock.tick(FPS)
     
     pygame.quit()
@@ -3,8 +3,31 @@ import imaplib
 import email
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.mime.base import MIMEBase
+from email import encoders
 from email.header import decode_header
 import getpass
+import re
+
+from mail_cache import MailCache
+from smtp_pool import SMTPPool, send_bulk
+
+# 常用邮箱的默认服务器配置：域名 -> (SMTP服务器, SMTP端口, IMAP服务器, IMAP端口)
+DEFAULT_SERVERS = {
+    'gmail.com': ('smtp.gmail.com', 587, 'imap.gmail.com', 993),
+    'qq.com': ('smtp.qq.com', 587, 'imap.qq.com', 993),
+    '163.com': ('smtp.163.com', 587, 'imap.163.com', 993),
+    'outlook.com': ('smtp.office365.com', 587, 'outlook.office365.com', 993),
+    'hotmail.com': ('smtp.office365.com', 587, 'outlook.office365.com', 993),
+}
+
+# 列表模式只取回这些头部字段，CONTENT-TYPE 等用于解码正文预览
+HEADER_FIELDS = 'SUBJECT FROM DATE MESSAGE-ID CONTENT-TYPE CONTENT-TRANSFER-ENCODING MIME-VERSION'
+
+# 批量 FETCH 响应中每封邮件以 "序号 (" 开头
+FETCH_START_PATTERN = re.compile(rb'^(\d+) \(')
+UID_PATTERN = re.compile(rb'UID (\d+)')
+FLAGS_PATTERN = re.compile(rb'FLAGS \(([^)]*)\)')
 
 class EmailTool:
     """简单的邮箱工具类"""
@@ -18,6 +41,8 @@ class EmailTool:
         self.password = None
         self.smtp_conn = None
         self.imap_conn = None
+        # 本地邮件缓存（mail_cache.MailCache），为None时每次都从服务器获取
+        self.cache = None
     
     def setup(self):
         """配置邮箱信息"""
@@ -29,27 +54,9 @@ class EmailTool:
         
         # 根据邮箱域名自动配置服务器
         domain = self.email.split('@')[-1].lower()
-        
-        if domain == 'gmail.com':
-            self.smtp_server = 'smtp.gmail.com'
-            self.smtp_port = 587
-            self.imap_server = 'imap.gmail.com'
-            self.imap_port = 993
-        elif domain == 'qq.com':
-            self.smtp_server = 'smtp.qq.com'
-            self.smtp_port = 587
-            self.imap_server = 'imap.qq.com'
-            self.imap_port = 993
-        elif domain == '163.com':
-            self.smtp_server = 'smtp.163.com'
-            self.smtp_port = 587
-            self.imap_server = 'imap.163.com'
-            self.imap_port = 993
-        elif domain == 'outlook.com' or domain == 'hotmail.com':
-            self.smtp_server = 'smtp.office365.com'
-            self.smtp_port = 587
-            self.imap_server = 'outlook.office365.com'
-            self.imap_port = 993
+        servers = DEFAULT_SERVERS.get(domain)
+        if servers:
+            self.smtp_server, self.smtp_port, self.imap_server, self.imap_port = servers
         else:
             print(f"\n未识别到 {domain} 的默认服务器配置")
             self.smtp_server = input("请输入SMTP服务器地址: ").strip()
@@ -60,6 +67,26 @@ class EmailTool:
         self.password = getpass.getpass("请输入邮箱密码/授权码: ")
         print("\n配置完成！\n")
     
+    def configure(self, email_address, password, smtp_server=None, smtp_port=None,
+                  imap_server=None, imap_port=None):
+        """
+        非交互式配置，供脚本与定时任务使用
+        参数:
+            email_address - 邮箱地址
+            password - 邮箱密码/授权码
+            smtp_server / smtp_port / imap_server / imap_port - 服务器配置，
+                为None时按邮箱域名使用默认配置
+        """
+        self.email = email_address
+        self.password = password
+        defaults = DEFAULT_SERVERS.get(email_address.split('@')[-1].lower(), (None, None, None, None))
+        self.smtp_server = smtp_server or defaults[0]
+        self.smtp_port = smtp_port or defaults[1]
+        self.imap_server = imap_server or defaults[2]
+        self.imap_port = imap_port or defaults[3]
+        if not self.smtp_server:
+            raise ValueError(f"未识别到 {email_address} 的默认服务器配置，请指定 SMTP 服务器")
+    
     def connect_smtp(self):
         """连接SMTP服务器"""
         try:
@@ -83,6 +110,45 @@ class EmailTool:
             print(f"IMAP连接失败: {e}")
             return False
     
+    def build_message(self, to_email, subject, body, attachments=None):
+        """
+        构建邮件
+        参数:
+            to_email - 收件人
+            subject - 主题
+            body - 正文（纯文本）
+            attachments - 附件列表，每项为 (文件名, 内容字节, 主类型, 子类型)，
+                          或 make_attachment 预先编码好的附件（多封邮件共用时只编码一次）
+        返回: MIMEMultipart 邮件对象
+        """
+        msg = MIMEMultipart()
+        msg['From'] = self.email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        
+        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+        for attachment in attachments or []:
+            if not isinstance(attachment, MIMEBase):
+                attachment = self.make_attachment(*attachment)
+            msg.attach(attachment)
+        return msg
+    
+    @staticmethod
+    def make_attachment(filename, content, maintype='application', subtype='octet-stream'):
+        """
+        构建经 base64 编码的附件
+        参数:
+            filename - 附件文件名
+            content - 内容字节
+            maintype / subtype - MIME 类型
+        返回: MIMEBase 附件对象，可以附加到多封邮件中
+        """
+        part = MIMEBase(maintype, subtype)
+        part.set_payload(content)
+        encoders.encode_base64(part)
+        part.add_header('Content-Disposition', 'attachment', filename=filename)
+        return part
+    
     def send_email(self, to_email, subject, body):
         """发送邮件"""
         if not self.smtp_conn:
@@ -90,20 +156,50 @@ class EmailTool:
                 return False
         
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(body, 'plain', 'utf-8'))
-            
-            self.smtp_conn.send_message(msg)
+            msg = self.build_message(to_email, subject, body)
+            try:
+                self.smtp_conn.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # 空闲时间过长时服务器会断开连接，重新连接后再试一次
+                if not self.connect_smtp():
+                    return False
+                self.smtp_conn.send_message(msg)
             print("邮件发送成功！")
             return True
         except Exception as e:
             print(f"邮件发送失败: {e}")
             return False
     
+    def send_bulk(self, messages, workers=4, retries=2, starttls=True):
+        """
+        通过 SMTP 连接池并发发送多封邮件
+        参数:
+            messages - 邮件列表，每项为 build_message 的结果，或包含 to、subject、body、
+                       attachments 键的字典
+            workers - 并发连接数
+            retries - 每封邮件出现连接错误时的最多重试次数
+            starttls - 是否执行 STARTTLS（连接本地测试服务器时可关闭）
+        返回: (结果列表, 汇总字典)，格式见 smtp_pool.send_bulk
+        """
+        msgs = [m if not isinstance(m, dict) else
+                self.build_message(m['to'], m['subject'], m['body'], m.get('attachments'))
+                for m in messages]
+        pool = SMTPPool(self.smtp_server, self.smtp_port, self.email, self.password,
+                        size=workers, starttls=starttls)
+        try:
+            results, summary = send_bulk(pool, msgs, retries)
+        finally:
+            pool.close()
+        
+        print(f"批量发送完成: 成功 {summary['sent']} 封, 失败 {summary['failed']} 封, "
+              f"耗时 {summary['seconds']:.2f} 秒, {summary['per_sec']:.1f} 封/秒")
+        for result in results:
+            if not result['ok']:
+                print(f"  发送失败: {result['to']}, 错误: {result['error']}")
+            elif result['refused']:
+                print(f"  部分收件人被拒绝: {', '.join(f'{rcpt}（{reason}）' for rcpt, reason in result['refused'].items())}")
+        return results, summary
+    
     def decode_str(self, s):
         """解码字符串"""
         if not s:
@@ -115,56 +211,190 @@ class EmailTool:
             value = value.decode('utf-8', errors='ignore')
         return value
     
-    def fetch_emails(self, count=5):
-        """获取最新邮件"""
+    def select_mailbox(self, mailbox='INBOX'):
+        """
+        以只读方式打开邮箱文件夹
+        参数: mailbox - 邮箱文件夹
+        返回: 字典：exists（邮件数）、uidvalidity、uidnext（服务器未提供时为None）
+        """
+        _, data = self.imap_conn.select(mailbox, readonly=True)
+        info = {'exists': int(data[0]), 'uidvalidity': None, 'uidnext': None}
+        for key in ('uidvalidity', 'uidnext'):
+            _, values = self.imap_conn.response(key.upper())
+            if values and values[-1]:
+                info[key] = int(values[-1])
+        return info
+    
+    def fetch_emails(self, count=5, since_uid=None, preview_bytes=2048, mailbox='INBOX'):
+        """
+        获取最新邮件列表
+        只取必要的头部字段和正文开头的一小段，所有邮件在一次 FETCH 中批量取回，
+        不下载完整正文和附件，也不会把邮件标记为已读；
+        设置了本地缓存（self.cache）时只从服务器取新邮件，列表从缓存中读取
+        参数:
+            count - 获取最新的多少封邮件
+            since_uid - 提供时改为获取 UID 大于该值的全部邮件（不使用缓存）
+            preview_bytes - 每封邮件取回的正文字节数，用于生成内容预览
+            mailbox - 邮箱文件夹
+        返回: 邮件信息列表，按 UID 从新到旧排列
+        """
         if not self.imap_conn:
             if not self.connect_imap():
                 return []
         
         try:
-            self.imap_conn.select('INBOX')
-            _, data = self.imap_conn.search(None, 'ALL')
-            email_ids = data[0].split()
-            
-            emails = []
-            # 获取最新的count封邮件
-            for i in range(min(count, len(email_ids))):
-                email_id = email_ids[-(i + 1)]
-                _, msg_data = self.imap_conn.fetch(email_id, '(RFC822)')
-                email_body = msg_data[0][1]
-                msg = email.message_from_bytes(email_body)
-                
-                subject = self.decode_str(msg['Subject'])
-                from_email = self.decode_str(msg['From'])
-                date = msg['Date']
-                
-                # 获取邮件内容
-                content = ""
-                if msg.is_multipart():
-                    for part in msg.walk():
-                        if part.get_content_type() == 'text/plain':
-                            charset = part.get_content_charset() or 'utf-8'
-                            content = part.get_payload(decode=True).decode(charset, errors='ignore')
-                            break
-                else:
-                    charset = msg.get_content_charset() or 'utf-8'
-                    content = msg.get_payload(decode=True).decode(charset, errors='ignore')
-                
-                emails.append({
-                    'id': email_id.decode(),
-                    'subject': subject,
-                    'from': from_email,
-                    'date': date,
-                    'content': content[:500] + '...' if len(content) > 500 else content
-                })
+            if self.cache is not None and since_uid is None:
+                self.cache.sync(self, mailbox, preview_bytes=preview_bytes)
+                return self.cache.list(mailbox, count)
             
-            return emails
+            info = self.select_mailbox(mailbox)
+            return self.fetch_selected(info['exists'], count, since_uid, preview_bytes, info['uidnext'])
         except Exception as e:
             print(f"获取邮件失败: {e}")
             return []
     
+    def fetch_selected(self, exists, count=5, since_uid=None, preview_bytes=2048, uidnext=None):
+        """
+        在已打开的邮箱中批量获取邮件（参数含义同 fetch_emails），全部使用 UID FETCH
+        参数:
+            exists - 邮箱中的邮件数（select_mailbox 的结果）
+            uidnext - 邮箱的 UIDNEXT（select_mailbox 的结果），用于确定最新邮件的 UID 范围
+        返回: 邮件信息列表，按 UID 从新到旧排列
+        """
+        query = f'(UID FLAGS BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})] BODY.PEEK[TEXT]<0.{preview_bytes}>)'
+        
+        if since_uid is not None:
+            # "n:*" 在 n 大于最大 UID 时仍会返回最后一封邮件，需要再过滤一次
+            items = [item for item in self.uid_fetch(f'{since_uid + 1}:*', query) if item['uid'] > since_uid]
+        elif exists:
+            items = self.fetch_latest(min(count, exists), exists, query, uidnext)
+        else:
+            return []
+        
+        emails = [self.summarize(item) for item in items]
+        emails.sort(key=lambda e: e['uid'], reverse=True)
+        return emails
+    
+    def uid_fetch(self, uid_set, query):
+        """
+        一次 UID FETCH 取回一组邮件
+        参数:
+            uid_set - UID 集合，如 "101:200"
+            query - FETCH 数据项
+        返回: parse_fetch_response 的结果
+        """
+        _, msg_data = self.imap_conn.uid('FETCH', uid_set, query)
+        return self.parse_fetch_response(msg_data)
+    
+    def fetch_latest(self, count, exists, query, uidnext=None):
+        """
+        用 UID FETCH 取回最新的 count 封邮件
+        UID 连续时最新的 count 封邮件就是 UIDNEXT 之前的 count 个 UID，一次 UID FETCH 即可取回；
+        中间有邮件被删除导致数量不够时（或服务器没有提供 UIDNEXT），用 UID SEARCH 按序号查出
+        这些邮件的 UID，再一次 UID FETCH 补取其余部分，无论 UID 多稀疏都不超过三次往返
+        返回: parse_fetch_response 的结果
+        """
+        items = []
+        low = None
+        if uidnext is not None:
+            low = max(1, uidnext - count)
+            items = self.uid_fetch(f'{low}:{uidnext - 1}', query)
+            if len(items) >= count:
+                return items
+        
+        _, data = self.imap_conn.uid('SEARCH', f'{exists - count + 1}:{exists}')
+        uids = sorted(int(uid) for uid in data[0].split() if low is None or int(uid) < low)
+        if uids:
+            items.extend(self.uid_fetch(f'{uids[0]}:{uids[-1]}', query))
+        items.sort(key=lambda item: item['uid'], reverse=True)
+        return items[:count]
+    
+    def fetch_body(self, uid):
+        """
+        获取已打开邮箱中一封邮件的完整内容（不标记为已读）
+        参数: uid - 邮件 UID
+        返回: RFC822 原始字节，不存在时返回None
+        """
+        _, msg_data = self.imap_conn.uid('FETCH', str(uid), '(BODY.PEEK[])')
+        for part in msg_data:
+            if isinstance(part, tuple):
+                return part[1]
+        return None
+    
+    @staticmethod
+    def parse_fetch_response(msg_data):
+        """
+        解析批量 FETCH 的响应
+        参数: msg_data - imaplib 返回的响应列表，字面量为 (前缀, 内容) 元组
+        返回: 每封邮件一个字典：seq、uid、flags、header（字节）、text（字节）
+        """
+        messages = []
+        current = None
+        for part in msg_data:
+            if isinstance(part, tuple):
+                prefix, literal = part
+            else:
+                prefix, literal = part, None
+            if not prefix:
+                continue
+            
+            start = FETCH_START_PATTERN.match(prefix)
+            if start:
+                current = {'seq': int(start.group(1)), 'uid': None, 'flags': [], 'header': b'', 'text': b''}
+                messages.append(current)
+            if current is None:
+                continue
+            
+            # UID 和 FLAGS 可能出现在字面量之前，也可能在之后的片段中
+            uid = UID_PATTERN.search(prefix)
+            if uid:
+                current['uid'] = int(uid.group(1))
+            flags = FLAGS_PATTERN.search(prefix)
+            if flags:
+                current['flags'] = flags.group(1).decode('ascii', errors='ignore').split()
+            if literal is not None:
+                section = prefix.rsplit(b'BODY[', 1)[-1].upper()
+                if section.startswith(b'HEADER'):
+                    current['header'] = literal
+                elif section.startswith(b'TEXT'):
+                    current['text'] = literal
+        return [m for m in messages if m['uid'] is not None]
+    
+    def summarize(self, item):
+        """
+        由头部字段与正文开头生成邮件信息
+        参数: item - parse_fetch_response 返回的单封邮件
+        返回: 邮件信息字典
+        """
+        msg = email.message_from_bytes(item['header'] + item['text'])
+        
+        # 获取邮件内容（正文可能被截断，解码时忽略不完整的字符）
+        content = ""
+        if msg.is_multipart():
+            for part in msg.walk():
+                if part.get_content_type() == 'text/plain':
+                    charset = part.get_content_charset() or 'utf-8'
+                    content = (part.get_payload(decode=True) or b'').decode(charset, errors='ignore')
+                    break
+        else:
+            charset = msg.get_content_charset() or 'utf-8'
+            content = (msg.get_payload(decode=True) or b'').decode(charset, errors='ignore')
+        
+        return {
+            'id': str(item['seq']),
+            'uid': item['uid'],
+            'subject': self.decode_str(msg['Subject']),
+            'from': self.decode_str(msg['From']),
+            'date': msg['Date'],
+            'message_id': msg['Message-ID'],
+            'flags': item['flags'],
+            'content': content[:500] + '...' if len(content) > 500 else content
+        }
+    
     def close(self):
         """关闭连接"""
+        if self.cache is not None:
+            self.cache.close()
         if self.smtp_conn:
             try:
                 self.smtp_conn.quit()
@@ -187,6 +417,8 @@ def main():
     print("=" * 50)
     
     tool.setup()
+    # 查看邮件时只从服务器取新邮件，其余从本地缓存读取
+    tool.cache = MailCache(account=tool.email)
     
     while True:
         print("\n" + "=" * 50)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 响应磁盘缓存
+功能：作为 requests 的传输适配器挂在 Session 上，对 GET 请求
+- 保存响应正文以及 ETag / Last-Modified
+- 再次请求时发送 If-None-Match / If-Modified-Since 条件请求
+- 服务器返回 304 时直接从磁盘返回缓存的正文，不再下载
+"""
+
+import hashlib
+import json
+import os
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# 缓存中保留的响应头
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+
+class CachingAdapter(HTTPAdapter):
+    """带磁盘缓存与条件请求的传输适配器"""
+
+    def __init__(self, cache_dir='http_cache', **kwargs):
+        """
+        参数:
+            cache_dir - 缓存目录
+            kwargs - 传给 HTTPAdapter 的参数，如 pool_connections、pool_maxsize
+        """
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, url):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, digest[:2], digest)
+        return base + '.json', base + '.body'
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        directory = os.path.dirname(meta_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        headers = {k: response.headers[k] for k in KEPT_HEADERS if k in response.headers}
+        # 先写临时文件再改名，并发抓取时不会读到写了一半的缓存
+        for path, data, mode in ((body_path, response.content, 'wb'),
+                                 (meta_path, json.dumps({'url': url, 'headers': headers}), 'w')):
+            tmp_path = f"{path}.{os.getpid()}.{id(response)}.tmp"
+            with open(tmp_path, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def _cached_response(self, request, meta, body):
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.headers['X-Cache'] = 'HIT'
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        return response
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        meta, body = self._load(request.url)
+        if meta is not None:
+            headers = meta['headers']
+            if 'ETag' in headers:
+                request.headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers:
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and meta is not None:
+            self.hits += 1
+            response.close()
+            return self._cached_response(request, meta, body)
+
+        self.misses += 1
+        if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            self._store(request.url, response)
+        return response
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地邮件缓存
+功能：为 EmailTool 保存邮件列表与预览，重复查看邮件时几乎不产生网络流量
+- SQLite 保存每个文件夹的 UIDVALIDITY 与已同步的最大 UID，以及每封邮件的头部字段和预览
+- 每次同步只取 UID 大于已同步最大值的新邮件；服务器的 UIDNEXT 表明没有新邮件时连 FETCH 都不发
+- UIDVALIDITY 变化（文件夹被重建，UID 不再可信）时丢弃该文件夹的缓存重新同步
+- 完整邮件按需下载一次，以文件形式保存在缓存目录中
+
+说明：缓存不跟踪已同步邮件的标记变化与服务器上的删除
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    name         TEXT PRIMARY KEY,
+    uidvalidity  INTEGER,
+    highest_uid  INTEGER NOT NULL DEFAULT 0,
+    synced_at    REAL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    folder      TEXT NOT NULL,
+    uid         INTEGER NOT NULL,
+    message_id  TEXT,
+    subject     TEXT,
+    sender      TEXT,
+    date        TEXT,
+    flags       TEXT,
+    preview     TEXT,
+    PRIMARY KEY (folder, uid)
+) WITHOUT ROWID;
+"""
+
+
+class MailCache:
+    """按文件夹同步的本地邮件缓存"""
+
+    def __init__(self, directory='mail_cache', account='default', initial_limit=500):
+        """
+        参数:
+            directory - 缓存目录
+            account - 账户名（通常为邮箱地址），每个账户一个数据库
+            initial_limit - 首次同步时最多获取的最新邮件数，避免大邮箱首次同步过慢
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.blob_dir = os.path.join(directory, account)
+        self.initial_limit = initial_limit
+        self.conn = sqlite3.connect(os.path.join(directory, f'{account}.db'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def _folder_state(self, folder):
+        row = self.conn.execute('SELECT uidvalidity, highest_uid FROM folders WHERE name = ?', (folder,)).fetchone()
+        return row if row else (None, 0)
+
+    def _folder_dir(self, folder):
+        return os.path.join(self.blob_dir, folder.replace('/', '_').replace('\\', '_'))
+
+    def _blob_path(self, folder, uidvalidity, uid):
+        return os.path.join(self._folder_dir(folder), str(uidvalidity), f'{uid}.eml')
+
+    def reset(self, folder):
+        """丢弃一个文件夹的全部缓存"""
+        with self.conn:
+            self.conn.execute('DELETE FROM messages WHERE folder = ?', (folder,))
+            self.conn.execute('DELETE FROM folders WHERE name = ?', (folder,))
+        shutil.rmtree(self._folder_dir(folder), ignore_errors=True)
+
+    def sync(self, tool, folder='INBOX', preview_bytes=2048):
+        """
+        从服务器同步新邮件
+        参数:
+            tool - 已连接 IMAP 的 EmailTool
+            folder - 邮箱文件夹
+            preview_bytes - 每封邮件取回的正文字节数
+        返回: 新缓存的邮件数
+        """
+        info = tool.select_mailbox(folder)
+        uidvalidity, highest_uid = self._folder_state(folder)
+
+        if uidvalidity is not None and info['uidvalidity'] != uidvalidity:
+            print(f"{folder} 的 UIDVALIDITY 已变化，重新同步")
+            self.reset(folder)
+            highest_uid = 0
+
+        if info['uidnext'] is not None and info['uidnext'] <= highest_uid + 1:
+            emails = []
+        elif highest_uid:
+            emails = tool.fetch_selected(info['exists'], since_uid=highest_uid, preview_bytes=preview_bytes)
+        else:
+            emails = tool.fetch_selected(info['exists'], count=self.initial_limit, preview_bytes=preview_bytes,
+                                         uidnext=info['uidnext'])
+
+        # 序号在服务器删除邮件后会变化，缓存只以 UID 标识邮件
+        rows = [(folder, e['uid'], e['message_id'], e['subject'], e['from'], e['date'],
+                 json.dumps(e['flags']), e['content']) for e in emails]
+        if emails:
+            highest_uid = max(highest_uid, max(e['uid'] for e in emails))
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.conn.execute('INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?)',
+                              (folder, info['uidvalidity'], highest_uid, time.time()))
+        return len(emails)
+
+    def list(self, folder='INBOX', count=5):
+        """
+        从缓存中读取最新邮件列表，格式与 EmailTool.fetch_emails 相同
+        缓存的序号在服务器删除邮件后就不再准确，id 字段使用 UID
+        返回: 邮件信息列表，按 UID 从新到旧排列
+        """
+        rows = self.conn.execute(
+            'SELECT uid, message_id, subject, sender, date, flags, preview FROM messages '
+            'WHERE folder = ? ORDER BY uid DESC LIMIT ?', (folder, count))
+        return [{
+            'id': str(uid),
+            'uid': uid,
+            'subject': subject,
+            'from': sender,
+            'date': date,
+            'message_id': message_id,
+            'flags': json.loads(flags),
+            'content': preview,
+        } for uid, message_id, subject, sender, date, flags, preview in rows]
+
+    def get_body(self, tool, uid, folder='INBOX'):
+        """
+        获取完整邮件，第一次从服务器下载并保存，之后直接读取本地文件
+        参数:
+            tool - 已连接 IMAP 的 EmailTool
+            uid - 邮件 UID
+            folder - 邮箱文件夹
+        返回: RFC822 原始字节，不存在时返回None
+        """
+        uidvalidity, _ = self._folder_state(folder)
+        if uidvalidity is not None:
+            path = self._blob_path(folder, uidvalidity, uid)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+
+        info = tool.select_mailbox(folder)
+        body = tool.fetch_body(uid)
+        if body is None:
+            return None
+
+        path = self._blob_path(folder, info['uidvalidity'], uid)
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        return body
+
+    def close(self):
+        self.conn.close()
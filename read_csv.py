@@ -4,20 +4,12 @@ from tkinter import filedialog
 import warnings
 import os
 
+# 编码检测与本地行情数据源共用同一实现
+from src.data_source import detect_encoding
+
 warnings.filterwarnings('ignore')
 os.environ['PYDEVD_DISABLE_FILE_VALIDATION'] = '1'
 
-def detect_encoding(file_path):
-    encodings = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'big5', 'latin1']
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                f.read(1024)
-            return encoding
-        except:
-            continue
-    return 'utf-8'
-
 def select_csv_file():
     root = tk.Tk()
     root.withdraw()
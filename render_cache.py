@@ -0,0 +1,123 @@
+"""
+pygame 渲染缓存
+功能：供 test.py（贪吃蛇）与 bird_game.py（小鸟）共用，降低每帧的 CPU 开销
+- 字体只加载一次
+- 文字渲染结果按 (字体, 文字, 颜色) 缓存，静态文字与分数不必每帧重新渲染
+- 渐变背景预先渲染为一张 Surface
+- 按脏矩形重绘：每帧只恢复上一帧精灵所在区域的背景，只把变化的区域提交到屏幕
+"""
+
+import pygame
+
+DEFAULT_FONT_PATHS = ("C:/Windows/Fonts/msyh.ttc", "C:/Windows/Fonts/simsun.ttc")
+
+_fonts = {}
+
+
+def load_font(size, paths=DEFAULT_FONT_PATHS, sysfont=None):
+    """
+    加载字体，相同参数只加载一次
+    参数:
+        size - 字号
+        paths - 依次尝试的字体文件
+        sysfont - 字体文件都不可用时使用的系统字体名，为None时使用 pygame 默认字体
+    返回: pygame.font.Font
+    """
+    key = (size, tuple(paths), sysfont)
+    font = _fonts.get(key)
+    if font is None:
+        for path in paths:
+            try:
+                font = pygame.font.Font(path, size)
+                break
+            except OSError:
+                continue
+        else:
+            font = pygame.font.SysFont(sysfont, size) if sysfont else pygame.font.Font(None, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """文字渲染结果缓存"""
+
+    def __init__(self, max_entries=256):
+        """
+        参数: max_entries - 最多缓存的文字数，超过后清空重新缓存（分数等不断变化的文字不会无限增长）
+        """
+        self.max_entries = max_entries
+        self.surfaces = {}
+
+    def render(self, font, text, color, antialias=True):
+        """与 font.render 相同，已渲染过的文字直接返回缓存的 Surface"""
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if len(self.surfaces) >= self.max_entries:
+                self.surfaces.clear()
+            surface = font.render(text, antialias, color)
+            self.surfaces[key] = surface
+        return surface
+
+
+def vertical_gradient(width, height, color_at):
+    """
+    预先渲染竖直方向的渐变
+    参数:
+        width / height - 尺寸
+        color_at - color_at(y) 返回第 y 行的颜色
+    返回: pygame.Surface
+    """
+    # 先画一列像素，再横向拉伸，代替逐行画线
+    column = pygame.Surface((1, height))
+    for y in range(height):
+        column.set_at((0, y), color_at(y))
+    return pygame.transform.scale(column, (width, height))
+
+
+class DirtyRectRenderer:
+    """在缓存的背景上按脏矩形重绘"""
+
+    def __init__(self, screen, background):
+        """
+        参数:
+            screen - 显示 Surface
+            background - 与屏幕同尺寸的背景 Surface
+        """
+        self.screen = screen
+        self.background = background
+        self.previous = []
+        self.dirty = []
+        self.full_redraw = True
+
+    def set_background(self, background):
+        """更换背景，下一帧整屏重绘"""
+        self.background = background
+        self.full_redraw = True
+
+    def clear(self):
+        """开始新的一帧：在上一帧画过的区域恢复背景"""
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)
+
+    def add(self, rect):
+        """登记本帧画过的区域（pygame.draw 的返回值）"""
+        self.dirty.append(rect)
+        return rect
+
+    def blit(self, surface, dest):
+        """绘制 Surface 并登记区域"""
+        return self.add(self.screen.blit(surface, dest))
+
+    def present(self):
+        """提交本帧：只更新上一帧与本帧画过的区域"""
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.previous + self.dirty)
+        self.previous = self.dirty
+        self.dirty = []
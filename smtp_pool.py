@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SMTP 连接池与批量发送
+功能：
+- 维护少量已登录的 SMTP 连接，多个发送线程复用，连接数即并发上限
+- 服务器断开连接、返回 421 等临时错误时丢弃该连接，重新连接后重试
+- 每个连接发送一定数量的邮件后主动重连，避免触发服务器的单连接限额
+- 批量发送返回每封邮件的结果（包括被服务器拒绝的收件人）以及整体吞吐量
+"""
+
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 可以通过重新连接解决的错误
+RETRYABLE_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+def _format_refused(refused):
+    """收件人 -> (状态码, 响应) 转换为 收件人 -> "状态码 响应" """
+    return {rcpt: f"{code} {message.decode('utf-8', 'replace') if isinstance(message, bytes) else message}"
+            for rcpt, (code, message) in refused.items()}
+
+
+def _retryable(error):
+    # 4xx 为临时错误（如 421 服务不可用、451 处理出错），5xx 为永久错误
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class SMTPPool:
+    """已登录 SMTP 连接的连接池"""
+
+    def __init__(self, host, port=587, username=None, password=None, size=4,
+                 starttls=True, timeout=30, max_per_connection=100):
+        """
+        参数:
+            host / port - SMTP 服务器地址与端口，端口为 465 时使用 SSL 直连
+            username / password - 登录凭据，为None时不登录
+            size - 连接数上限
+            starttls - 非 SSL 端口是否执行 STARTTLS
+            timeout - 网络超时（秒）
+            max_per_connection - 每个连接最多发送的邮件数，超过后重新连接
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_per_connection = max_per_connection
+
+        self.idle = queue.LifoQueue()
+        # 连接总数（空闲 + 使用中）不超过 size
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.connects = 0
+
+    def _connect(self):
+        if self.port == 465:
+            conn = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        conn.sent_count = 0
+        with self.lock:
+            self.connects += 1
+        return conn
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    def acquire(self):
+        """取得一个连接（必要时新建），使用后须调用 release"""
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """
+        归还连接
+        参数:
+            conn - acquire 得到的连接
+            broken - 连接已出错时为True，直接丢弃
+        """
+        if broken or conn.sent_count >= self.max_per_connection:
+            self._discard(conn)
+        else:
+            self.idle.put(conn)
+        self.slots.release()
+
+    def send(self, msg, retries=2):
+        """
+        发送一封邮件，连接出错时重新连接并重试
+        参数:
+            msg - email.message.Message
+            retries - 最多重试次数
+        返回: (尝试次数, 被拒绝的收件人字典 收件人 -> (状态码, 响应))
+              只有部分收件人被拒绝时邮件仍会发给其余收件人，不抛出异常
+        """
+        for attempt in range(1, retries + 2):
+            try:
+                conn = self.acquire()
+            except Exception as e:
+                if attempt > retries or not _retryable(e):
+                    e.attempts = attempt
+                    raise
+                continue
+            try:
+                refused = conn.send_message(msg)
+                conn.sent_count += 1
+            except Exception as e:
+                # 服务器拒绝了收件人时连接仍然可用
+                self.release(conn, broken=not isinstance(e, smtplib.SMTPRecipientsRefused))
+                if attempt > retries or not _retryable(e):
+                    e.attempts = attempt
+                    raise
+                continue
+            self.release(conn)
+            return attempt, refused
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+def send_bulk(pool, messages, retries=2):
+    """
+    并发批量发送
+    参数:
+        pool - SMTPPool，并发数等于连接池大小
+        messages - email.message.Message 列表
+        retries - 每封邮件的最多重试次数
+    返回: (结果列表, 汇总字典)
+        结果与 messages 一一对应：to、ok、error、refused、attempts、seconds
+            refused 为被服务器拒绝的收件人 -> "状态码 响应"；部分收件人被拒绝时 ok 仍为True
+        汇总：sent、failed、refused（被拒绝的收件人数）、seconds、per_sec、connects
+    """
+    def send_one(msg):
+        start = time.perf_counter()
+        result = {'to': msg['To'], 'ok': True, 'error': None, 'refused': {}, 'attempts': 0}
+        try:
+            result['attempts'], refused = pool.send(msg, retries)
+            result['refused'] = _format_refused(refused)
+        except Exception as e:
+            result['ok'] = False
+            result['error'] = f"{type(e).__name__}: {e}"
+            result['attempts'] = getattr(e, 'attempts', 1)
+            if isinstance(e, smtplib.SMTPRecipientsRefused):
+                result['refused'] = _format_refused(e.recipients)
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    connects_before = pool.connects
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        results = list(executor.map(send_one, messages))
+    elapsed = time.perf_counter() - start
+
+    sent = sum(1 for r in results if r['ok'])
+    summary = {
+        'sent': sent,
+        'failed': len(results) - sent,
+        'refused': sum(len(r['refused']) for r in results),
+        'seconds': elapsed,
+        'per_sec': sent / elapsed if elapsed else 0.0,
+        'connects': pool.connects - connects_before,
+    }
+    return results, summary
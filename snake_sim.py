@@ -0,0 +1,217 @@
+"""
+贪吃蛇无界面模拟
+功能：与 test.py 中的贪吃蛇游戏规则完全一致，但不依赖 pygame、不打开窗口
+- 按回合（tick）推进，每回合蛇移动一格，不受真实时间影响，可以快速运行大量对局
+- 蛇身使用 deque 保存，另用 格子 -> 占用次数 的字典判断撞到自身，每回合 O(1)
+- 可用于训练智能体与基准测试
+
+用法：
+    python snake_sim.py --games 5000 --seed 1
+"""
+
+import random
+from collections import deque
+
+# 游戏常量（与 test.py 的 800x600 窗口、20 像素格子一致）
+GRID_WIDTH = 40
+GRID_HEIGHT = 30
+
+# 方向
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+FOOD_SCORE = 10
+DEFAULT_MOVE_INTERVAL = 0.5
+
+
+class SnakeSim:
+    """贪吃蛇游戏状态与规则"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None, rng=None):
+        """
+        参数:
+            width / height - 棋盘格子数
+            seed - 随机种子，相同种子与操作序列得到相同的对局
+            rng - 随机数生成器，指定后忽略 seed
+        """
+        self.width = width
+        self.height = height
+        self.rng = rng or random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        """开始新的一局"""
+        head = (self.width // 2, self.height // 2)
+        self.body = deque([head])
+        # 格子 -> 蛇身在该格子上的节数（吃到食物时新蛇头可能与已有蛇身重叠）
+        self.occupied = {head: 1}
+        self.direction = RIGHT
+        self.next_direction = RIGHT
+        self.food = self.generate_food()
+        self.score = 0
+        self.ticks = 0
+        self.game_over = False
+        self.default_move_interval = DEFAULT_MOVE_INTERVAL
+        self.move_interval = DEFAULT_MOVE_INTERVAL
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    def generate_food(self):
+        """随机生成食物位置（可能落在蛇身上，与原游戏一致）"""
+        x = self.rng.randint(0, self.width - 1)
+        y = self.rng.randint(0, self.height - 1)
+        return (x, y)
+
+    def turn(self, direction):
+        """
+        按方向键：与当前方向相同时加速，与当前方向相反时忽略，否则在下一回合转向
+        参数: direction - UP / DOWN / LEFT / RIGHT
+        """
+        if self.direction == direction:
+            self.move_interval = self.default_move_interval / 2
+        elif self.direction != (-direction[0], -direction[1]):
+            self.next_direction = direction
+            self.move_interval = self.default_move_interval
+
+    def _push_head(self):
+        head_x, head_y = self.body[0]
+        dx, dy = self.direction
+        new_head = (head_x + dx, head_y + dy)
+        self.body.appendleft(new_head)
+        self.occupied[new_head] = self.occupied.get(new_head, 0) + 1
+        return new_head
+
+    def move(self):
+        self.direction = self.next_direction
+        self._push_head()
+        tail = self.body.pop()
+        count = self.occupied[tail] - 1
+        if count:
+            self.occupied[tail] = count
+        else:
+            del self.occupied[tail]
+
+    def grow(self):
+        # 与原游戏一致：吃到食物时沿当前方向再加一个蛇头
+        self._push_head()
+
+    def check_collision(self):
+        head_x, head_y = head = self.body[0]
+
+        if head_x < 0 or head_x >= self.width or head_y < 0 or head_y >= self.height:
+            return True
+
+        # 蛇头本身占一次，超过一次说明撞到了自己
+        return self.occupied[head] > 1
+
+    def is_blocked(self, cell):
+        """格子在棋盘外或被蛇身占用"""
+        x, y = cell
+        return x < 0 or x >= self.width or y < 0 or y >= self.height or cell in self.occupied
+
+    def step(self, direction=None):
+        """
+        推进一个回合
+        参数: direction - 本回合前按下的方向键，None 表示不操作
+        返回: (本回合得分, 是否结束)
+        """
+        if self.game_over:
+            return 0, True
+        if direction is not None:
+            self.turn(direction)
+
+        self.move()
+        self.ticks += 1
+
+        if self.check_collision():
+            self.game_over = True
+
+        reward = 0
+        if self.body[0] == self.food:
+            self.grow()
+            self.score += FOOD_SCORE
+            reward = FOOD_SCORE
+            self.food = self.generate_food()
+        return reward, self.game_over
+
+    def play(self, policy, max_ticks=10000):
+        """
+        用策略函数玩一局
+        参数:
+            policy - policy(sim) 返回方向或 None
+            max_ticks - 最多回合数
+        返回: 得分
+        """
+        while not self.game_over and self.ticks < max_ticks:
+            self.step(policy(self))
+        return self.score
+
+
+def greedy_policy(sim):
+    """朝食物方向前进，避开会立即撞上的格子"""
+    head_x, head_y = sim.body[0]
+    food_x, food_y = sim.food
+    preferred = []
+    if food_x != head_x:
+        preferred.append(RIGHT if food_x > head_x else LEFT)
+    if food_y != head_y:
+        preferred.append(DOWN if food_y > head_y else UP)
+    for direction in preferred + list(DIRECTIONS):
+        if direction == (-sim.direction[0], -sim.direction[1]):
+            continue
+        if not sim.is_blocked((head_x + direction[0], head_y + direction[1])):
+            return direction
+    return None
+
+
+def benchmark(games=1000, seed=0, policy=greedy_policy, max_ticks=10000):
+    """
+    连续运行多局
+    返回: 结果字典 games、ticks、seconds、games_per_sec、ticks_per_sec、mean_score、max_score
+    """
+    import time
+
+    rng = random.Random(seed)
+    sim = SnakeSim(rng=rng)
+    scores = []
+    ticks = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        sim.reset()
+        scores.append(sim.play(policy, max_ticks))
+        ticks += sim.ticks
+    elapsed = time.perf_counter() - start
+    return {
+        'games': games,
+        'ticks': ticks,
+        'seconds': elapsed,
+        'games_per_sec': games / elapsed if elapsed else 0.0,
+        'ticks_per_sec': ticks / elapsed if elapsed else 0.0,
+        'mean_score': sum(scores) / len(scores) if scores else 0.0,
+        'max_score': max(scores) if scores else 0,
+    }
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='贪吃蛇无界面模拟')
+    parser.add_argument('--games', type=int, default=1000, help='对局数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--max-ticks', type=int, default=10000, help='每局最多回合数')
+    args = parser.parse_args()
+
+    result = benchmark(args.games, args.seed, max_ticks=args.max_ticks)
+    print(f"{result['games']} 局，{result['ticks']} 回合，耗时 {result['seconds']:.2f} 秒")
+    print(f"{result['games_per_sec']:.0f} 局/秒，{result['ticks_per_sec']:.0f} 回合/秒")
+    print(f"平均得分 {result['mean_score']:.1f}，最高得分 {result['max_score']}")
+
+
+if __name__ == "__main__":
+    main()
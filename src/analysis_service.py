@@ -0,0 +1,254 @@
+"""
+常驻分析服务
+功能：
+1. 进程只启动一次，pandas / matplotlib / tushare 只导入一次，ts.set_token 只调用一次
+2. 在内存中缓存行情数据、指标与信号结果、渲染好的图表，按 LRU 淘汰
+3. 同一股票的并发请求合并为一次计算
+4. 提供本地 HTTP/JSON 接口：
+       GET /signals/{ts_code}      买卖信号（JSON）
+       GET /data/{ts_code}         完整指标数据（JSON）
+       GET /chart/{ts_code}.png    股价与均线图（PNG）
+       GET /stats                  缓存命中统计
+
+用法：
+    TUSHARE_TOKEN=xxx python src/analysis_service.py --port 8000
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+import matplotlib
+matplotlib.use('Agg')  # 服务端没有显示设备，使用非交互后端
+
+from stock_analyzer import StockAnalyzer
+
+
+class AnalysisCache:
+    """
+    带 LRU 淘汰与并发请求合并的分析结果缓存
+
+    缓存键为 (种类, 股票代码)，种类为 'data' 或 'chart'。
+    某个键正在计算时，后续请求等待同一个 Future，而不是重复计算。
+    """
+
+    def __init__(self, analyzer, max_entries=256, ttl=300, years=3):
+        """
+        参数:
+            analyzer: StockAnalyzer 实例，整个服务共用
+            max_entries: 缓存条目上限，超出时淘汰最久未使用的条目
+            ttl: 缓存有效期（秒），过期后下次请求重新获取数据
+            years: 获取数据的年数
+        """
+        self.analyzer = analyzer
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.years = years
+
+        self.entries = OrderedDict()  # key -> (写入时间, 结果)
+        self.inflight = {}  # key -> Future
+        self.lock = threading.Lock()
+        # matplotlib 的 pyplot 状态不是线程安全的，渲染图表时串行执行
+        self.chart_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get_or_compute(self, key, compute):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = compute()
+        except Exception as e:
+            with self.lock:
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.inflight[key]
+            if result is not None:
+                self.entries[key] = (time.time(), result)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def _compute_data(self, ts_code):
+        df = self.analyzer.get_stock_data(ts_code, years=self.years)
+        if df is None:
+            return None
+        df = self.analyzer.calculate_moving_averages(df)
+        return self.analyzer.detect_signals(df)
+
+    def get_data(self, ts_code):
+        """
+        获取包含均线与信号的股票数据
+
+        返回:
+            DataFrame: 股票数据，获取失败时返回 None
+        """
+        return self._get_or_compute(('data', ts_code), lambda: self._compute_data(ts_code))
+
+    def _compute_chart(self, ts_code):
+        df = self.get_data(ts_code)
+        if df is None:
+            return None
+        with self.chart_lock:
+            return self.analyzer.render_chart_png(df, ts_code.split('.')[0])
+
+    def get_chart(self, ts_code):
+        """
+        获取股价与均线图
+
+        返回:
+            bytes: PNG图片数据，失败时返回 None
+        """
+        return self._get_or_compute(('chart', ts_code), lambda: self._compute_chart(ts_code))
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'inflight': len(self.inflight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+            }
+
+
+def records(df):
+    """将 DataFrame 转换为可序列化为 JSON 的记录列表"""
+    df = df.copy()
+    df['交易日期'] = df['交易日期'].dt.strftime('%Y-%m-%d')
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient='records')
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理器，缓存对象挂在 server.cache 上"""
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        cache = self.server.cache
+        parts = [unquote(p) for p in urlparse(self.path).path.strip('/').split('/')]
+
+        try:
+            if parts == ['stats']:
+                self._send_json(200, cache.stats())
+                return
+
+            if len(parts) != 2:
+                self._send_json(404, {'error': '未知接口'})
+                return
+
+            endpoint, ts_code = parts
+            if endpoint == 'chart' and ts_code.endswith('.png'):
+                png = cache.get_chart(ts_code[:-4])
+                if png is None:
+                    self._send_json(404, {'error': f'无法生成 {ts_code} 的图表'})
+                else:
+                    self._send(200, png, 'image/png')
+            elif endpoint in ('signals', 'data'):
+                df = cache.get_data(ts_code)
+                if df is None:
+                    self._send_json(404, {'error': f'未获取到 {ts_code} 的数据'})
+                    return
+                if endpoint == 'signals':
+                    df = df[df['信号'] != '']
+                self._send_json(200, {'ts_code': ts_code, 'rows': records(df)})
+            else:
+                self._send_json(404, {'error': '未知接口'})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        # 默认实现每个请求写一行 stderr，高并发时开销明显，这里关闭
+        pass
+
+
+def create_server(analyzer, host='127.0.0.1', port=8000, **cache_options):
+    """
+    创建分析服务
+
+    参数:
+        analyzer: StockAnalyzer 实例
+        host: 监听地址
+        port: 监听端口
+        cache_options: 传给 AnalysisCache 的参数
+
+    返回:
+        ThreadingHTTPServer: 尚未启动的服务对象
+    """
+    server = ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.cache = AnalysisCache(analyzer, **cache_options)
+    return server
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="股票分析常驻服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8000, help="监听端口")
+    parser.add_argument('--token', default=os.environ.get('TUSHARE_TOKEN'), help="Tushare token")
+    parser.add_argument('--max-entries', type=int, default=256, help="缓存条目上限")
+    parser.add_argument('--ttl', type=int, default=300, help="缓存有效期（秒）")
+    args = parser.parse_args()
+
+    if not args.token:
+        print("⚠️  请通过 --token 或环境变量 TUSHARE_TOKEN 提供 Tushare Token")
+        return
+
+    analyzer = StockAnalyzer(args.token)
+    server = create_server(analyzer, args.host, args.port,
+                           max_entries=args.max_entries, ttl=args.ttl)
+    print(f"🚀 分析服务已启动: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\n服务已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+全市场横截面相关性分析
+功能：
+1. 基于每日 涨跌幅(%) 计算滚动窗口内的收益率相关性
+2. 相关矩阵按块计算（block_size × block_size），从不构建完整的 N×N 矩阵
+3. 每新增一个交易日只做 O(N) 的增量更新
+4. 支持查询与某只股票相关性最高的 k 只股票，以及基于 top-k 邻居的聚类
+
+内存占用：窗口收益率 window×N，top-k 结果 N×k，单个相关块 block_size²。
+缺失值（停牌等）在标准化后按 0 处理，即视为窗口均值。
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class RollingCorrelation:
+    """滚动窗口横截面相关性"""
+
+    def __init__(self, symbols, window=60, block_size=512, min_periods=None):
+        """
+        参数:
+            symbols: 股票代码列表，决定矩阵的列顺序，之后新增的代码会被忽略
+            window: 滚动窗口长度（交易日）
+            block_size: 分块大小，决定单块相关矩阵的内存上限
+            min_periods: 窗口内至少需要的有效观测数，默认为 window 的一半
+        """
+        self.symbols = list(symbols)
+        self.index = {code: i for i, code in enumerate(self.symbols)}
+        self.window = window
+        self.block_size = block_size
+        self.min_periods = min_periods or max(2, window // 2)
+
+        n = len(self.symbols)
+        # 环形缓冲区保存窗口内的收益率，NaN 表示缺失
+        self.returns = np.full((window, n), np.nan, dtype=np.float64)
+        self.dates = [None] * window
+        self.count = 0  # 累计加入的交易日数
+
+        # 增量维护的统计量：有效观测数、和、平方和
+        self.valid = np.zeros(n, dtype=np.int64)
+        self.sum1 = np.zeros(n, dtype=np.float64)
+        self.sum2 = np.zeros(n, dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, df, window=60, block_size=512, min_periods=None):
+        """
+        从长表构建，长表需包含 股票代码、交易日期、涨跌幅(%) 三列
+
+        返回:
+            RollingCorrelation: 已加入窗口内全部交易日的对象
+        """
+        matrix = df.pivot_table(index='交易日期', columns='股票代码', values='涨跌幅(%)', aggfunc='last')
+        matrix = matrix.sort_index()
+        corr = cls(matrix.columns, window, block_size, min_periods)
+        values = matrix.to_numpy(dtype=np.float64) / 100.0
+        for date, row in zip(matrix.index[-window:], values[-window:]):
+            corr.add_day(date, row)
+        return corr
+
+    def add_day(self, trade_date, returns):
+        """
+        加入一个交易日的收益率，窗口已满时移出最早的一天
+
+        参数:
+            trade_date: 交易日期
+            returns: 与 symbols 顺序一致的数组（小数收益率），
+                     或以股票代码为索引的 Series（涨跌幅百分比会被除以100）
+        """
+        if isinstance(returns, pd.Series):
+            row = np.full(len(self.symbols), np.nan)
+            codes = returns.index
+            positions = np.fromiter((self.index.get(c, -1) for c in codes), dtype=np.int64, count=len(codes))
+            known = positions >= 0
+            row[positions[known]] = returns.to_numpy(dtype=np.float64)[known] / 100.0
+        else:
+            row = np.asarray(returns, dtype=np.float64)
+
+        slot = self.count % self.window
+        old = self.returns[slot]
+        if self.count >= self.window:
+            old_valid = ~np.isnan(old)
+            self.valid -= old_valid
+            self.sum1 -= np.where(old_valid, old, 0.0)
+            self.sum2 -= np.where(old_valid, old * old, 0.0)
+
+        new_valid = ~np.isnan(row)
+        self.valid += new_valid
+        clean = np.where(new_valid, row, 0.0)
+        self.sum1 += clean
+        self.sum2 += clean * clean
+
+        self.returns[slot] = row
+        self.dates[slot] = trade_date
+        self.count += 1
+
+        # 每满一个窗口从缓冲区重算一次统计量，避免浮点误差累积
+        if self.count % self.window == 0:
+            mask = ~np.isnan(self.returns)
+            filled = np.where(mask, self.returns, 0.0)
+            self.valid = mask.sum(axis=0)
+            self.sum1 = filled.sum(axis=0)
+            self.sum2 = (filled * filled).sum(axis=0)
+
+    def standardized(self):
+        """
+        返回窗口内标准化后的收益率矩阵 Z（window × N，float32）
+
+        Z 的列满足 Z[:, i] · Z[:, j] ≈ corr(i, j)；有效观测不足或方差为0的列全为0。
+        """
+        valid = np.maximum(self.valid, 1)
+        mean = self.sum1 / valid
+        var = np.maximum(self.sum2 / valid - mean * mean, 0.0)
+        std = np.sqrt(var)
+        usable = (self.valid >= self.min_periods) & (std > 0)
+
+        scale = np.zeros_like(std)
+        scale[usable] = 1.0 / (std[usable] * np.sqrt(valid[usable]))
+
+        z = self.returns - mean
+        np.nan_to_num(z, copy=False, nan=0.0)
+        z *= scale
+        return z.astype(np.float32), usable
+
+    def iter_blocks(self, z=None):
+        """
+        逐块产出相关矩阵的上三角部分（含对角块）
+
+        返回:
+            生成器: (行起始位置, 列起始位置, 相关系数块)
+        """
+        if z is None:
+            z, _ = self.standardized()
+        n = z.shape[1]
+        b = self.block_size
+        for i0 in range(0, n, b):
+            zi = z[:, i0:i0 + b]
+            for j0 in range(i0, n, b):
+                yield i0, j0, zi.T @ z[:, j0:j0 + b]
+
+    def neighbours(self, ts_code, k=10):
+        """
+        查询与指定股票相关性最高的 k 只股票
+
+        返回:
+            DataFrame: 股票代码、相关系数，按相关系数降序
+        """
+        z, usable = self.standardized()
+        i = self.index[ts_code]
+        if not usable[i]:
+            return pd.DataFrame(columns=['股票代码', '相关系数'])
+
+        corr = z[:, i] @ z
+        corr[i] = -np.inf
+        corr[~usable] = -np.inf
+        k = min(k, int(usable.sum()) - 1)
+        if k <= 0:
+            return pd.DataFrame(columns=['股票代码', '相关系数'])
+        top = np.argpartition(-corr, k - 1)[:k]
+        top = top[np.argsort(-corr[top])]
+        return pd.DataFrame({
+            '股票代码': [self.symbols[j] for j in top],
+            '相关系数': corr[top].astype(np.float64),
+        })
+
+    def top_k(self, k=10):
+        """
+        分块计算全市场每只股票的 top-k 相关邻居
+
+        返回:
+            tuple: (邻居下标数组 N×k, 相关系数数组 N×k)，不足 k 个时下标为 -1；k <= 0 时为 N×0 的空数组
+        """
+        n = len(self.symbols)
+        if k <= 0:
+            return np.empty((n, 0), dtype=np.int64), np.empty((n, 0), dtype=np.float32)
+        z, usable = self.standardized()
+        best_idx = np.full((n, k), -1, dtype=np.int64)
+        best_corr = np.full((n, k), -np.inf, dtype=np.float32)
+
+        def merge(rows, block, col0):
+            # 将一个块的候选与当前 top-k 合并，只保留每行最大的 k 个
+            cols = np.broadcast_to(np.arange(col0, col0 + block.shape[1]), block.shape)
+            cand_corr = np.concatenate([best_corr[rows], block], axis=1)
+            cand_idx = np.concatenate([best_idx[rows], cols], axis=1)
+            keep = np.argpartition(-cand_corr, k - 1, axis=1)[:, :k]
+            best_corr[rows] = np.take_along_axis(cand_corr, keep, axis=1)
+            best_idx[rows] = np.take_along_axis(cand_idx, keep, axis=1)
+
+        for i0, j0, block in self.iter_blocks(z):
+            rows_i = slice(i0, i0 + block.shape[0])
+            rows_j = slice(j0, j0 + block.shape[1])
+            block = block.copy()
+            block[~usable[rows_i], :] = -np.inf
+            block[:, ~usable[rows_j]] = -np.inf
+            if i0 == j0:
+                np.fill_diagonal(block, -np.inf)
+            merge(rows_i, block, j0)
+            if i0 != j0:
+                merge(rows_j, block.T, i0)
+
+        order = np.argsort(-best_corr, axis=1)
+        best_corr = np.take_along_axis(best_corr, order, axis=1)
+        best_idx = np.take_along_axis(best_idx, order, axis=1)
+        best_idx[~np.isfinite(best_corr)] = -1
+        return best_idx, best_corr
+
+    def clusters(self, threshold=0.7, k=10):
+        """
+        基于 top-k 邻居图聚类：相关系数不低于 threshold 的邻居连边，取连通分量
+
+        返回:
+            list: 股票代码列表的列表，按簇大小降序，不含单只股票的簇
+        """
+        best_idx, best_corr = self.top_k(k)
+        parent = np.arange(len(self.symbols))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        rows, cols = np.nonzero(best_corr >= threshold)
+        for i, j in zip(rows, best_idx[rows, cols]):
+            ri, rj = find(i), find(int(j))
+            if ri != rj:
+                parent[ri] = rj
+
+        groups = {}
+        for i in range(len(self.symbols)):
+            groups.setdefault(find(i), []).append(self.symbols[i])
+        result = [g for g in groups.values() if len(g) > 1]
+        result.sort(key=len, reverse=True)
+        return result
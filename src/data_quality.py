@@ -0,0 +1,189 @@
+"""
+行情数据质量检查
+功能：
+1. 对 get_stock_data 返回的日线数据做一次性的向量化检查，单只股票或全市场长表均可
+2. 检查项：重复交易日、缺失K线、停牌（成交量为0）、最高价低于最低价、
+   开盘价/收盘价超出 [最低价, 最高价]、价格缺失或非正
+3. 返回紧凑的异常报告，并可返回修复后的数据
+
+所有检查都是对整列数组的一次运算，不做逐行循环，可以在每日任务中常开。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 异常类型
+DUPLICATE_DATE = '重复交易日'
+MISSING_BAR = '缺失K线'
+ZERO_VOLUME = '成交量为0'
+HIGH_BELOW_LOW = '最高价低于最低价'
+OPEN_OUT_OF_RANGE = '开盘价超出高低区间'
+CLOSE_OUT_OF_RANGE = '收盘价超出高低区间'
+BAD_PRICE = '价格缺失或非正'
+
+
+class QualityReport:
+    """数据质量报告"""
+
+    def __init__(self, anomalies, missing_bars, rows):
+        """
+        参数:
+            anomalies: 行级异常 DataFrame，列为 股票代码、交易日期、问题
+            missing_bars: 每只股票缺失K线数量的 Series
+            rows: 检查的总行数
+        """
+        self.anomalies = anomalies
+        self.missing_bars = missing_bars
+        self.rows = rows
+
+    @property
+    def ok(self):
+        """是否没有任何异常"""
+        return self.anomalies.empty and not self.missing_bars.any()
+
+    def summary(self):
+        """
+        返回各类异常的数量
+
+        返回:
+            dict: 问题 -> 数量
+        """
+        counts = self.anomalies['问题'].value_counts().to_dict()
+        missing = int(self.missing_bars.sum())
+        if missing:
+            counts[MISSING_BAR] = missing
+        return counts
+
+    def __repr__(self):
+        if self.ok:
+            return f"QualityReport(rows={self.rows}, ok)"
+        items = ', '.join(f"{k}={v}" for k, v in self.summary().items())
+        return f"QualityReport(rows={self.rows}, {items})"
+
+
+def _sort_order(code_ids, dates):
+    """若数据已按 (股票代码, 交易日期) 排序则返回 None，否则返回排序下标"""
+    if len(dates) < 2:
+        return None
+    same = code_ids[1:] == code_ids[:-1]
+    ordered = (code_ids[1:] > code_ids[:-1]) | (same & (dates[1:] >= dates[:-1]))
+    if ordered.all():
+        return None
+    return np.lexsort((dates, code_ids))
+
+
+def scan(df, calendar=None, repair=False):
+    """
+    检查日线数据质量
+
+    参数:
+        df: 日线数据，需包含 股票代码、交易日期、开盘价、最高价、最低价、收盘价 列，
+            成交量(手) 列可选；可以是单只股票，也可以是多只股票的长表
+        calendar: 交易日历（日期序列），用于检查缺失K线；
+                  为 None 时以数据中出现过的所有交易日作为日历
+        repair: 是否同时返回修复后的数据
+
+    返回:
+        QualityReport，或 repair=True 时返回 (QualityReport, 修复后的 DataFrame)
+    """
+    if df.empty:
+        report = QualityReport(pd.DataFrame(columns=['股票代码', '交易日期', '问题']),
+                               pd.Series(dtype=np.int64, name=MISSING_BAR), 0)
+        return (report, df.copy()) if repair else report
+
+    code_ids, codes = pd.factorize(df['股票代码'], sort=True)
+    dates = pd.to_datetime(df['交易日期']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+    open_ = df['开盘价'].to_numpy(dtype=np.float64)
+    high = df['最高价'].to_numpy(dtype=np.float64)
+    low = df['最低价'].to_numpy(dtype=np.float64)
+    close = df['收盘价'].to_numpy(dtype=np.float64)
+    if '成交量(手)' in df.columns:
+        zero_volume = df['成交量(手)'].to_numpy(dtype=np.float64) == 0
+    else:
+        zero_volume = np.zeros(len(df), dtype=bool)
+
+    # 未排序时只对数组重排，DataFrame 只在需要修复时才重排
+    order = _sort_order(code_ids, dates)
+    if order is not None:
+        code_ids, dates = code_ids[order], dates[order]
+        open_, high, low, close = open_[order], high[order], low[order], close[order]
+        zero_volume = zero_volume[order]
+
+    # 行级检查，全部为整列布尔运算
+    same_code = np.zeros(len(df), dtype=bool)
+    same_code[1:] = code_ids[1:] == code_ids[:-1]
+    duplicate = np.zeros(len(df), dtype=bool)
+    duplicate[1:] = same_code[1:] & (dates[1:] == dates[:-1])
+
+    with np.errstate(invalid='ignore'):
+        bad_price = ~((open_ > 0) & (high > 0) & (low > 0) & (close > 0))
+        high_below_low = high < low
+        open_out = ~bad_price & ~high_below_low & ((open_ < low) | (open_ > high))
+        close_out = ~bad_price & ~high_below_low & ((close < low) | (close > high))
+
+    checks = [
+        (DUPLICATE_DATE, duplicate),
+        (BAD_PRICE, bad_price),
+        (HIGH_BELOW_LOW, high_below_low),
+        (OPEN_OUT_OF_RANGE, open_out),
+        (CLOSE_OUT_OF_RANGE, close_out),
+        (ZERO_VOLUME, zero_volume),
+    ]
+    positions = [np.flatnonzero(mask) for _, mask in checks]
+    all_positions = np.concatenate(positions)
+    anomalies = pd.DataFrame({
+        '股票代码': codes[code_ids[all_positions]],
+        '交易日期': pd.to_datetime(dates[all_positions]),
+        '问题': np.repeat([name for name, _ in checks], [len(p) for p in positions]),
+    })
+
+    # 缺失K线：每只股票首末交易日之间的日历天数减去实际出现的不重复交易日数
+    if calendar is None:
+        calendar = np.unique(dates)
+    else:
+        calendar = np.unique(pd.to_datetime(calendar).to_numpy(dtype='datetime64[ns]').view(np.int64))
+
+    starts = np.flatnonzero(np.r_[True, ~same_code[1:]])
+    ends = np.r_[starts[1:], len(df)] - 1
+    first_pos = np.searchsorted(calendar, dates[starts], side='left')
+    last_pos = np.searchsorted(calendar, dates[ends], side='right')
+    expected = last_pos - first_pos
+    in_calendar = np.isin(dates, calendar) & ~duplicate
+    actual = np.add.reduceat(in_calendar.astype(np.int64), starts)
+    missing_bars = pd.Series(np.maximum(expected - actual, 0), index=codes[code_ids[starts]], name=MISSING_BAR)
+
+    report = QualityReport(anomalies, missing_bars, len(df))
+    if not repair:
+        return report
+    if order is not None:
+        df = df.iloc[order]
+    return report, _repair(df, duplicate, bad_price, high_below_low, zero_volume)
+
+
+def _repair(df, duplicate, bad_price, high_below_low, zero_volume):
+    """
+    修复数据：
+    - 重复交易日保留最后一条
+    - 价格缺失或非正、以及停牌（成交量为0）的行删除，避免污染均线
+    - 最高价低于最低价时交换两者
+    - 开盘价/收盘价裁剪到 [最低价, 最高价]
+    """
+    # 重复交易日保留最后一条：标记为重复的是后一条，因此删除它前面的那条
+    drop_dup = np.zeros(len(df), dtype=bool)
+    drop_dup[:-1] = duplicate[1:]
+    keep = ~(drop_dup | bad_price | zero_volume)
+
+    fixed = df[keep].copy()
+    swap = high_below_low[keep]
+    if swap.any():
+        high = fixed['最高价'].to_numpy(copy=True)
+        low = fixed['最低价'].to_numpy(copy=True)
+        high[swap], low[swap] = low[swap], high[swap]
+        fixed['最高价'] = high
+        fixed['最低价'] = low
+
+    fixed['开盘价'] = fixed['开盘价'].clip(fixed['最低价'], fixed['最高价'])
+    fixed['收盘价'] = fixed['收盘价'].clip(fixed['最低价'], fixed['最高价'])
+
+    return fixed.reset_index(drop=True)
@@ -0,0 +1,277 @@
+"""
+行情数据源
+功能：
+1. 为 StockAnalyzer.get_stock_data 提供可插拔的数据源接口
+2. TushareSource：原有的 Tushare 在线数据源
+3. FileDataSource：读取本地 CSV / Parquet 行情文件（如数据商批量导出的 GBK 编码 CSV），无需联网
+   - 只读取一次文件头部样本即可判断编码
+   - 使用 pyarrow 的流式 CSV 解析器分块读取，未安装 pyarrow 时退回 pandas 分块读取
+   - 将数据商的列名映射为 Tushare 的字段名，后续处理与在线数据完全一致
+
+所有数据源的 daily() 都返回 Tushare pro.daily 格式的 DataFrame：
+ts_code, trade_date(YYYYMMDD), open, high, low, close, pre_close, change, pct_chg, vol, amount
+"""
+
+import codecs
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# 依次尝试的编码；gb18030 兼容 gbk / gb2312
+CANDIDATE_ENCODINGS = ['utf-8', 'gb18030', 'big5', 'latin1']
+
+# 常见数据商列名 -> Tushare 字段名
+DEFAULT_COLUMN_MAP = {
+    '代码': 'ts_code', '股票代码': 'ts_code', 'code': 'ts_code', 'symbol': 'ts_code',
+    '日期': 'trade_date', '交易日期': 'trade_date', 'date': 'trade_date',
+    '开盘': 'open', '开盘价': 'open',
+    '最高': 'high', '最高价': 'high',
+    '最低': 'low', '最低价': 'low',
+    '收盘': 'close', '收盘价': 'close',
+    '前收盘': 'pre_close', '前收盘价': 'pre_close', '昨收': 'pre_close',
+    '涨跌额': 'change',
+    '涨跌幅': 'pct_chg', '涨跌幅(%)': 'pct_chg',
+    '成交量': 'vol', '成交量(手)': 'vol', 'volume': 'vol',
+    '成交额': 'amount', '成交额(千元)': 'amount',
+}
+
+TUSHARE_COLUMNS = ['ts_code', 'trade_date', 'open', 'high', 'low', 'close',
+                   'pre_close', 'change', 'pct_chg', 'vol', 'amount']
+
+
+def detect_encoding(file_path, sample_size=65536):
+    """
+    只读取一次文件头部样本判断编码
+
+    参数:
+        file_path: 文件路径
+        sample_size: 样本字节数
+
+    返回:
+        str: 编码名称
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # 增量解码器允许样本末尾截断半个多字节字符
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'utf-8'
+
+
+def _code_variants(ts_code):
+    """数据商文件中的代码可能带或不带交易所后缀，两种写法都匹配"""
+    return list(dict.fromkeys([ts_code, ts_code.split('.')[0]]))
+
+
+class DataSource:
+    """数据源基类"""
+
+    def daily(self, ts_code, start_date, end_date):
+        """
+        获取日线数据
+
+        参数:
+            ts_code: 股票代码
+            start_date: 开始日期 YYYYMMDD
+            end_date: 结束日期 YYYYMMDD
+
+        返回:
+            DataFrame: Tushare pro.daily 格式的数据
+        """
+        raise NotImplementedError
+
+    def trade_calendar(self, start_date, end_date):
+        """
+        获取区间内的交易日历，用于检查缺失K线
+
+        参数:
+            start_date: 开始日期 YYYYMMDD
+            end_date: 结束日期 YYYYMMDD
+
+        返回:
+            list: 'YYYYMMDD' 格式的交易日，升序；数据源没有交易日历时返回 None
+        """
+        return None
+
+
+class TushareSource(DataSource):
+    """Tushare 在线数据源"""
+
+    def __init__(self, pro):
+        self.pro = pro
+
+    def daily(self, ts_code, start_date, end_date):
+        return self.pro.daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
+
+    def trade_calendar(self, start_date, end_date, exchange='SSE'):
+        cal = self.pro.trade_cal(exchange=exchange, start_date=start_date, end_date=end_date, is_open='1')
+        return sorted(cal['cal_date'].astype(str))
+
+
+class FileDataSource(DataSource):
+    """
+    本地文件数据源
+
+    path 可以是：
+    - 单个 CSV / Parquet 文件，包含一只或多只股票
+    - 目录，其中每只股票一个文件，文件名为 {ts_code}.csv 或 {ts_code}.parquet
+    """
+
+    def __init__(self, path, column_map=None, encoding=None, block_size=16 << 20, chunksize=200000,
+                 calendar=None):
+        """
+        参数:
+            path: 文件或目录路径
+            column_map: 额外的列名映射，会覆盖默认映射
+            encoding: 文件编码，None 表示自动检测
+            block_size: pyarrow 每次解析的字节数
+            chunksize: 未安装 pyarrow 时 pandas 每次读取的行数
+            calendar: 交易日历（'YYYYMMDD' 或日期的序列），None 表示没有交易日历
+        """
+        self.path = path
+        self.column_map = dict(DEFAULT_COLUMN_MAP)
+        if column_map:
+            self.column_map.update(column_map)
+        self.encoding = encoding
+        self.block_size = block_size
+        self.chunksize = chunksize
+        self.calendar = None
+        if calendar is not None:
+            self.calendar = sorted(pd.to_datetime(pd.Series(list(calendar)).astype(str)).dt.strftime('%Y%m%d'))
+
+    def _resolve(self, ts_code):
+        if not os.path.isdir(self.path):
+            return self.path
+        for name in (ts_code, ts_code.split('.')[0]):
+            for ext in ('.parquet', '.csv'):
+                candidate = os.path.join(self.path, name + ext)
+                if os.path.exists(candidate):
+                    return candidate
+        return None
+
+    def _normalize(self, df):
+        """映射列名并统一数据类型"""
+        df = df.rename(columns=self.column_map)
+        df = df[[c for c in TUSHARE_COLUMNS if c in df.columns]]
+        if 'trade_date' in df.columns:
+            dates = df['trade_date']
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates.astype(str).str.replace('-', '').str.replace('/', ''),
+                                       format='%Y%m%d')
+            df['trade_date'] = dates.dt.strftime('%Y%m%d')
+        if 'ts_code' in df.columns:
+            df['ts_code'] = df['ts_code'].astype(str)
+        return df
+
+    def _code_column(self, names):
+        for name in names:
+            if self.column_map.get(name) == 'ts_code':
+                return name
+        return None
+
+    def iter_chunks(self, file_path, ts_code=None):
+        """
+        分块读取文件，只保留指定股票的数据
+
+        参数:
+            file_path: CSV 或 Parquet 文件路径
+            ts_code: 股票代码，None 表示全部
+
+        返回:
+            生成器: 每次产出一个已映射列名的 DataFrame
+        """
+        if file_path.endswith('.parquet'):
+            yield from self._iter_parquet(file_path, ts_code)
+            return
+
+        encoding = self.encoding or detect_encoding(file_path)
+        if pa is not None:
+            yield from self._iter_arrow_csv(file_path, encoding, ts_code)
+        else:
+            yield from self._iter_pandas_csv(file_path, encoding, ts_code)
+
+    def _iter_arrow_csv(self, file_path, encoding, ts_code):
+        arrow_encoding = 'utf8' if encoding in ('utf-8', 'utf-8-sig') else encoding
+        read_options = pa_csv.ReadOptions(encoding=arrow_encoding, block_size=self.block_size)
+        # 代码与日期按字符串读取，避免 000001 之类的代码丢失前导零
+        reader = pa_csv.open_csv(file_path, read_options=read_options)
+        names = reader.schema.names
+        code_column = self._code_column(names)
+        reader.close()
+
+        string_columns = {name: pa.string() for name in names
+                          if self.column_map.get(name) in ('ts_code', 'trade_date')}
+        convert_options = pa_csv.ConvertOptions(column_types=string_columns)
+        reader = pa_csv.open_csv(file_path, read_options=read_options, convert_options=convert_options)
+        for batch in reader:
+            if ts_code is not None and code_column is not None:
+                mask = pc.is_in(batch.column(code_column), value_set=pa.array(_code_variants(ts_code)))
+                batch = batch.filter(mask)
+                if batch.num_rows == 0:
+                    continue
+            yield self._normalize(batch.to_pandas())
+
+    def _iter_pandas_csv(self, file_path, encoding, ts_code):
+        string_columns = {name: str for name, target in self.column_map.items()
+                          if target in ('ts_code', 'trade_date')}
+        for chunk in pd.read_csv(file_path, encoding=encoding, chunksize=self.chunksize, dtype=string_columns):
+            code_column = self._code_column(chunk.columns)
+            if ts_code is not None and code_column is not None:
+                chunk = chunk[chunk[code_column].isin(_code_variants(ts_code))]
+                if chunk.empty:
+                    continue
+            yield self._normalize(chunk)
+
+    def _iter_parquet(self, file_path, ts_code):
+        if pa is None:
+            df = pd.read_parquet(file_path)
+            code_column = self._code_column(df.columns)
+            if ts_code is not None and code_column is not None:
+                df = df[df[code_column].astype(str).isin(_code_variants(ts_code))]
+            yield self._normalize(df)
+            return
+
+        parquet = pq.ParquetFile(file_path)
+        code_column = self._code_column(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches():
+            if ts_code is not None and code_column is not None:
+                column = batch.column(code_column).cast(pa.string())
+                batch = batch.filter(pc.is_in(column, value_set=pa.array(_code_variants(ts_code))))
+                if batch.num_rows == 0:
+                    continue
+            yield self._normalize(batch.to_pandas())
+
+    def daily(self, ts_code, start_date, end_date):
+        file_path = self._resolve(ts_code)
+        if file_path is None:
+            return pd.DataFrame(columns=TUSHARE_COLUMNS)
+
+        chunks = list(self.iter_chunks(file_path, ts_code))
+        if not chunks:
+            return pd.DataFrame(columns=TUSHARE_COLUMNS)
+        df = pd.concat(chunks, ignore_index=True)
+        # 文件中的代码可能不带交易所后缀，也可能没有代码列（每只股票单独一个文件）
+        df['ts_code'] = ts_code
+        df = df[(df['trade_date'] >= start_date) & (df['trade_date'] <= end_date)]
+        # 与 Tushare 一致，按日期降序返回
+        return df.sort_values('trade_date', ascending=False).reset_index(drop=True)
+
+    def trade_calendar(self, start_date, end_date):
+        if self.calendar is None:
+            return None
+        return [d for d in self.calendar if start_date <= d <= end_date]
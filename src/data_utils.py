@@ -0,0 +1,23 @@
+"""
+调度进程与 HTML 报告共用的小工具
+只依赖 pandas，导入时不会加载绘图库或行情接口
+"""
+
+import hashlib
+
+import pandas as pd
+
+
+def fingerprint(df, columns=None):
+    """计算 DataFrame（或其中若干列）内容的指纹"""
+    if columns is not None:
+        df = df[columns]
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+def load_watchlist(file_path):
+    """读取关注列表文件，每行一个股票代码，忽略空行与 # 注释"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = (line.split('#')[0].strip() for line in f)
+        return [line for line in lines if line]
@@ -0,0 +1,304 @@
+"""
+关注列表批量 HTML 报告
+功能：
+1. 为整个关注列表生成一个静态 HTML 报告，代替逐只股票的 PNG 与 Excel 文件
+2. 信号汇总表可点击表头排序，每行带一个收盘价走势缩略图（内联 SVG，无需绘图库）
+3. 完整图表按需懒加载（<img loading="lazy">），打开报告时不必一次加载全部图片
+4. 图表在多个进程中并行渲染；输入数据的哈希未变化时直接复用已有图片
+
+用法：
+    TUSHARE_TOKEN=xxx python src/html_report.py --watchlist watchlist.txt
+    python src/html_report.py --watchlist watchlist.txt --data vendor_dump.csv
+"""
+
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from data_utils import fingerprint, load_watchlist
+
+DEFAULT_REPORT_DIR = 'stock_report'
+
+# 参与图表渲染的列，只有这些列变化时才需要重绘
+CHART_COLUMNS = ['交易日期', '收盘价', 'MA5', 'MA10', 'MA20', '信号']
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>关注列表分析报告 {generated}</title>
+<style>
+body {{ font-family: "Microsoft YaHei", sans-serif; margin: 24px; color: #222; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: 6px 10px; text-align: right; }}
+th {{ cursor: pointer; background: #f5f5f5; position: sticky; top: 0; user-select: none; }}
+td.code, th.code {{ text-align: left; }}
+.buy {{ color: #c00; font-weight: bold; }}
+.sell {{ color: #080; font-weight: bold; }}
+.chart {{ margin: 24px 0; }}
+.chart img {{ width: 100%; max-width: 1200px; }}
+</style>
+</head>
+<body>
+<h1>📊 关注列表分析报告</h1>
+<p>生成时间：{generated}，共 {count} 只股票</p>
+<table id="signals">
+<thead><tr>
+<th class="code" data-type="text">股票代码</th>
+<th data-type="num">最新收盘</th>
+<th data-type="num">涨跌幅(%)</th>
+<th data-type="text">最新信号</th>
+<th data-type="text">信号日期</th>
+<th data-type="num">买入信号</th>
+<th data-type="num">卖出信号</th>
+<th data-type="none">走势</th>
+</tr></thead>
+<tbody>
+{rows}
+</tbody>
+</table>
+<h2>完整图表</h2>
+{charts}
+<script>
+document.querySelectorAll('#signals th').forEach(function (th, col) {{
+  var asc = true;
+  th.addEventListener('click', function () {{
+    var type = th.dataset.type;
+    if (type === 'none') return;
+    var body = document.querySelector('#signals tbody');
+    var rows = Array.prototype.slice.call(body.rows);
+    rows.sort(function (a, b) {{
+      var x = a.cells[col].dataset.value, y = b.cells[col].dataset.value;
+      // 缺失的数值为空字符串，无论升序降序都排在最后
+      if (type === 'num' && (x === '' || y === '')) return (x === '') - (y === '');
+      var r = type === 'num' ? parseFloat(x) - parseFloat(y) : x.localeCompare(y);
+      return asc ? r : -r;
+    }});
+    asc = !asc;
+    rows.forEach(function (row) {{ body.appendChild(row); }});
+  }});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def sparkline(values, width=120, height=28):
+    """
+    生成收盘价走势缩略图（内联 SVG）
+
+    参数:
+        values: 收盘价序列
+        width: 宽度（像素）
+        height: 高度（像素）
+
+    返回:
+        str: SVG 片段
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) < 2:
+        return ''
+    low, high = values.min(), values.max()
+    span = high - low or 1.0
+    x = np.linspace(0, width, len(values))
+    y = height - (values - low) / span * (height - 2) - 1
+    points = ' '.join(f'{a:.1f},{b:.1f}' for a, b in zip(x, y))
+    color = '#c00' if values[-1] >= values[0] else '#080'
+    return (f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<polyline fill="none" stroke="{color}" stroke-width="1.2" points="{points}"/></svg>')
+
+
+def _num_cell(value):
+    """
+    数值单元格，缺失值（NaN）的排序值与显示均为空，排序时排在最后
+
+    参数:
+        value: 数值
+
+    返回:
+        str: <td> 片段
+    """
+    if np.isnan(value):
+        return '<td data-value="">-</td>'
+    return f'<td data-value="{value}">{value:.2f}</td>'
+
+
+def _render_chart(args):
+    """进程池中渲染单张图表"""
+    df, stock_code, path, dpi = args
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from stock_analyzer import StockAnalyzer
+
+    fig = StockAnalyzer.draw_chart(df, stock_code)
+    tmp_path = path + '.tmp'
+    fig.savefig(tmp_path, dpi=dpi, format='png')
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ReportGenerator:
+    """关注列表 HTML 报告生成器"""
+
+    def __init__(self, report_dir=DEFAULT_REPORT_DIR, workers=None, dpi=100):
+        """
+        参数:
+            report_dir: 报告输出目录
+            workers: 渲染图表的进程数，默认为 CPU 核数
+            dpi: 图表分辨率
+        """
+        self.report_dir = report_dir
+        self.chart_dir = os.path.join(report_dir, 'charts')
+        self.workers = workers
+        self.dpi = dpi
+
+    def _chart_path(self, ts_code, df):
+        digest = fingerprint(df, CHART_COLUMNS)[:16]
+        return os.path.join(self.chart_dir, f"{ts_code}_{digest}.png")
+
+    def render_charts(self, results):
+        """
+        并行渲染图表，已存在且输入哈希相同的图表直接复用
+
+        参数:
+            results: {股票代码: 包含信号的 DataFrame}
+
+        返回:
+            tuple: ({股票代码: 图表文件路径}, 重新渲染的数量)
+        """
+        if not os.path.exists(self.chart_dir):
+            os.makedirs(self.chart_dir)
+
+        paths = {}
+        jobs = []
+        for ts_code, df in results.items():
+            path = self._chart_path(ts_code, df)
+            paths[ts_code] = path
+            if not os.path.exists(path):
+                jobs.append((df[CHART_COLUMNS], ts_code.split('.')[0], path, self.dpi))
+
+        if jobs:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(_render_chart, jobs))
+
+        # 清理同一股票的旧版本图表
+        current = {os.path.basename(p) for p in paths.values()}
+        for name in os.listdir(self.chart_dir):
+            code = name.rsplit('_', 1)[0]
+            if code in results and name not in current:
+                os.remove(os.path.join(self.chart_dir, name))
+
+        return paths, len(jobs)
+
+    def _row(self, ts_code, df):
+        last = df.iloc[-1]
+        signals = df[df['信号'] != '']
+        buy_count = int((signals['信号'] == '买入信号').sum())
+        sell_count = len(signals) - buy_count
+
+        if signals.empty:
+            signal, signal_date = '', ''
+        else:
+            signal = signals['信号'].iloc[-1]
+            signal_date = signals['交易日期'].iloc[-1].strftime('%Y-%m-%d')
+        css = 'buy' if signal == '买入信号' else 'sell' if signal == '卖出信号' else ''
+
+        close = float(last['收盘价'])
+        pct = float(last['涨跌幅(%)']) if '涨跌幅(%)' in df.columns else float('nan')
+        anchor = html.escape(ts_code)
+        return (
+            '<tr>'
+            f'<td class="code" data-value="{anchor}"><a href="#chart-{anchor}">{anchor}</a></td>'
+            f'{_num_cell(close)}'
+            f'{_num_cell(pct)}'
+            f'<td data-value="{signal}" class="{css}">{signal}</td>'
+            f'<td data-value="{signal_date}">{signal_date}</td>'
+            f'<td data-value="{buy_count}">{buy_count}</td>'
+            f'<td data-value="{sell_count}">{sell_count}</td>'
+            f'<td>{sparkline(df["收盘价"].to_numpy()[-120:])}</td>'
+            '</tr>'
+        )
+
+    def generate(self, results):
+        """
+        生成报告
+
+        参数:
+            results: {股票代码: 包含信号的 DataFrame}
+
+        返回:
+            str: index.html 的路径
+        """
+        print(f"\n📝 正在生成 {len(results)} 只股票的HTML报告...")
+        start = time.perf_counter()
+
+        results = {code: df for code, df in results.items() if df is not None and not df.empty}
+        paths, rendered = self.render_charts(results)
+
+        rows = '\n'.join(self._row(code, df) for code, df in results.items())
+        charts = '\n'.join(
+            f'<div class="chart" id="chart-{html.escape(code)}"><h3>{html.escape(code)}</h3>'
+            f'<img loading="lazy" src="charts/{html.escape(os.path.basename(paths[code]))}" alt="{html.escape(code)}"></div>'
+            for code in results
+        )
+        page = PAGE_TEMPLATE.format(
+            generated=datetime.now().strftime('%Y-%m-%d %H:%M'),
+            count=len(results),
+            rows=rows,
+            charts=charts,
+        )
+
+        index_path = os.path.join(self.report_dir, 'index.html')
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write(page)
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ 报告已生成: {index_path}（新渲染图表 {rendered} 张，复用 {len(paths) - rendered} 张，耗时 {elapsed:.1f} 秒）")
+        return index_path
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    from data_source import FileDataSource
+    from stock_analyzer import StockAnalyzer
+
+    parser = argparse.ArgumentParser(description="关注列表批量HTML报告")
+    parser.add_argument('--watchlist', required=True, help="关注列表文件，每行一个股票代码")
+    parser.add_argument('--token', default=os.environ.get('TUSHARE_TOKEN'), help="Tushare token")
+    parser.add_argument('--data', help="本地行情文件或目录，指定后不访问 Tushare")
+    parser.add_argument('--output', default=DEFAULT_REPORT_DIR, help="报告输出目录")
+    parser.add_argument('--workers', type=int, help="渲染图表的进程数")
+    args = parser.parse_args()
+
+    if args.data:
+        analyzer = StockAnalyzer(source=FileDataSource(args.data))
+    elif args.token:
+        analyzer = StockAnalyzer(args.token)
+    else:
+        print("⚠️  请通过 --token、环境变量 TUSHARE_TOKEN 或 --data 指定数据来源")
+        return
+
+    results = {}
+    for ts_code in load_watchlist(args.watchlist):
+        df = analyzer.get_stock_data(ts_code)
+        if df is None:
+            continue
+        df = analyzer.validate_data(df)
+        df = analyzer.calculate_moving_averages(df)
+        results[ts_code] = analyzer.detect_signals(df)
+
+    ReportGenerator(args.output, args.workers).generate(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+多周期确认
+功能：
+1. 由日线数据经一次分组聚合生成周线、月线 OHLCV，周期边界按实际交易日划分
+2. 计算各周期的 MA5 / MA20 并判断趋势
+3. 通过整数下标将周线、月线趋势对齐回日线行，不重复获取数据、不重复计算日线均线
+
+为避免使用未来数据，每个交易日使用的是上一个已完成周期的趋势。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 周期名称 -> pandas 周期频率
+TIMEFRAMES = {
+    '周线': 'W-FRI',
+    '月线': 'M',
+}
+
+SHORT_WINDOW = 5
+LONG_WINDOW = 20
+
+
+def aggregate(df, freq):
+    """
+    将日线聚合为更长周期的K线
+
+    参数:
+        df: 日线数据，按交易日期升序
+        freq: pandas 周期频率，如 'W-FRI'、'M'
+
+    返回:
+        tuple: (周期K线 DataFrame, 每个日线行所属周期的整数下标数组)
+    """
+    periods = df['交易日期'].dt.to_period(freq)
+    codes, uniques = pd.factorize(periods, sort=True)
+
+    columns = {'收盘价': 'last'}
+    for column, how in (('开盘价', 'first'), ('最高价', 'max'), ('最低价', 'min'), ('成交量(手)', 'sum')):
+        if column in df.columns:
+            columns[column] = how
+    columns['交易日期'] = 'last'
+
+    bars = df.groupby(codes, sort=True).agg(columns)
+    bars.index = uniques
+    return bars, codes
+
+
+def trend(bars):
+    """
+    计算周期K线的均线趋势
+
+    返回:
+        ndarray: 1 表示 MA5 在 MA20 上方，-1 表示下方，0 表示相等或数据不足
+    """
+    close = bars['收盘价']
+    ma5 = close.rolling(window=SHORT_WINDOW).mean().to_numpy()
+    ma20 = close.rolling(window=LONG_WINDOW).mean().to_numpy()
+    with np.errstate(invalid='ignore'):
+        return np.sign(ma5 - ma20).astype(np.float64)
+
+
+def add_timeframe_trends(df, timeframes=TIMEFRAMES):
+    """
+    为日线数据添加各周期趋势列，列名为 '{周期}趋势'
+
+    参数:
+        df: 日线数据，需包含 交易日期、收盘价 列
+        timeframes: 周期名称 -> pandas 周期频率
+
+    返回:
+        DataFrame: 添加了趋势列的日线数据（原地修改并返回）
+    """
+    for name, freq in timeframes.items():
+        bars, codes = aggregate(df, freq)
+        # 上一个已完成周期的趋势：整体后移一位，再按周期下标取值
+        previous = np.r_[0.0, trend(bars)[:-1]]
+        previous = np.nan_to_num(previous, nan=0.0)
+        df[f'{name}趋势'] = previous[codes].astype(np.int8)
+    return df
+
+
+def confirm_signals(df, timeframes=TIMEFRAMES):
+    """
+    生成多周期确认信号：买入信号要求各周期趋势向上，卖出信号要求各周期趋势向下
+
+    参数:
+        df: 已包含 信号 列的日线数据
+
+    返回:
+        DataFrame: 添加了各周期趋势列与 确认信号 列的数据
+    """
+    add_timeframe_trends(df, timeframes)
+    trends = df[[f'{name}趋势' for name in timeframes]].to_numpy()
+    signal = df['信号'].to_numpy()
+
+    bullish = (trends > 0).all(axis=1)
+    bearish = (trends < 0).all(axis=1)
+    confirmed = ((signal == '买入信号') & bullish) | ((signal == '卖出信号') & bearish)
+    df['确认信号'] = np.where(confirmed, signal, '')
+    return df
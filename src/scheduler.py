@@ -0,0 +1,440 @@
+"""
+收盘后调度守护进程
+功能：
+1. 每天收盘后唤醒，通过交易日历判断当天是否开市
+2. 用按交易日获取的全市场日线找出关注列表中有新K线的股票，只处理这些股票；
+   全市场日线为空说明数据尚未发布，该交易日留待下次运行
+3. 每只股票保存历史K线，之后只把全市场日线中的新K线追加进去，不再重新获取全量历史
+4. 每只股票按 数据 → 指标 → 信号 → 导出 → 图表 的依赖顺序执行，
+   各阶段以历史K线的增量指纹为输入指纹，输入未变化的阶段直接复用上次的输出
+5. 线程池限制并发数，所有任务写入持久化的任务日志（SQLite）
+6. 错过的交易日在下次唤醒时补跑
+
+用法：
+    TUSHARE_TOKEN=xxx python src/scheduler.py --watchlist watchlist.txt
+    TUSHARE_TOKEN=xxx python src/scheduler.py --watchlist watchlist.txt --once
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import matplotlib
+matplotlib.use('Agg')  # 守护进程没有显示设备
+
+import pandas as pd
+
+from data_utils import fingerprint, load_watchlist
+from stock_analyzer import StockAnalyzer
+
+DEFAULT_STATE_DIR = 'scheduler_state'
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    trade_date  TEXT NOT NULL,
+    started     TEXT NOT NULL,
+    finished    TEXT,
+    symbols     INTEGER,
+    status      TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    run_id      INTEGER NOT NULL,
+    ts_code     TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    elapsed     REAL,
+    message     TEXT,
+    logged      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_run ON jobs (run_id);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    ts_code     TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated     TEXT NOT NULL,
+    PRIMARY KEY (ts_code, stage)
+) WITHOUT ROWID;
+"""
+
+
+class JobLog:
+    """持久化的任务日志与阶段指纹"""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(JOB_SCHEMA)
+        self.lock = threading.Lock()
+
+    def _now(self):
+        return datetime.now().isoformat(timespec='seconds')
+
+    def last_trade_date(self):
+        """返回最近一次成功运行对应的交易日，没有则返回 None"""
+        row = self.conn.execute(
+            "SELECT MAX(trade_date) FROM runs WHERE status = 'success'").fetchone()
+        return row[0]
+
+    def start_run(self, trade_date, symbols):
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (trade_date, started, symbols) VALUES (?, ?, ?)',
+                (trade_date, self._now(), symbols))
+            return cursor.lastrowid
+
+    def finish_run(self, run_id, status):
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE runs SET finished = ?, status = ? WHERE run_id = ?',
+                              (self._now(), status, run_id))
+
+    def record(self, run_id, ts_code, stage, status, elapsed=None, message=None):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (run_id, ts_code, stage, status, elapsed, message, self._now()))
+
+    def get_fingerprint(self, ts_code, stage):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT fingerprint FROM fingerprints WHERE ts_code = ? AND stage = ?',
+                (ts_code, stage)).fetchone()
+        return row[0] if row else None
+
+    def set_fingerprint(self, ts_code, stage, value):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)',
+                              (ts_code, stage, value, self._now()))
+
+    def close(self):
+        self.conn.close()
+
+
+class PipelineScheduler:
+    """StockAnalyzer 流水线的增量调度器"""
+
+    def __init__(self, analyzer, watchlist, state_dir=DEFAULT_STATE_DIR, max_workers=4,
+                 close_time='15:30', exchange='SSE', max_catchup_days=30, history_years=3):
+        """
+        参数:
+            analyzer: StockAnalyzer 实例
+            watchlist: 关注的股票代码列表
+            state_dir: 任务日志与阶段输出的保存目录
+            max_workers: 同时处理的股票数上限
+            close_time: 每天唤醒的时间，'HH:MM'
+            exchange: 交易日历所属交易所
+            max_catchup_days: 最多补跑的自然日天数
+            history_years: 每只股票保存的历史K线年数
+        """
+        if not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+
+        self.analyzer = analyzer
+        self.watchlist = list(dict.fromkeys(watchlist))
+        self.state_dir = state_dir
+        self.max_workers = max_workers
+        self.close_time = close_time
+        self.exchange = exchange
+        self.max_catchup_days = max_catchup_days
+        self.history_years = history_years
+        self.log = JobLog(os.path.join(state_dir, 'jobs.db'))
+        # pyplot 不是线程安全的，图表阶段串行执行
+        self.chart_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 交易日历与变更检测
+    # ------------------------------------------------------------------
+
+    def open_days(self, start_date, end_date):
+        """
+        查询区间内的交易日
+
+        返回:
+            list: 'YYYYMMDD' 格式的交易日，升序
+        """
+        cal = self.analyzer.pro.trade_cal(exchange=self.exchange, start_date=start_date,
+                                          end_date=end_date, is_open='1')
+        return sorted(cal['cal_date'].astype(str))
+
+    def fetch_new_bars(self, trade_dates):
+        """
+        取出关注列表中的股票在指定交易日的K线，每个交易日只请求一次全市场日线
+
+        某个交易日的全市场日线为空说明数据尚未发布，该交易日及之后的交易日留待下次运行
+
+        返回:
+            tuple: (已发布的交易日列表, 这些交易日中关注列表股票的K线，Tushare pro.daily 格式)
+        """
+        watched = set(self.watchlist)
+        ready = []
+        frames = []
+        for trade_date in trade_dates:
+            daily = self.analyzer.pro.daily(trade_date=trade_date)
+            if daily is None or daily.empty:
+                break
+            ready.append(trade_date)
+            frames.append(daily[daily['ts_code'].isin(watched)])
+        if not frames:
+            return ready, pd.DataFrame()
+        return ready, pd.concat(frames, ignore_index=True)
+
+    def pending_days(self, today):
+        """返回上次成功运行之后、截至 today（含）尚未处理的交易日"""
+        last = self.log.last_trade_date()
+        earliest = (datetime.strptime(today, '%Y%m%d') - timedelta(days=self.max_catchup_days)).strftime('%Y%m%d')
+        if last is None or last < earliest:
+            start = earliest
+        else:
+            start = (datetime.strptime(last, '%Y%m%d') + timedelta(days=1)).strftime('%Y%m%d')
+        if start > today:
+            return []
+        days = self.open_days(start, today)
+        # 第一次运行时只需处理最近一个交易日，全量历史在数据阶段一次性获取
+        if last is None and days:
+            days = days[-1:]
+        return days
+
+    # ------------------------------------------------------------------
+    # 阶段执行
+    # ------------------------------------------------------------------
+
+    def _output_path(self, ts_code, stage):
+        return os.path.join(self.state_dir, 'outputs', ts_code, f'{stage}.pkl')
+
+    def update_history(self, ts_code, bars):
+        """
+        更新一只股票保存的历史K线：第一次运行时获取全量历史，之后只追加本次获取的新K线
+
+        历史指纹按增量计算：上次的指纹与新增K线的指纹合并，不再对全量历史求哈希
+
+        参数:
+            ts_code: 股票代码
+            bars: 该股票在待处理交易日的K线（format_daily 之后的格式）
+
+        返回:
+            tuple: (历史K线, 历史指纹, 新增K线条数)，获取失败时历史K线为 None
+        """
+        path = self._output_path(ts_code, 'history')
+        value = self.log.get_fingerprint(ts_code, 'history')
+        if value is not None and os.path.exists(path):
+            history = pd.read_pickle(path)
+        else:
+            history = self.analyzer.get_stock_data(ts_code, years=self.history_years)
+            if history is None:
+                return None, None, 0
+            history = history.reset_index(drop=True)
+            value = fingerprint(history)
+            self._save_history(ts_code, history, value)
+
+        # 只对与新K线同一交易日的已保存K线求哈希，相同的K线不算新增（如重复运行同一交易日）
+        columns = [c for c in bars.columns if c in history.columns]
+        known = history.loc[history['交易日期'].isin(bars['交易日期']), columns]
+        seen = pd.util.hash_pandas_object(known, index=False)
+        incoming = pd.util.hash_pandas_object(bars[columns], index=False)
+        new = bars[~incoming.isin(seen).to_numpy()]
+        if new.empty:
+            return history, value, 0
+
+        history = pd.concat([history[~history['交易日期'].isin(new['交易日期'])], new], ignore_index=True)
+        history = history.sort_values('交易日期')
+        cutoff = history['交易日期'].iloc[-1] - pd.Timedelta(days=self.history_years * 365)
+        history = history[history['交易日期'] >= cutoff].reset_index(drop=True)
+        value = hashlib.sha1((value + fingerprint(new)).encode()).hexdigest()
+        self._save_history(ts_code, history, value)
+        return history, value, len(new)
+
+    def _save_history(self, ts_code, history, value):
+        path = self._output_path(ts_code, 'history')
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        history.to_pickle(path)
+        self.log.set_fingerprint(ts_code, 'history', value)
+
+    def _stage(self, run_id, ts_code, stage, input_fingerprint, compute, persist=True):
+        """
+        执行一个阶段：输入指纹与上次相同且有缓存输出时直接复用，否则重新计算
+
+        返回:
+            tuple: (阶段输出, 是否重新计算)
+        """
+        path = self._output_path(ts_code, stage)
+        if self.log.get_fingerprint(ts_code, stage) == input_fingerprint:
+            if not persist:
+                self.log.record(run_id, ts_code, stage, 'skipped')
+                return None, False
+            if os.path.exists(path):
+                self.log.record(run_id, ts_code, stage, 'skipped')
+                return pd.read_pickle(path), False
+
+        start = time.perf_counter()
+        try:
+            output = compute()
+        except Exception as e:
+            self.log.record(run_id, ts_code, stage, 'failed', time.perf_counter() - start, str(e))
+            raise
+
+        if persist and output is not None:
+            directory = os.path.dirname(path)
+            if not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            output.to_pickle(path)
+        self.log.set_fingerprint(ts_code, stage, input_fingerprint)
+        self.log.record(run_id, ts_code, stage, 'done', time.perf_counter() - start)
+        return output, True
+
+    def process_symbol(self, run_id, ts_code, bars, calendar=None):
+        """
+        按依赖顺序处理一只股票
+
+        参数:
+            run_id: 运行编号
+            ts_code: 股票代码
+            bars: 该股票在待处理交易日的K线（format_daily 之后的格式）
+            calendar: 检查缺失K线使用的交易日历
+
+        返回:
+            bool: 是否成功
+        """
+        analyzer = self.analyzer
+        code = ts_code.split('.')[0]
+        try:
+            start = time.perf_counter()
+            history, history_fingerprint, appended = self.update_history(ts_code, bars)
+            if history is None:
+                self.log.record(run_id, ts_code, 'data', 'failed', time.perf_counter() - start, '未获取到数据')
+                return False
+            data = analyzer.validate_data(history, calendar)
+            self.log.record(run_id, ts_code, 'data', 'done', time.perf_counter() - start,
+                            f'新增 {appended} 条K线')
+
+            # 后续阶段都只由历史K线决定，历史指纹未变化时全部复用上次的输出
+            indicators, _ = self._stage(
+                run_id, ts_code, 'indicators', history_fingerprint,
+                lambda: analyzer.calculate_moving_averages(data.copy()))
+
+            signals, _ = self._stage(
+                run_id, ts_code, 'signals', history_fingerprint,
+                lambda: analyzer.detect_signals(indicators.copy()))
+
+            def export():
+                analyzer.save_to_excel(signals, code)
+                analyzer.save_to_database(signals)
+
+            def chart():
+                with self.chart_lock:
+                    analyzer.plot_chart(signals, code)
+
+            self._stage(run_id, ts_code, 'export', history_fingerprint, export, persist=False)
+            self._stage(run_id, ts_code, 'chart', history_fingerprint, chart, persist=False)
+            return True
+        except Exception as e:
+            print(f"❌ 处理 {ts_code} 时出错: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # 运行
+    # ------------------------------------------------------------------
+
+    def run_once(self, today=None):
+        """
+        处理截至 today 的所有待处理交易日
+
+        参数:
+            today: 'YYYYMMDD'，默认为当天
+
+        返回:
+            dict: 本次运行的统计信息
+        """
+        today = today or datetime.now().strftime('%Y%m%d')
+        days = self.pending_days(today)
+        if not days:
+            print(f"💤 {today} 之前没有待处理的交易日")
+            return {'days': [], 'symbols': 0, 'failed': 0}
+
+        ready, bars = self.fetch_new_bars(days)
+        if len(ready) < len(days):
+            # 不记录成功的运行，未发布的交易日仍是待处理状态
+            print(f"⏳ {days[len(ready)]} 的日线尚未发布，留待下次运行")
+        if not ready:
+            return {'days': [], 'symbols': 0, 'failed': 0}
+        days = ready
+
+        groups = dict(tuple(self.analyzer.format_daily(bars).groupby('股票代码'))) if not bars.empty else {}
+        symbols = [code for code in self.watchlist if code in groups]
+        print(f"\n⏰ 待处理交易日: {', '.join(days)}，有新K线的股票: {len(symbols)} 只")
+
+        # 交易日历每次运行只查询一次，覆盖保存的全部历史K线
+        calendar_start = (datetime.strptime(days[-1], '%Y%m%d')
+                          - timedelta(days=self.history_years * 365 + 30)).strftime('%Y%m%d')
+        calendar = self.open_days(calendar_start, days[-1]) if symbols else None
+
+        run_id = self.log.start_run(days[-1], len(symbols))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda code: self.process_symbol(run_id, code, groups[code], calendar), symbols))
+        failed = results.count(False)
+
+        self.log.finish_run(run_id, 'success' if failed == 0 else 'partial')
+        elapsed = time.perf_counter() - start
+        print(f"✅ 调度完成：{len(symbols)} 只股票，失败 {failed} 只，耗时 {elapsed:.1f} 秒")
+        return {'days': days, 'symbols': len(symbols), 'failed': failed}
+
+    def next_wake_time(self, now=None):
+        """计算下一次唤醒时间"""
+        now = now or datetime.now()
+        hour, minute = map(int, self.close_time.split(':'))
+        wake = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if wake <= now:
+            wake += timedelta(days=1)
+        return wake
+
+    def run_forever(self):
+        """守护进程主循环：启动时先补跑，之后每天收盘后运行一次"""
+        self.run_once()
+        while True:
+            wake = self.next_wake_time()
+            print(f"💤 下次运行时间: {wake:%Y-%m-%d %H:%M}")
+            time.sleep(max(0, (wake - datetime.now()).total_seconds()))
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ 调度运行出错: {e}")
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="收盘后增量调度守护进程")
+    parser.add_argument('--watchlist', required=True, help="关注列表文件，每行一个股票代码")
+    parser.add_argument('--token', default=os.environ.get('TUSHARE_TOKEN'), help="Tushare token")
+    parser.add_argument('--state-dir', default=DEFAULT_STATE_DIR, help="状态目录")
+    parser.add_argument('--workers', type=int, default=4, help="并发处理的股票数")
+    parser.add_argument('--close-time', default='15:30', help="每天唤醒时间 HH:MM")
+    parser.add_argument('--once', action='store_true', help="只运行一次后退出")
+    args = parser.parse_args()
+
+    if not args.token:
+        print("⚠️  请通过 --token 或环境变量 TUSHARE_TOKEN 提供 Tushare Token")
+        return
+
+    scheduler = PipelineScheduler(StockAnalyzer(args.token), load_watchlist(args.watchlist),
+                                  args.state_dir, args.workers, args.close_time)
+    try:
+        if args.once:
+            scheduler.run_once()
+        else:
+            scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("\n调度已停止")
+    finally:
+        scheduler.log.close()
+
+
+if __name__ == "__main__":
+    main()
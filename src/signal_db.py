@@ -0,0 +1,318 @@
+"""
+信号历史数据库
+功能：
+1. 使用本地 SQLite 保存每日买卖信号与指标快照，代替逐日的 Excel 文件
+2. 在 (股票代码, 交易日期) 与 (信号, 交易日期) 上建立索引
+3. 分析流程按批次、在事务中批量写入
+4. 提供查询接口与命令行，例如"上季度半导体行业的所有金叉"
+
+用法：
+    python src/signal_db.py query --signal 买入信号 --industry 半导体 --start 2026-07-01 --end 2026-09-30
+    python src/signal_db.py import stock_analysis/603986_analysis_20260217.xlsx
+    TUSHARE_TOKEN=xxx python src/signal_db.py import-stocks
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+DEFAULT_DB_PATH = os.path.join('stock_analysis', 'signals.db')
+
+# 命令行中可用的信号别名
+SIGNAL_ALIASES = {
+    'buy': '买入信号',
+    'golden': '买入信号',
+    '金叉': '买入信号',
+    'sell': '卖出信号',
+    'death': '卖出信号',
+    '死叉': '卖出信号',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stocks (
+    ts_code   TEXT PRIMARY KEY,
+    name      TEXT,
+    industry  TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    ts_code     TEXT NOT NULL,
+    trade_date  TEXT NOT NULL,
+    close       REAL,
+    pct_chg     REAL,
+    ma5         REAL,
+    ma10        REAL,
+    ma20        REAL,
+    PRIMARY KEY (ts_code, trade_date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS signals (
+    ts_code     TEXT NOT NULL,
+    trade_date  TEXT NOT NULL,
+    signal      TEXT NOT NULL,
+    close       REAL,
+    ma5         REAL,
+    ma20        REAL,
+    PRIMARY KEY (ts_code, trade_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_signals_signal_date ON signals (signal, trade_date);
+CREATE INDEX IF NOT EXISTS idx_stocks_industry ON stocks (industry);
+"""
+
+
+def _value(v):
+    """将 pandas/numpy 标量转换为 sqlite3 可接受的 Python 值"""
+    if v is None or pd.isna(v):
+        return None
+    if hasattr(v, 'item'):
+        return v.item()
+    return v
+
+
+class SignalStore:
+    """信号历史数据库"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, batch_size=5000):
+        """
+        参数:
+            db_path: SQLite 数据库文件路径
+            batch_size: 每个事务写入的最大行数
+        """
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_path)
+        # WAL 模式下读写互不阻塞，批量写入时也无需每次提交都刷盘
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def _insert_many(self, sql, rows):
+        count = 0
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            with self.conn:
+                self.conn.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def upsert_stocks(self, stock_basic):
+        """
+        写入股票基础信息，用于按行业查询
+
+        参数:
+            stock_basic: 包含 ts_code, name, industry 列的 DataFrame（如 pro.stock_basic 的结果）
+
+        返回:
+            int: 写入行数
+        """
+        rows = [
+            (_value(code), _value(name), _value(industry))
+            for code, name, industry in zip(stock_basic['ts_code'], stock_basic['name'], stock_basic['industry'])
+        ]
+        return self._insert_many('INSERT OR REPLACE INTO stocks VALUES (?, ?, ?)', rows)
+
+    def missing_stocks(self, ts_codes):
+        """
+        返回尚未写入基础信息的股票代码
+
+        参数:
+            ts_codes: 股票代码列表
+
+        返回:
+            list: 不在 stocks 表中的股票代码
+        """
+        codes = list(dict.fromkeys(ts_codes))
+        known = set()
+        for start in range(0, len(codes), 500):
+            batch = codes[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT ts_code FROM stocks WHERE ts_code IN ({','.join('?' * len(batch))})", batch)
+            known.update(code for code, in rows)
+        return [code for code in codes if code not in known]
+
+    def save_analysis(self, df):
+        """
+        保存一只或多只股票的分析结果：全部行写入指标快照，有信号的行写入信号表，
+        每只股票在数据日期范围内的信号以本次结果为准
+
+        参数:
+            df: detect_signals 返回的 DataFrame
+
+        返回:
+            tuple: (快照行数, 信号行数)
+        """
+        if df is None or df.empty:
+            return 0, 0
+
+        dates = pd.to_datetime(df['交易日期']).dt.strftime('%Y-%m-%d')
+        pct_chg = df['涨跌幅(%)'] if '涨跌幅(%)' in df.columns else pd.Series(None, index=df.index)
+        snapshot_rows = [
+            tuple(_value(v) for v in row)
+            for row in zip(df['股票代码'], dates, df['收盘价'], pct_chg, df['MA5'], df['MA10'], df['MA20'])
+        ]
+        snapshot_count = self._insert_many(
+            'INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)', snapshot_rows)
+
+        mask = (df['信号'] != '').to_numpy()
+        signal_rows = [
+            tuple(_value(v) for v in row)
+            for row in zip(df['股票代码'][mask], dates[mask], df['信号'][mask],
+                           df['收盘价'][mask], df['MA5'][mask], df['MA20'][mask])
+        ]
+        # 重新导入时先删除每只股票在本次数据日期范围内的旧信号，
+        # 数据修正后消失的信号不会残留；删除与写入在同一个事务中
+        ranges = dates.groupby(df['股票代码']).agg(['min', 'max'])
+        with self.conn:
+            self.conn.executemany(
+                'DELETE FROM signals WHERE ts_code = ? AND trade_date BETWEEN ? AND ?',
+                [(_value(code), low, high) for code, low, high in
+                 zip(ranges.index, ranges['min'], ranges['max'])])
+            self.conn.executemany('INSERT OR REPLACE INTO signals VALUES (?, ?, ?, ?, ?, ?)', signal_rows)
+
+        return snapshot_count, len(signal_rows)
+
+    def import_excel(self, file_path):
+        """
+        导入 save_to_excel 生成的历史 Excel 文件
+
+        返回:
+            tuple: (快照行数, 信号行数)
+        """
+        df = pd.read_excel(file_path, sheet_name='完整数据')
+        df['信号'] = df['信号'].fillna('')
+        return self.save_analysis(df)
+
+    def query_signals(self, signal=None, start=None, end=None, ts_codes=None, industry=None, limit=None):
+        """
+        查询信号历史
+
+        参数:
+            signal: '买入信号' 或 '卖出信号'，None 表示全部
+            start: 起始日期（含），'YYYY-MM-DD'
+            end: 结束日期（含），'YYYY-MM-DD'
+            ts_codes: 股票代码列表
+            industry: 行业名称，需要先调用 upsert_stocks
+            limit: 最多返回的行数
+
+        返回:
+            DataFrame: 信号记录，按交易日期、股票代码排序
+        """
+        sql = ('SELECT s.ts_code AS 股票代码, k.name AS 股票名称, k.industry AS 行业, '
+               's.trade_date AS 交易日期, s.signal AS 信号, s.close AS 收盘价, '
+               's.ma5 AS MA5, s.ma20 AS MA20 '
+               'FROM signals s LEFT JOIN stocks k ON k.ts_code = s.ts_code')
+        conditions = []
+        params = []
+
+        if signal:
+            conditions.append('s.signal = ?')
+            params.append(SIGNAL_ALIASES.get(signal, signal))
+        if start:
+            conditions.append('s.trade_date >= ?')
+            params.append(start)
+        if end:
+            conditions.append('s.trade_date <= ?')
+            params.append(end)
+        if ts_codes:
+            conditions.append(f"s.ts_code IN ({','.join('?' * len(ts_codes))})")
+            params.extend(ts_codes)
+        if industry:
+            conditions.append('k.industry = ?')
+            params.append(industry)
+
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY s.trade_date, s.ts_code'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def query_snapshots(self, ts_code, start=None, end=None):
+        """
+        查询单只股票的指标快照
+
+        返回:
+            DataFrame: 指标快照，按交易日期排序
+        """
+        sql = ('SELECT ts_code AS 股票代码, trade_date AS 交易日期, close AS 收盘价, '
+               'pct_chg AS "涨跌幅(%)", ma5 AS MA5, ma10 AS MA10, ma20 AS MA20 '
+               'FROM snapshots WHERE ts_code = ?')
+        params = [ts_code]
+        if start:
+            sql += ' AND trade_date >= ?'
+            params.append(start)
+        if end:
+            sql += ' AND trade_date <= ?'
+            params.append(end)
+        sql += ' ORDER BY trade_date'
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+
+def main():
+    """命令行入口"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="信号历史数据库")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="数据库文件路径")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    query = sub.add_parser('query', help="查询信号")
+    query.add_argument('--signal', help="买入信号/卖出信号（或 buy/sell/金叉/死叉）")
+    query.add_argument('--start', help="起始日期 YYYY-MM-DD")
+    query.add_argument('--end', help="结束日期 YYYY-MM-DD")
+    query.add_argument('--code', action='append', help="股票代码，可重复")
+    query.add_argument('--industry', help="行业")
+    query.add_argument('--limit', type=int, help="最多返回行数")
+
+    importer = sub.add_parser('import', help="导入历史 Excel 分析文件")
+    importer.add_argument('files', nargs='+', help="Excel 文件路径")
+
+    stocks = sub.add_parser('import-stocks', help="导入股票基础信息（名称、行业），用于按行业查询")
+    stocks.add_argument('--file', help="包含 ts_code,name,industry 列的CSV文件，不指定时从 Tushare 获取")
+    stocks.add_argument('--token', default=os.environ.get('TUSHARE_TOKEN'), help="Tushare token")
+
+    args = parser.parse_args()
+    store = SignalStore(args.db)
+
+    try:
+        if args.command == 'query':
+            start = time.perf_counter()
+            result = store.query_signals(args.signal, args.start, args.end,
+                                         args.code, args.industry, args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            if result.empty:
+                print("未找到匹配的信号")
+            else:
+                print(result.to_string(index=False))
+            print(f"\n共 {len(result)} 条，耗时 {elapsed:.1f} 毫秒")
+        elif args.command == 'import-stocks':
+            if args.file:
+                stock_basic = pd.read_csv(args.file, dtype=str, encoding='utf-8-sig')
+            elif args.token:
+                import tushare as ts
+                stock_basic = ts.pro_api(args.token).stock_basic(fields='ts_code,name,industry')
+            else:
+                print("⚠️  请通过 --file、--token 或环境变量 TUSHARE_TOKEN 指定数据来源")
+                return
+            count = store.upsert_stocks(stock_basic)
+            print(f"✅ 已写入 {count} 只股票的基础信息")
+        else:
+            for file_path in args.files:
+                snapshots, signals = store.import_excel(file_path)
+                print(f"✅ {file_path}: 快照 {snapshots} 行，信号 {signals} 行")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
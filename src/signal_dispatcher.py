@@ -0,0 +1,309 @@
+"""
+信号邮件摘要分发
+功能：
+1. 从一次全量分析（{股票代码: 包含信号的 DataFrame}）中取出指定交易日的买入/卖出信号
+2. 按订阅者的关注列表分组，每个订阅者一封摘要邮件，附带相关股票的图表
+3. 订阅关系先反转为 股票代码 -> 订阅者 的映射，信号表只遍历一次，
+   不为每个订阅者重新扫描信号；每只股票的图表只渲染一次，由所有订阅者共用
+4. 通过传入的邮件工具（EmailTool 或接口相同的对象）分批并发发送（SMTP 连接池），也可只生成 .eml 文件预览
+
+订阅文件为 CSV，每行一个订阅者：
+    邮箱,关注列表
+    alice@example.com,600000.SH 603986.SH
+    bob@example.com,000001.SZ;603986.SH
+
+用法（在项目根目录运行，email_tool 位于根目录）：
+    EMAIL_PASSWORD=xxx PYTHONPATH=. python src/signal_dispatcher.py --subscriptions subscribers.csv \\
+        --data vendor_dump.csv --sender me@qq.com
+    PYTHONPATH=. python src/signal_dispatcher.py --subscriptions subscribers.csv --data vendor_dump.csv --dry-run digests/
+"""
+
+import csv
+import os
+import re
+import time
+
+import matplotlib
+matplotlib.use('Agg')  # 批量渲染图表不需要显示设备
+
+import pandas as pd
+
+SIGNALS = ('买入信号', '卖出信号')
+
+# 信号表的列
+SIGNAL_COLUMNS = ['股票代码', '交易日期', '信号', '收盘价', 'MA5', 'MA20']
+
+# 关注列表中股票代码的分隔符
+_CODE_SEPARATORS = re.compile(r'[\s,;，；]+')
+
+
+def load_subscriptions(file_path):
+    """
+    读取订阅文件
+
+    返回:
+        dict: {邮箱: [股票代码, ...]}，同一邮箱出现多次时合并关注列表
+    """
+    subscriptions = {}
+    with open(file_path, 'r', newline='', encoding='utf-8-sig') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#') or '@' not in row[0]:
+                continue
+            codes = _CODE_SEPARATORS.split(' '.join(row[1:]).upper())
+            watchlist = subscriptions.setdefault(row[0].strip(), [])
+            watchlist.extend(code for code in codes if code and code not in watchlist)
+    return subscriptions
+
+
+def invert_subscriptions(subscriptions):
+    """
+    将订阅关系反转为 股票代码 -> 订阅者 的映射
+
+    参数:
+        subscriptions: {邮箱: [股票代码, ...]}
+
+    返回:
+        dict: {股票代码: [邮箱, ...]}
+    """
+    subscribers = {}
+    for address, watchlist in subscriptions.items():
+        for ts_code in watchlist:
+            subscribers.setdefault(ts_code, []).append(address)
+    return subscribers
+
+
+def signal_rows(results, trade_date=None):
+    """
+    取出指定交易日的买卖信号
+
+    参数:
+        results: {股票代码: detect_signals 返回的 DataFrame}
+        trade_date: 交易日期，默认为所有结果中最新的交易日
+
+    返回:
+        tuple: (交易日期 Timestamp, 信号 DataFrame)，列为 股票代码、交易日期、信号、收盘价、MA5、MA20
+    """
+    frames = {ts_code: df for ts_code, df in results.items() if df is not None and not df.empty}
+    if not frames:
+        return None, pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+    if trade_date is None:
+        trade_date = max(df['交易日期'].iloc[-1] for df in frames.values())
+    trade_date = pd.Timestamp(trade_date)
+
+    rows = []
+    for ts_code, df in frames.items():
+        day = df[(df['交易日期'] == trade_date) & df['信号'].isin(SIGNALS)]
+        if not day.empty:
+            # 以 results 的键为准，图表按同一键查找
+            rows.append(day[['交易日期', '信号', '收盘价', 'MA5', 'MA20']].assign(股票代码=ts_code))
+    if not rows:
+        return trade_date, pd.DataFrame(columns=SIGNAL_COLUMNS)
+    return trade_date, pd.concat(rows, ignore_index=True)[SIGNAL_COLUMNS]
+
+
+def group_by_subscriber(signals, subscribers):
+    """
+    按订阅者分组信号，只遍历一次信号表
+
+    参数:
+        signals: signal_rows 返回的信号 DataFrame
+        subscribers: invert_subscriptions 返回的 {股票代码: [邮箱, ...]}
+
+    返回:
+        dict: {邮箱: [(股票代码, 信号, 收盘价, MA5, MA20), ...]}，没有信号的订阅者不出现
+    """
+    digests = {}
+    for row in zip(signals['股票代码'], signals['信号'], signals['收盘价'], signals['MA5'], signals['MA20']):
+        for address in subscribers.get(row[0], ()):
+            digests.setdefault(address, []).append(row)
+    return digests
+
+
+def format_digest(trade_date, rows):
+    """
+    生成摘要邮件的主题与正文
+
+    返回:
+        tuple: (主题, 正文)
+    """
+    day = trade_date.strftime('%Y-%m-%d')
+    buy = [r for r in rows if r[1] == '买入信号']
+    sell = [r for r in rows if r[1] == '卖出信号']
+    subject = f"📊 {day} 关注列表信号：买入 {len(buy)} 只，卖出 {len(sell)} 只"
+
+    lines = [f"{day} 收盘后，您关注的股票出现以下均线交叉信号：", ""]
+    for title, group in (("买入信号（5日线上穿20日线）", buy), ("卖出信号（5日线下穿20日线）", sell)):
+        if not group:
+            continue
+        lines.append(f"【{title}】")
+        for ts_code, _, close, ma5, ma20 in group:
+            lines.append(f"  {ts_code:<12} 收盘 {close:>9.2f}   MA5 {ma5:>9.2f}   MA20 {ma20:>9.2f}")
+        lines.append("")
+    lines.append("图表见附件。本邮件由信号分发程序自动发送，仅供参考，不构成投资建议。")
+    return subject, '\n'.join(lines)
+
+
+class SignalDispatcher:
+    """信号摘要邮件分发器"""
+
+    def __init__(self, analyzer, email_tool, batch_size=200, workers=4, max_charts=10, dpi=80):
+        """
+        参数:
+            analyzer: StockAnalyzer，用于渲染图表
+            email_tool: 已通过 configure 配置好的 EmailTool（或提供 make_attachment、build_message、
+                        send_bulk 的同类对象）
+            batch_size: 每批构建并发送的邮件数，限制同时驻留内存的邮件
+            workers: 并发 SMTP 连接数
+            max_charts: 每封邮件最多附带的图表数
+            dpi: 图表分辨率
+        """
+        self.analyzer = analyzer
+        self.email_tool = email_tool
+        self.batch_size = batch_size
+        self.workers = workers
+        self.max_charts = max_charts
+        self.dpi = dpi
+
+    def render_charts(self, results, ts_codes, trade_date):
+        """
+        为出现信号的股票各渲染一张图表，并编码为邮件附件，所有订阅者共用
+
+        返回:
+            dict: {股票代码: 附件对象}，渲染失败的股票不出现
+        """
+        charts = {}
+        for ts_code in ts_codes:
+            png = self.analyzer.render_chart_png(results[ts_code], ts_code, dpi=self.dpi)
+            if png:
+                charts[ts_code] = self.email_tool.make_attachment(f"{ts_code}_{trade_date:%Y%m%d}.png", png,
+                                                                  'image', 'png')
+        return charts
+
+    def build_messages(self, trade_date, digests, charts):
+        """逐个生成摘要邮件，按需构建以便分批发送"""
+        for address, rows in digests.items():
+            subject, body = format_digest(trade_date, rows)
+            attachments = [charts[ts_code] for ts_code in dict.fromkeys(r[0] for r in rows) if ts_code in charts]
+            yield self.email_tool.build_message(address, subject, body, attachments[:self.max_charts])
+
+    def _batches(self, messages):
+        batch = []
+        for msg in messages:
+            batch.append(msg)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def dispatch(self, results, subscriptions, trade_date=None, dry_run_dir=None):
+        """
+        分发一次全量分析的信号摘要
+
+        参数:
+            results: {股票代码: detect_signals 返回的 DataFrame}
+            subscriptions: {邮箱: [股票代码, ...]}
+            trade_date: 信号交易日，默认为最新交易日
+            dry_run_dir: 指定后只把邮件写成 .eml 文件，不发送
+
+        返回:
+            dict: 汇总信息 recipients、sent、failed、seconds、signals、charts
+        """
+        start = time.perf_counter()
+        trade_date, signals = signal_rows(results, trade_date)
+        digests = group_by_subscriber(signals, invert_subscriptions(subscriptions))
+
+        summary = {'recipients': len(digests), 'sent': 0, 'failed': 0, 'seconds': 0.0,
+                   'signals': len(signals), 'charts': 0}
+        if not digests:
+            print("ℹ️  没有订阅者需要通知")
+            return summary
+
+        charts = self.render_charts(results, signals['股票代码'].unique(), trade_date)
+        summary['charts'] = len(charts)
+        print(f"📨 {trade_date:%Y-%m-%d} 共 {len(signals)} 条信号，{len(digests)} 位订阅者，图表 {len(charts)} 张")
+
+        messages = self.build_messages(trade_date, digests, charts)
+        if dry_run_dir:
+            if not os.path.exists(dry_run_dir):
+                os.makedirs(dry_run_dir)
+            for msg in messages:
+                file_path = os.path.join(dry_run_dir, f"{msg['To']}.eml")
+                with open(file_path, 'wb') as f:
+                    f.write(msg.as_bytes())
+                summary['sent'] += 1
+            print(f"✅ 已生成 {summary['sent']} 封邮件: {dry_run_dir}")
+        else:
+            for batch in self._batches(messages):
+                _, batch_summary = self.email_tool.send_bulk(batch, workers=self.workers)
+                summary['sent'] += batch_summary['sent']
+                summary['failed'] += batch_summary['failed']
+
+        summary['seconds'] = time.perf_counter() - start
+        return summary
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    from data_source import FileDataSource
+    from stock_analyzer import StockAnalyzer
+    try:
+        from email_tool import EmailTool
+    except ImportError:
+        print("⚠️  找不到 email_tool，请在项目根目录以 PYTHONPATH=. 运行")
+        return
+
+    parser = argparse.ArgumentParser(description="信号邮件摘要分发")
+    parser.add_argument('--subscriptions', required=True, help="订阅文件（CSV：邮箱,关注列表）")
+    parser.add_argument('--token', default=os.environ.get('TUSHARE_TOKEN'), help="Tushare token")
+    parser.add_argument('--data', help="本地行情文件或目录，指定后不访问 Tushare")
+    parser.add_argument('--date', help="信号交易日 YYYY-MM-DD，默认为最新交易日")
+    parser.add_argument('--sender', default=os.environ.get('EMAIL_ADDRESS'), help="发件邮箱")
+    parser.add_argument('--password', default=os.environ.get('EMAIL_PASSWORD'), help="邮箱密码/授权码")
+    parser.add_argument('--smtp-server', help="SMTP 服务器，默认按发件邮箱域名配置")
+    parser.add_argument('--smtp-port', type=int, help="SMTP 端口")
+    parser.add_argument('--workers', type=int, default=4, help="并发 SMTP 连接数")
+    parser.add_argument('--batch-size', type=int, default=200, help="每批发送的邮件数")
+    parser.add_argument('--dry-run', metavar='DIR', help="只把邮件写入目录，不发送")
+    args = parser.parse_args()
+
+    if args.data:
+        analyzer = StockAnalyzer(source=FileDataSource(args.data))
+    elif args.token:
+        analyzer = StockAnalyzer(args.token)
+    else:
+        print("⚠️  请通过 --token、环境变量 TUSHARE_TOKEN 或 --data 指定数据来源")
+        return
+
+    tool = EmailTool()
+    if not args.dry_run:
+        if not args.sender or not args.password:
+            print("⚠️  请通过 --sender/--password 或环境变量 EMAIL_ADDRESS/EMAIL_PASSWORD 提供发件邮箱")
+            return
+        tool.configure(args.sender, args.password, args.smtp_server, args.smtp_port)
+    else:
+        tool.email = args.sender or 'signals@localhost'
+
+    subscriptions = load_subscriptions(args.subscriptions)
+
+    # 全量分析只覆盖有人订阅的股票
+    results = {}
+    for ts_code in invert_subscriptions(subscriptions):
+        df = analyzer.get_stock_data(ts_code)
+        if df is None:
+            continue
+        df = analyzer.validate_data(df)
+        df = analyzer.calculate_moving_averages(df)
+        results[ts_code] = analyzer.detect_signals(df)
+
+    dispatcher = SignalDispatcher(analyzer, tool, args.batch_size, args.workers)
+    summary = dispatcher.dispatch(results, subscriptions, args.date, args.dry_run)
+    print(f"✅ 分发完成: 订阅者 {summary['recipients']} 位，成功 {summary['sent']} 封，"
+          f"失败 {summary['failed']} 封，耗时 {summary['seconds']:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,8 +17,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 import tushare as ts
 from datetime import datetime, timedelta
+import io
 import os
 
+import data_quality
+from data_source import TushareSource
+import multi_timeframe
+from signal_db import SignalStore, DEFAULT_DB_PATH
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
 plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
@@ -26,22 +32,31 @@ plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 class StockAnalyzer:
     """股票分析类"""
     
-    def __init__(self, token):
+    def __init__(self, token=None, source=None):
         """
         初始化函数
         
         参数:
-            token: Tushare API token
+            token: Tushare API token，使用本地数据源时可以为None
+            source: 数据源（见 data_source 模块），默认为 Tushare 在线数据源
         """
-        # 设置Tushare token
-        ts.set_token(token)
-        # 初始化Tushare API
-        self.pro = ts.pro_api()
-        print("✅ Tushare API 初始化成功")
+        self.pro = None
+        if token:
+            # 设置Tushare token
+            ts.set_token(token)
+            # 初始化Tushare API
+            self.pro = ts.pro_api()
+            print("✅ Tushare API 初始化成功")
+        
+        if source is None:
+            if self.pro is None:
+                raise ValueError("未提供 Tushare token 时必须指定数据源")
+            source = TushareSource(self.pro)
+        self.source = source
     
     def get_stock_data(self, stock_code='603986.SH', years=3):
         """
-        从Tushare获取股票历史数据
+        从数据源获取股票历史数据
         
         参数:
             stock_code: 股票代码，默认为兆易创新(603986.SH)
@@ -59,36 +74,17 @@ class StockAnalyzer:
         print(f"📅 时间范围: {start_date} 至 {end_date}")
         
         try:
-            # 调用Tushare API获取日线数据
+            # 从数据源获取日线数据（默认调用Tushare API）
             # ts_code: 股票代码
             # start_date: 开始日期
             # end_date: 结束日期
-            df = self.pro.daily(ts_code=stock_code, start_date=start_date, end_date=end_date)
+            df = self.source.daily(stock_code, start_date, end_date)
             
             if df.empty:
                 print("❌ 未获取到数据，请检查股票代码是否正确")
                 return None
             
-            # 数据排序（按日期升序）
-            df = df.sort_values('trade_date')
-            
-            # 转换日期格式
-            df['trade_date'] = pd.to_datetime(df['trade_date'], format='%Y%m%d')
-            
-            # 重命名列，使其更直观
-            df = df.rename(columns={
-                'ts_code': '股票代码',
-                'trade_date': '交易日期',
-                'open': '开盘价',
-                'high': '最高价',
-                'low': '最低价',
-                'close': '收盘价',
-                'pre_close': '前收盘价',
-                'change': '涨跌额',
-                'pct_chg': '涨跌幅(%)',
-                'vol': '成交量(手)',
-                'amount': '成交额(千元)'
-            })
+            df = self.format_daily(df)
             
             print(f"✅ 成功获取 {len(df)} 条记录")
             return df
@@ -97,6 +93,77 @@ class StockAnalyzer:
             print(f"❌ 获取数据时出错: {e}")
             return None
     
+    def format_daily(self, df):
+        """
+        将 Tushare pro.daily 格式的日线数据转换为分析使用的格式
+        
+        参数:
+            df: Tushare pro.daily 格式的数据
+            
+        返回:
+            DataFrame: 按日期升序、列名为中文的数据
+        """
+        # 数据排序（按日期升序）
+        df = df.sort_values('trade_date')
+        
+        # 转换日期格式
+        df['trade_date'] = pd.to_datetime(df['trade_date'], format='%Y%m%d')
+        
+        # 重命名列，使其更直观
+        return df.rename(columns={
+            'ts_code': '股票代码',
+            'trade_date': '交易日期',
+            'open': '开盘价',
+            'high': '最高价',
+            'low': '最低价',
+            'close': '收盘价',
+            'pre_close': '前收盘价',
+            'change': '涨跌额',
+            'pct_chg': '涨跌幅(%)',
+            'vol': '成交量(手)',
+            'amount': '成交额(千元)'
+        })
+    
+    def validate_data(self, df, calendar=None, repair=True):
+        """
+        检查行情数据质量：重复交易日、缺失K线、停牌、高低价异常等
+        
+        参数:
+            df: 股票数据DataFrame
+            calendar: 交易日历，用于检查缺失K线；默认向数据源查询数据所在区间的交易日历，
+                      数据源没有交易日历时只能使用数据自身的交易日（此时查不出单只股票的缺失K线）
+            repair: 是否返回修复后的数据
+            
+        返回:
+            DataFrame: repair=True 时为修复后的数据，否则为原数据
+        """
+        print("\n🩺 正在检查数据质量...")
+        
+        try:
+            if calendar is None and not df.empty:
+                dates = pd.to_datetime(df['交易日期'])
+                calendar = self.source.trade_calendar(dates.min().strftime('%Y%m%d'),
+                                                      dates.max().strftime('%Y%m%d'))
+                if calendar is None:
+                    print("⚠️  数据源没有交易日历，无法检查缺失K线")
+            if repair:
+                report, fixed = data_quality.scan(df, calendar, repair=True)
+            else:
+                report, fixed = data_quality.scan(df, calendar), df
+            
+            if report.ok:
+                print("✅ 数据质量检查通过")
+            else:
+                for problem, count in report.summary().items():
+                    print(f"⚠️  {problem}: {count} 处")
+                if repair:
+                    print(f"🔧 已修复，剩余 {len(fixed)} 条记录")
+            return fixed
+            
+        except Exception as e:
+            print(f"❌ 检查数据质量时出错: {e}")
+            return df
+    
     def calculate_moving_averages(self, df):
         """
         计算移动平均线
@@ -128,12 +195,13 @@ class StockAnalyzer:
             print(f"❌ 计算移动平均线时出错: {e}")
             return df
     
-    def detect_signals(self, df):
+    def detect_signals(self, df, confirm=False):
         """
         检测买卖信号
         
         参数:
             df: 包含移动平均线的股票数据
+            confirm: 是否用周线、月线趋势确认信号，确认结果写入"确认信号"列
             
         返回:
             DataFrame: 包含买卖信号的股票数据
@@ -174,6 +242,12 @@ class StockAnalyzer:
             print(f"📋 买入信号: {buy_signals} 个")
             print(f"📋 卖出信号: {sell_signals} 个")
             
+            # 多周期确认：周线、月线由同一份日线数据聚合得到
+            if confirm:
+                df = multi_timeframe.confirm_signals(df)
+                confirmed = (df['确认信号'] != '').sum()
+                print(f"📋 多周期确认信号: {confirmed} 个")
+            
             return df
             
         except Exception as e:
@@ -222,6 +296,92 @@ class StockAnalyzer:
             print(f"❌ 保存Excel文件时出错: {e}")
             return None
     
+    def save_to_database(self, df, db_path=DEFAULT_DB_PATH):
+        """
+        将信号与指标快照批量写入信号历史数据库
+        
+        参数:
+            df: 包含信号的股票数据
+            db_path: SQLite 数据库文件路径
+            
+        返回:
+            int: 写入的信号条数，出错时返回None
+        """
+        print("\n🗄️  正在写入信号数据库...")
+        
+        try:
+            store = SignalStore(db_path)
+            try:
+                snapshots, signals = store.save_analysis(df)
+                # 按行业查询需要股票基础信息，缺少时从 Tushare 补充一次
+                if self.pro is not None and store.missing_stocks(df['股票代码'].unique()):
+                    stock_basic = self.pro.stock_basic(fields='ts_code,name,industry')
+                    store.upsert_stocks(stock_basic)
+            finally:
+                store.close()
+            
+            print(f"✅ 已写入 {snapshots} 条指标快照、{signals} 条信号: {db_path}")
+            return signals
+            
+        except Exception as e:
+            print(f"❌ 写入信号数据库时出错: {e}")
+            return None
+    
+    @staticmethod
+    def draw_chart(df, stock_code):
+        """
+        在新建的图表上绘制股价、均线与买卖信号
+        
+        参数:
+            df: 包含移动平均线的股票数据
+            stock_code: 股票代码，用于标题
+            
+        返回:
+            Figure: matplotlib 图表对象，调用方负责保存并关闭
+        """
+        # 创建图表
+        fig = plt.figure(figsize=(15, 8))
+        
+        # 绘制收盘价
+        plt.plot(df['交易日期'], df['收盘价'], label='收盘价', color='blue', linewidth=2)
+        
+        # 绘制5日均线
+        plt.plot(df['交易日期'], df['MA5'], label='5日均线', color='red', linewidth=1.5)
+        
+        # 绘制10日均线
+        plt.plot(df['交易日期'], df['MA10'], label='10日均线', color='green', linewidth=1.5)
+        
+        # 绘制20日均线
+        plt.plot(df['交易日期'], df['MA20'], label='20日均线', color='orange', linewidth=1.5)
+        
+        # 标记买入信号
+        buy_signals = df[df['信号'] == '买入信号']
+        if not buy_signals.empty:
+            plt.scatter(buy_signals['交易日期'], buy_signals['收盘价'], 
+                      marker='^', color='lime', s=100, label='买入信号')
+        
+        # 标记卖出信号
+        sell_signals = df[df['信号'] == '卖出信号']
+        if not sell_signals.empty:
+            plt.scatter(sell_signals['交易日期'], sell_signals['收盘价'], 
+                      marker='v', color='red', s=100, label='卖出信号')
+        
+        # 设置图表标题和标签
+        plt.title(f'{stock_code} 股价与移动平均线分析', fontsize=16)
+        plt.xlabel('日期', fontsize=12)
+        plt.ylabel('价格', fontsize=12)
+        
+        # 添加图例
+        plt.legend(loc='best', fontsize=10)
+        
+        # 添加网格
+        plt.grid(True, linestyle='--', alpha=0.7)
+        
+        # 自动调整日期标签
+        fig.autofmt_xdate()
+        plt.tight_layout()
+        return fig
+    
     def plot_chart(self, df, stock_code='603986'):
         """
         绘制股价和均线图
@@ -242,46 +402,7 @@ class StockAnalyzer:
                 os.makedirs(chart_dir)
                 print(f"📁 创建目录: {chart_dir}")
             
-            # 创建图表
-            plt.figure(figsize=(15, 8))
-            
-            # 绘制收盘价
-            plt.plot(df['交易日期'], df['收盘价'], label='收盘价', color='blue', linewidth=2)
-            
-            # 绘制5日均线
-            plt.plot(df['交易日期'], df['MA5'], label='5日均线', color='red', linewidth=1.5)
-            
-            # 绘制10日均线
-            plt.plot(df['交易日期'], df['MA10'], label='10日均线', color='green', linewidth=1.5)
-            
-            # 绘制20日均线
-            plt.plot(df['交易日期'], df['MA20'], label='20日均线', color='orange', linewidth=1.5)
-            
-            # 标记买入信号
-            buy_signals = df[df['信号'] == '买入信号']
-            if not buy_signals.empty:
-                plt.scatter(buy_signals['交易日期'], buy_signals['收盘价'], 
-                          marker='^', color='lime', s=100, label='买入信号')
-            
-            # 标记卖出信号
-            sell_signals = df[df['信号'] == '卖出信号']
-            if not sell_signals.empty:
-                plt.scatter(sell_signals['交易日期'], sell_signals['收盘价'], 
-                          marker='v', color='red', s=100, label='卖出信号')
-            
-            # 设置图表标题和标签
-            plt.title(f'{stock_code} 股价与移动平均线分析', fontsize=16)
-            plt.xlabel('日期', fontsize=12)
-            plt.ylabel('价格', fontsize=12)
-            
-            # 添加图例
-            plt.legend(loc='best', fontsize=10)
-            
-            # 添加网格
-            plt.grid(True, linestyle='--', alpha=0.7)
-            
-            # 自动调整日期标签
-            plt.gcf().autofmt_xdate()
+            fig = self.draw_chart(df, stock_code)
             
             # 生成文件名
             today = datetime.now().strftime('%Y%m%d')
@@ -289,9 +410,8 @@ class StockAnalyzer:
             file_path = os.path.join(chart_dir, filename)
             
             # 保存图表
-            plt.tight_layout()
-            plt.savefig(file_path, dpi=150)
-            plt.close()
+            fig.savefig(file_path, dpi=150)
+            plt.close(fig)
             
             print(f"✅ 图表已保存: {file_path}")
             return file_path
@@ -299,6 +419,28 @@ class StockAnalyzer:
         except Exception as e:
             print(f"❌ 绘制图表时出错: {e}")
             return None
+    
+    def render_chart_png(self, df, stock_code='603986', dpi=100):
+        """
+        将股价和均线图渲染为内存中的PNG数据，不写磁盘
+        
+        参数:
+            df: 包含移动平均线的股票数据
+            stock_code: 股票代码，用于标题
+            dpi: 图片分辨率
+            
+        返回:
+            bytes: PNG图片数据，出错时返回None
+        """
+        try:
+            fig = self.draw_chart(df, stock_code)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', dpi=dpi)
+            plt.close(fig)
+            return buffer.getvalue()
+        except Exception as e:
+            print(f"❌ 渲染图表时出错: {e}")
+            return None
 
 def main():
     """
@@ -331,6 +473,9 @@ def main():
     df = analyzer.get_stock_data('603986.SH', years=3)
     
     if df is not None:
+        # 检查并修复数据质量问题
+        df = analyzer.validate_data(df)
+        
         # 计算移动平均线
         df = analyzer.calculate_moving_averages(df)
         
@@ -340,6 +485,9 @@ def main():
         # 保存到Excel
         excel_path = analyzer.save_to_excel(df, '603986')
         
+        # 写入信号数据库
+        analyzer.save_to_database(df)
+        
         # 绘制图表
         chart_path = analyzer.plot_chart(df, '603986')
         
@@ -0,0 +1,303 @@
+"""
+实时逐笔行情消费模块
+功能：
+1. 从可插拔的行情源（测试时使用本地回放文件）异步读取逐笔成交
+2. 为每只股票维护固定容量的K线环形缓冲区，内存占用有上限
+3. 增量更新盘中 MA5 / MA20，不对历史K线做任何重算
+4. 检测到5日线上穿/下穿20日线时立即发出买入/卖出信号事件
+
+用法：
+    python src/tick_stream.py ticks.csv --bar-seconds 60
+
+回放文件为CSV，表头为 ts_code,time,price,volume，
+time 可以是 'YYYY-mm-dd HH:MM:SS' 或 Unix 时间戳（秒）。
+"""
+
+import asyncio
+import csv
+import time
+from datetime import datetime
+
+import numpy as np
+
+# 计算均线所需的窗口
+SHORT_WINDOW = 5
+LONG_WINDOW = 20
+
+
+class TickSource:
+    """
+    行情源基类
+
+    子类实现 ticks() 异步生成器，逐条产出 (ts_code, timestamp, price, volume)，
+    其中 timestamp 为 Unix 秒数。
+    """
+
+    def ticks(self):
+        raise NotImplementedError
+
+
+class ReplayFileSource(TickSource):
+    """本地回放文件行情源"""
+
+    def __init__(self, file_path, speed=0):
+        """
+        参数:
+            file_path: 回放CSV文件路径
+            speed: 回放倍速，0 表示不等待、尽快回放；1 表示按原始节奏回放
+        """
+        self.file_path = file_path
+        self.speed = speed
+
+    @staticmethod
+    def _parse_time(value):
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+
+    async def ticks(self):
+        last_ts = None
+        with open(self.file_path, 'r', newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                ts = self._parse_time(row['time'])
+                if self.speed and last_ts is not None and ts > last_ts:
+                    await asyncio.sleep((ts - last_ts) / self.speed)
+                else:
+                    # 让出事件循环，避免长文件回放时饿死其他协程
+                    await asyncio.sleep(0)
+                last_ts = ts
+                yield row['ts_code'], ts, float(row['price']), float(row.get('volume') or 0)
+
+
+class QueueSource(TickSource):
+    """基于 asyncio.Queue 的行情源，供实盘推送接口写入，放入 None 表示结束"""
+
+    def __init__(self, maxsize=0):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    async def put(self, ts_code, timestamp, price, volume=0):
+        await self.queue.put((ts_code, timestamp, price, volume))
+
+    async def close(self):
+        await self.queue.put(None)
+
+    async def ticks(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            yield item
+
+
+class BarRing:
+    """
+    单只股票的K线环形缓冲区
+
+    只保存最近 capacity 根已完成K线，以及正在形成的当前K线。
+    已完成K线收盘价的滚动和在收线时增量维护，盘中计算均线为 O(1)。
+    """
+
+    def __init__(self, bar_seconds=60, capacity=240):
+        """
+        参数:
+            bar_seconds: 每根K线的秒数
+            capacity: 保留的已完成K线数量，不能小于长均线窗口
+        """
+        if capacity < LONG_WINDOW:
+            raise ValueError(f"capacity 不能小于 {LONG_WINDOW}")
+
+        self.bar_seconds = bar_seconds
+        self.capacity = capacity
+        # 已完成K线：开始时间、开、高、低、收、量
+        self.data = np.zeros((capacity, 6), dtype=np.float64)
+        self.count = 0  # 累计完成的K线数量
+        self.current = None  # 正在形成的K线 [开始时间, 开, 高, 低, 收, 量]
+
+        # 最近 n-1 根已完成K线收盘价之和，用于拼接当前价得到盘中均线
+        self.short_sum = 0.0
+        self.long_sum = 0.0
+
+    def _close_at(self, back):
+        """返回倒数第 back 根已完成K线的收盘价（back 从 1 开始）"""
+        return float(self.data[(self.count - back) % self.capacity, 4])
+
+    def _finish_current(self):
+        bar = self.current
+        self.data[self.count % self.capacity] = bar
+        self.count += 1
+        close = bar[4]
+
+        # 增量维护滚动和：加入新收盘价，移出滑出窗口的收盘价
+        self.short_sum += close
+        if self.count > SHORT_WINDOW - 1:
+            self.short_sum -= self._close_at(SHORT_WINDOW)
+        self.long_sum += close
+        if self.count > LONG_WINDOW - 1:
+            self.long_sum -= self._close_at(LONG_WINDOW)
+
+    def update(self, timestamp, price, volume=0):
+        """
+        用一笔成交更新K线
+
+        返回:
+            bool: 是否因此笔成交收出了一根新K线
+        """
+        start = timestamp - timestamp % self.bar_seconds
+        finished = False
+
+        if self.current is None:
+            self.current = [start, price, price, price, price, volume]
+        elif start > self.current[0]:
+            self._finish_current()
+            self.current = [start, price, price, price, price, volume]
+            finished = True
+        else:
+            bar = self.current
+            if price > bar[2]:
+                bar[2] = price
+            if price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            bar[5] += volume
+
+        return finished
+
+    def moving_averages(self):
+        """
+        计算包含当前未完成K线在内的盘中 MA5 / MA20
+
+        返回:
+            tuple: (ma5, ma20)，K线数量不足时对应值为 None
+        """
+        if self.current is None:
+            return None, None
+
+        price = self.current[4]
+        ma5 = (self.short_sum + price) / SHORT_WINDOW if self.count >= SHORT_WINDOW - 1 else None
+        ma20 = (self.long_sum + price) / LONG_WINDOW if self.count >= LONG_WINDOW - 1 else None
+        return ma5, ma20
+
+    def bars(self):
+        """按时间顺序返回缓冲区中的已完成K线（副本）"""
+        n = min(self.count, self.capacity)
+        if n == 0:
+            return self.data[:0].copy()
+        idx = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.data[idx]
+
+
+class TickStreamConsumer:
+    """逐笔行情消费者，维护每只股票的K线与均线状态并发出交叉信号"""
+
+    def __init__(self, watchlist=None, bar_seconds=60, capacity=240, on_signal=None):
+        """
+        参数:
+            watchlist: 关注的股票代码集合，None 表示处理所有股票
+            bar_seconds: K线周期（秒）
+            capacity: 每只股票保留的已完成K线数量
+            on_signal: 信号回调函数，参数为信号字典；为 None 时信号放入 self.signals 队列
+        """
+        self.watchlist = set(watchlist) if watchlist else None
+        self.bar_seconds = bar_seconds
+        self.capacity = capacity
+        self.on_signal = on_signal
+        self.signals = asyncio.Queue()
+
+        self.rings = {}
+        # 上一笔成交时 MA5 与 MA20 的相对关系：1 在上方，0 相等，-1 在下方
+        self.relations = {}
+        self.tick_count = 0
+
+    def _ring(self, ts_code):
+        ring = self.rings.get(ts_code)
+        if ring is None:
+            ring = BarRing(self.bar_seconds, self.capacity)
+            self.rings[ts_code] = ring
+        return ring
+
+    def process_tick(self, ts_code, timestamp, price, volume=0):
+        """
+        处理一笔成交
+
+        返回:
+            dict: 触发交叉时返回信号字典，否则返回 None
+        """
+        if self.watchlist is not None and ts_code not in self.watchlist:
+            return None
+
+        received = time.perf_counter()
+        self.tick_count += 1
+        ring = self._ring(ts_code)
+        ring.update(timestamp, price, volume)
+
+        ma5, ma20 = ring.moving_averages()
+        if ma5 is None or ma20 is None:
+            return None
+
+        relation = 1 if ma5 > ma20 else (-1 if ma5 < ma20 else 0)
+        prev = self.relations.get(ts_code)
+        self.relations[ts_code] = relation
+
+        # 与 detect_signals 一致：前值 <= 且现值 > 为上穿；前值 >= 且现值 < 为下穿
+        if prev is None or relation == 0 or prev == relation:
+            return None
+
+        return {
+            '股票代码': ts_code,
+            '时间': datetime.fromtimestamp(timestamp),
+            '价格': price,
+            'MA5': ma5,
+            'MA20': ma20,
+            '信号': '买入信号' if relation == 1 else '卖出信号',
+            '延迟(ms)': (time.perf_counter() - received) * 1000,
+        }
+
+    async def _emit(self, signal):
+        if self.on_signal is None:
+            await self.signals.put(signal)
+            return
+        result = self.on_signal(signal)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def run(self, source):
+        """
+        消费行情源直到结束
+
+        参数:
+            source: TickSource 实例
+
+        返回:
+            int: 处理的成交笔数
+        """
+        async for ts_code, timestamp, price, volume in source.ticks():
+            signal = self.process_tick(ts_code, timestamp, price, volume)
+            if signal is not None:
+                await self._emit(signal)
+        return self.tick_count
+
+
+def main():
+    """主函数：回放本地逐笔文件并打印交叉信号"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="逐笔行情回放与均线交叉提醒")
+    parser.add_argument('file', help="回放CSV文件路径")
+    parser.add_argument('--bar-seconds', type=int, default=60, help="K线周期（秒）")
+    parser.add_argument('--speed', type=float, default=0, help="回放倍速，0 为尽快回放")
+    args = parser.parse_args()
+
+    def print_signal(signal):
+        print(f"🔔 {signal['时间']} {signal['股票代码']} {signal['信号']} "
+              f"价格={signal['价格']:.2f} MA5={signal['MA5']:.2f} MA20={signal['MA20']:.2f}")
+
+    consumer = TickStreamConsumer(bar_seconds=args.bar_seconds, on_signal=print_signal)
+    start = time.perf_counter()
+    count = asyncio.run(consumer.run(ReplayFileSource(args.file, speed=args.speed)))
+    elapsed = time.perf_counter() - start
+    print(f"✅ 回放完成：{count} 笔成交，{len(consumer.rings)} 只股票，耗时 {elapsed:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+招投标信息异步并发爬虫
+功能：在 TenderSpider 的基础上用 asyncio 并发抓取列表页与详情页
+- 连接池大小有上限，同时进行的请求数不超过 max_connections
+- 按主机限速（每秒请求数），代替固定的随机 sleep
+- 连接失败、超时与 429/5xx 响应按指数退避重试，重试请求同样受限速约束
+- 列表页解析出详情链接后立即并发抓取详情页，补全预算金额与截止日期
+- base_url 可指向本地测试服务器
+"""
+
+import asyncio
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from tender_fields import normalize_tender
+from tender_logging import setup_logging
+from tender_spider import TenderSpider, logger
+
+# 可以重试的响应状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _retryable(error):
+    """连接失败、超时以及 RETRY_STATUS 中的响应可以重试，404 之类的错误重试也无济于事"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in RETRY_STATUS
+
+
+class HostSchedule:
+    """
+    按主机预约请求时间片：同一主机的相邻两次请求至少间隔 1/rate 秒
+    只负责计算，不加锁也不等待，异步版与线程版限速器各自保证预约不被并发打断
+    """
+
+    def __init__(self, rate=2.0):
+        """
+        参数: rate - 每个主机每秒允许的请求数，0 表示不限速
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_time = {}
+
+    def reserve(self, url, now):
+        """
+        为 url 所在主机预约下一个可用时间片
+        参数:
+            url - 请求URL
+            now - 当前时间（单调时钟，秒）
+        返回: 发出请求前需要等待的秒数
+        """
+        if not self.interval:
+            return 0.0
+        host = urlparse(url).netloc
+        start = max(now, self.next_time.get(host, now))
+        self.next_time[host] = start + self.interval
+        return start - now
+
+
+class HostRateLimiter:
+    """按主机的请求速率限制器（异步版）"""
+
+    def __init__(self, rate=2.0):
+        """
+        参数: rate - 每个主机每秒允许的请求数
+        """
+        self.schedule = HostSchedule(rate)
+
+    async def acquire(self, url):
+        """等待直到可以向 url 所在主机发出请求"""
+        # 预约中没有 await，在事件循环中一步完成，协程之间不需要加锁
+        delay = self.schedule.reserve(url, asyncio.get_running_loop().time())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncTenderCrawler:
+    """TenderSpider 的异步并发抓取模式"""
+
+    def __init__(self, spider=None, max_connections=8, rate=2.0, retries=2, backoff=0.5):
+        """
+        参数:
+            spider - TenderSpider 实例，负责页面请求与解析
+            max_connections - 最大并发请求数
+            rate - 每个主机每秒的请求数上限
+            retries - 请求失败后的最多重试次数
+            backoff - 第一次重试前等待的秒数，之后每次翻倍
+        """
+        self.spider = spider or TenderSpider()
+        self.max_connections = max_connections
+        self.limiter = HostRateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+
+        # 连接池与并发数一致，避免并发请求互相等待连接
+        self.spider.mount_adapter(max_connections)
+
+        self.semaphore = None
+        self.requests = 0
+
+    async def fetch(self, url):
+        """
+        在限速与并发上限内获取页面，可重试的错误按指数退避重试
+        参数: url - 页面URL
+        返回: 页面HTML内容，失败时返回None
+        """
+        for attempt in range(self.retries + 1):
+            await self.limiter.acquire(url)
+            async with self.semaphore:
+                self.requests += 1
+                try:
+                    # requests 是阻塞调用，放到线程中执行
+                    return await asyncio.to_thread(self.spider.fetch, url, True)
+                except requests.exceptions.RequestException as e:
+                    if attempt == self.retries or not _retryable(e):
+                        logger.error(f"获取页面失败: {url}, 错误: {str(e)}")
+                        return None
+                    delay = self.backoff * 2 ** attempt
+                    logger.warning(f"获取页面失败: {url}, {delay:.2f} 秒后第 {attempt + 1} 次重试, 错误: {str(e)}")
+            # 退避等待时不占用并发名额
+            await asyncio.sleep(delay)
+
+    async def enrich(self, tender):
+        """抓取详情页，补全列表页缺失的字段"""
+        link = tender.get('详情链接')
+        if not link:
+            return tender
+        html = await self.fetch(link)
+        for field, value in self.spider.parse_detail_page(html).items():
+            if not tender.get(field):
+                tender[field] = value
+        return normalize_tender(tender)
+
+    async def crawl_page(self, page, fetch_details):
+        """抓取并解析一个列表页，可选地并发抓取其中的详情页"""
+        html = await self.fetch(self.spider.page_url(page))
+        if not html:
+            logger.warning(f"跳过第 {page} 页")
+            return []
+
+        tender_list = self.spider.parse_list_page(html)
+        if fetch_details:
+            tender_list = await asyncio.gather(*(self.enrich(t) for t in tender_list))
+        logger.info(f"第 {page} 页完成，{len(tender_list)} 条")
+        return list(tender_list)
+
+    async def crawl_async(self, start_page=1, end_page=5, fetch_details=False):
+        """
+        并发抓取多页数据
+        参数:
+            start_page - 起始页码
+            end_page - 结束页码
+            fetch_details - 是否抓取详情页补全字段
+        返回: 招标信息列表，按页码顺序
+        """
+        self.semaphore = asyncio.Semaphore(self.max_connections)
+        start = time.perf_counter()
+
+        pages = await asyncio.gather(*(self.crawl_page(page, fetch_details)
+                                       for page in range(start_page, end_page + 1)))
+        all_tender_list = [tender for page in pages for tender in page]
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"并发抓取完成: {end_page - start_page + 1} 页, {self.requests} 次请求, "
+                    f"{len(all_tender_list)} 条, 耗时 {elapsed:.2f} 秒")
+        return all_tender_list
+
+    def crawl(self, start_page=1, end_page=5, fetch_details=False, filename='tender_info.csv'):
+        """
+        同步入口：并发抓取后保存到CSV，与 TenderSpider.crawl 用法一致
+        """
+        all_tender_list = asyncio.run(self.crawl_async(start_page, end_page, fetch_details))
+        if all_tender_list:
+            self.spider.save_to_csv(all_tender_list, filename)
+        else:
+            logger.warning("未抓取到任何招标信息")
+        return all_tender_list
+
+
+def main():
+    """主函数"""
+    setup_logging('tender_spider.log')
+    logger.info("开始执行招投标信息并发爬虫")
+
+    crawler = AsyncTenderCrawler(max_connections=8, rate=2.0)
+    tender_list = crawler.crawl(start_page=1, end_page=5, fetch_details=True)
+
+    logger.info(f"爬虫执行完成，共抓取 {len(tender_list)} 条招标信息")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+招投标爬虫基准测试
+功能：在本地测试服务器上端到端测试 TenderSpider，不依赖线上网站
+- 测试服务器在独立进程中运行，提供录制的列表页/详情页（或按模板生成的页面），
+  可配置响应延迟、出错比例与分页深度，支持 ETag / 304
+- 出错的页面与延迟由 URL 决定，每次运行、每种模式完全一致
+- 依次测试顺序抓取、asyncio 并发抓取、磁盘缓存（预热后）三种模式，
+  输出 页/秒、条/秒、解析耗时、峰值内存（tracemalloc）
+
+用法：
+    python tender_bench.py --pages 50 --latency 0.05 --error-rate 0.02
+    python tender_bench.py --fixtures saved_pages/ --modes sequential async
+录制目录中 list-*.html 作为列表页循环使用，detail-*.html 作为详情页循环使用
+"""
+
+import asyncio
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tender_async import AsyncTenderCrawler
+from tender_logging import setup_logging
+from tender_spider import TenderSpider, logger
+
+MODES = ('sequential', 'async', 'cached')
+
+ITEM_TEMPLATE = ('<div class="tender-item"><h3 class="title"><a href="/detail/{page}-{i}.html">'
+                 '第{page}页第{i}项 设备采购项目</a></h3><span class="company">某某单位{i}</span>'
+                 '<span class="budget">{budget}万元</span><span class="deadline">2026-{month:02d}-{day:02d}</span></div>')
+DETAIL_TEMPLATE = ('<html><body><h1>{path}</h1><p>采购人：某某单位</p><p>预算金额：{budget}万元</p>'
+                   '<p>投标截止时间：2026年3月{day}日 09:30</p></body></html>')
+
+
+def _fraction(path, salt):
+    """由 URL 路径确定的 [0, 1) 伪随机数"""
+    return (zlib.crc32(f'{salt}:{path}'.encode('utf-8')) & 0xffffffff) / 2 ** 32
+
+
+class FixtureConfig:
+    """测试服务器配置"""
+
+    def __init__(self, pages=20, items_per_page=20, latency=0.05, jitter=0.02, error_rate=0.0, fixtures=None):
+        """
+        参数:
+            pages - 分页深度，超过该页码返回 404
+            items_per_page - 生成的列表页每页项目数（使用录制页面时无效）
+            latency - 每个响应的基础延迟（秒）
+            jitter - 延迟的浮动范围（秒），由 URL 确定
+            error_rate - 返回 500 的页面比例，由 URL 确定
+            fixtures - 录制页面目录，None 时按模板生成页面
+        """
+        self.pages = pages
+        self.items_per_page = items_per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fixtures = fixtures
+
+
+class FixtureSite:
+    """根据配置生成或读取页面"""
+
+    def __init__(self, config):
+        self.config = config
+        self.list_pages = []
+        self.detail_pages = []
+        if config.fixtures:
+            for pattern, target in (('list-*.html', self.list_pages), ('detail-*.html', self.detail_pages)):
+                for path in sorted(glob.glob(os.path.join(config.fixtures, pattern))):
+                    with open(path, 'rb') as f:
+                        target.append(f.read())
+            if not self.list_pages:
+                raise ValueError(f"录制目录中没有 list-*.html: {config.fixtures}")
+
+    def list_page(self, page):
+        if self.list_pages:
+            return self.list_pages[(page - 1) % len(self.list_pages)]
+        items = ''.join(ITEM_TEMPLATE.format(page=page, i=i, budget=(page * 37 + i * 11) % 900 + 10,
+                                             month=(page + i) % 12 + 1, day=(page * 7 + i) % 28 + 1)
+                        for i in range(self.config.items_per_page))
+        return f'<html><head><meta charset="utf-8"></head><body>{items}</body></html>'.encode('utf-8')
+
+    def detail_page(self, path):
+        if self.detail_pages:
+            return self.detail_pages[zlib.crc32(path.encode('utf-8')) % len(self.detail_pages)]
+        return DETAIL_TEMPLATE.format(path=path, budget=zlib.crc32(path.encode('utf-8')) % 900 + 10,
+                                      day=zlib.crc32(path.encode('utf-8')) % 28 + 1).encode('utf-8')
+
+    def resolve(self, path):
+        """
+        参数: path - 请求路径
+        返回: (状态码, 正文)
+        """
+        # page_url 会生成 "//list-2.html" 形式的路径
+        path = '/' + path.lstrip('/')
+        if path == '/':
+            return 200, self.list_page(1)
+        if path.startswith('/list-') and path.endswith('.html'):
+            try:
+                page = int(path[len('/list-'):-len('.html')])
+            except ValueError:
+                return 404, b''
+            if not 1 <= page <= self.config.pages:
+                return 404, b''
+            return 200, self.list_page(page)
+        if path.startswith('/detail'):
+            return 200, self.detail_page(path)
+        return 404, b''
+
+
+def _make_handler(site, config):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            time.sleep(config.latency + config.jitter * _fraction(path, 'latency'))
+
+            if config.error_rate and _fraction(path, 'error') < config.error_rate:
+                status, body = 500, b'fixture error'
+            else:
+                status, body = site.resolve(path)
+
+            etag = None
+            if status == 200:
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def _serve(config, port_queue):
+    """测试服务器子进程入口"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(FixtureSite(config), config))
+    server.daemon_threads = True
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+class FixtureServer:
+    """在独立进程中运行的测试服务器，避免与被测爬虫争用 GIL 和计入内存"""
+
+    def __init__(self, config):
+        self.config = config
+        self.process = None
+        self.url = None
+
+    def start(self):
+        port_queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve, args=(self.config, port_queue), daemon=True)
+        self.process.start()
+        self.url = f'http://127.0.0.1:{port_queue.get(timeout=10)}/'
+        return self.url
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _crawl(mode, url, pages, cache_dir, max_connections):
+    """按模式抓取一次，返回 (爬虫, 抓取条数)"""
+    spider = TenderSpider(base_url=url, cache_dir=cache_dir if mode == 'cached' else None, polite=False)
+    if mode == 'async':
+        # 出错页面由 URL 决定、重试也不会成功，与顺序抓取一样不重试
+        crawler = AsyncTenderCrawler(spider, max_connections=max_connections, rate=0, retries=0)
+        tender_list = asyncio.run(crawler.crawl_async(1, pages))
+    else:
+        tender_list = [t for _, page_list in spider.iter_pages(1, pages) for t in page_list]
+    return spider, len(tender_list)
+
+
+def run_mode(mode, url, pages, max_connections=8):
+    """
+    测试一种抓取模式
+    参数:
+        mode - sequential / async / cached
+        url - 测试服务器地址
+        pages - 抓取页数
+        max_connections - async 模式的并发数
+    返回: 结果字典
+    """
+    cache_dir = tempfile.mkdtemp(prefix='tender_bench_') if mode == 'cached' else None
+    try:
+        if mode == 'cached':
+            # 先预热缓存，测量的是缓存命中（304）时的性能
+            _crawl(mode, url, pages, cache_dir, max_connections)
+
+        start = time.perf_counter()
+        spider, items = _crawl(mode, url, pages, cache_dir, max_connections)
+        elapsed = time.perf_counter() - start
+
+        # 峰值内存单独测一次，tracemalloc 本身的开销不计入耗时
+        tracemalloc.start()
+        _crawl(mode, url, pages, cache_dir, max_connections)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    metrics = spider.metrics.snapshot()
+    return {
+        'mode': mode,
+        'pages': metrics['pages'],
+        'items': items,
+        'requests': metrics['requests'],
+        'failures': metrics['failures'],
+        'seconds': elapsed,
+        'pages_per_sec': metrics['pages'] / elapsed if elapsed else 0.0,
+        'items_per_sec': items / elapsed if elapsed else 0.0,
+        'parse_ms_per_page': metrics['parse_seconds'] * 1000 / metrics['pages'] if metrics['pages'] else 0.0,
+        'peak_mb': peak / 1024 / 1024,
+    }
+
+
+def benchmark(config, modes=MODES, pages=None, max_connections=8):
+    """
+    启动测试服务器并依次测试各模式
+    参数:
+        config - FixtureConfig
+        modes - 要测试的模式
+        pages - 抓取页数，默认为服务器的分页深度
+    返回: 结果字典列表
+    """
+    pages = pages or config.pages
+    with FixtureServer(config) as server:
+        return [run_mode(mode, server.url, pages, max_connections) for mode in modes]
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='招投标爬虫基准测试')
+    parser.add_argument('--pages', type=int, default=20, help='分页深度（抓取页数）')
+    parser.add_argument('--items-per-page', type=int, default=20, help='生成页面的每页项目数')
+    parser.add_argument('--latency', type=float, default=0.05, help='基础响应延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.02, help='延迟浮动范围（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 500 的页面比例')
+    parser.add_argument('--fixtures', help='录制页面目录')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='要测试的模式')
+    parser.add_argument('--connections', type=int, default=8, help='async 模式的并发数')
+    parser.add_argument('--verbose', action='store_true', help='输出爬虫日志')
+    args = parser.parse_args()
+
+    if args.verbose:
+        setup_logging('tender_spider.log')
+    else:
+        # 出错页面的日志属于预期内容，不输出
+        logger.setLevel(logging.CRITICAL)
+
+    config = FixtureConfig(args.pages, args.items_per_page, args.latency, args.jitter,
+                           args.error_rate, args.fixtures)
+    results = benchmark(config, args.modes, max_connections=args.connections)
+
+    print(f"{'模式':<12}{'页数':>6}{'条数':>8}{'失败':>6}{'耗时(秒)':>10}{'页/秒':>9}{'条/秒':>10}"
+          f"{'解析(毫秒/页)':>14}{'峰值内存(MB)':>14}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['pages']:>6}{r['items']:>8}{r['failures']:>6}{r['seconds']:>10.2f}"
+              f"{r['pages_per_sec']:>9.1f}{r['items_per_sec']:>10.1f}{r['parse_ms_per_page']:>14.2f}"
+              f"{r['peak_mb']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
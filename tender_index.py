@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+招投标信息全文索引
+功能：
+- 在本地 SQLite 中为 标题 与 招标公司 建立倒排索引，中文按单字与相邻两字（二元组）切分，单字关键字也能检索
+- 按规范化后的预算金额（元）与截止日期（ISO）做范围筛选
+- 作为输出接在 TenderSpider.crawl_streaming(sinks=[...]) 上，抓取时增量更新
+- 同一招标项目（以 tender_seen.tender_key 判断）只索引一次
+
+用法：
+    python tender_index.py import tender_info.csv
+    python tender_index.py query 医院 设备 --min-budget 100万 --deadline-from 2026-03-01 --limit 20
+"""
+
+import csv
+import re
+import sqlite3
+
+from tender_fields import AMOUNT_FIELD, DATE_FIELD, normalize_tender, parse_amount
+from tender_seen import tender_key
+
+DEFAULT_INDEX_PATH = 'tender_index.db'
+
+# 建立索引的字段
+INDEXED_FIELDS = ('标题', '招标公司')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id        INTEGER PRIMARY KEY,
+    key       BLOB NOT NULL UNIQUE,
+    title     TEXT,
+    company   TEXT,
+    budget    TEXT,
+    deadline  TEXT,
+    link      TEXT,
+    amount    REAL,
+    iso_date  TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term    TEXT NOT NULL,
+    doc_id  INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_docs_amount ON docs (amount);
+CREATE INDEX IF NOT EXISTS idx_docs_iso_date ON docs (iso_date);
+"""
+
+# 标点、空白等分隔符，切词时作为词段边界
+_SEPARATORS = re.compile(r'[\W_]+')
+
+# 排序方式 -> ORDER BY 子句
+ORDERS = {
+    'recent': 'd.id DESC',
+    'deadline': 'd.iso_date IS NULL, d.iso_date',
+    'budget': 'd.amount IS NULL, d.amount DESC',
+}
+
+
+def tokenize(text):
+    """
+    切分为索引词：每个词段取每个字以及相邻两字组成的二元组
+    参数: text - 文本
+    返回: 索引词集合
+    """
+    terms = set()
+    for segment in _SEPARATORS.split(text.lower()):
+        terms.update(segment)
+        terms.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return terms
+
+
+def query_terms(text):
+    """
+    切分检索关键字：多字词段只取二元组（比单字稀有，倒排表短），只有一个字的词段取该字本身
+    参数: text - 关键字
+    返回: 索引词集合
+    """
+    terms = set()
+    for segment in _SEPARATORS.split(text.lower()):
+        if len(segment) == 1:
+            terms.add(segment)
+        else:
+            terms.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return terms
+
+
+def escape_like(text):
+    """转义 LIKE 模式中的通配符，配合 ESCAPE '\\' 使用"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class TenderIndex:
+    """招投标信息倒排索引"""
+
+    def __init__(self, db_path=DEFAULT_INDEX_PATH):
+        """
+        参数: db_path - SQLite 数据库路径
+        """
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def add(self, tender_list):
+        """
+        索引招标信息，已索引的项目会被跳过
+        参数: tender_list - 招标信息列表
+        返回: 新索引的条数
+        """
+        added = 0
+        with self.conn:
+            for tender in tender_list:
+                if AMOUNT_FIELD not in tender:
+                    normalize_tender(tender)
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO docs (key, title, company, budget, deadline, link, amount, iso_date) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (tender_key(tender), tender.get('标题', ''), tender.get('招标公司', ''),
+                     tender.get('预算金额', ''), tender.get('截止日期', ''), tender.get('详情链接', ''),
+                     tender.get(AMOUNT_FIELD), tender.get(DATE_FIELD)))
+                if not cursor.rowcount:
+                    continue
+                doc_id = cursor.lastrowid
+                terms = set()
+                for field in INDEXED_FIELDS:
+                    terms |= tokenize(tender.get(field) or '')
+                self.conn.executemany('INSERT OR IGNORE INTO postings VALUES (?, ?)',
+                                      [(term, doc_id) for term in terms])
+                added += 1
+        return added
+
+    def import_csv(self, file_path, batch_size=5000):
+        """
+        导入 save_to_csv / CsvSink 生成的CSV文件
+        返回: 新索引的条数
+        """
+        added = 0
+        batch = []
+        with open(file_path, 'r', newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                # CSV 中的规范化字段是文本，统一重新计算
+                row.pop(AMOUNT_FIELD, None)
+                row.pop(DATE_FIELD, None)
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    added += self.add(batch)
+                    batch = []
+        if batch:
+            added += self.add(batch)
+        return added
+
+    def _term_frequency(self, term, cap=10000):
+        """索引词的文档数，超过 cap 的按 cap 计（只需要区分稀有与常见）"""
+        sql = 'SELECT COUNT(*) FROM (SELECT 1 FROM postings WHERE term = ? LIMIT ?)'
+        return self.conn.execute(sql, (term, cap)).fetchone()[0]
+
+    def search(self, keywords=None, min_budget=None, max_budget=None,
+               deadline_from=None, deadline_to=None, order='recent', limit=20):
+        """
+        检索招标信息
+        参数:
+            keywords - 关键字列表，结果须同时包含所有关键字（在标题或招标公司中）
+            min_budget / max_budget - 预算金额范围（元，含端点）
+            deadline_from / deadline_to - 截止日期范围（'YYYY-MM-DD'，含端点）
+            order - 排序方式：recent（最新索引）、deadline（截止日期升序）、budget（预算降序）
+            limit - 最多返回条数
+        返回: 招标信息字典列表
+        """
+        conditions = []
+        params = []
+
+        keywords = [k.strip() for k in (keywords or []) if k.strip()]
+        terms = set()
+        for keyword in keywords:
+            terms |= query_terms(keyword)
+
+        sql = ('SELECT d.title, d.company, d.budget, d.deadline, d.link, d.amount, d.iso_date '
+               'FROM docs d')
+        order_by = ORDERS[order]
+        if terms:
+            # 以最稀有的索引词为驱动，按文档编号倒序遍历其倒排表，
+            # 其余索引词逐个在主键上探测，凑够 limit 条即可停止
+            terms = sorted(terms, key=self._term_frequency)
+            sql = sql.replace('FROM docs d', 'FROM postings p JOIN docs d ON d.id = p.doc_id')
+            conditions.append('p.term = ?')
+            params.append(terms[0])
+            for term in terms[1:]:
+                conditions.append('EXISTS (SELECT 1 FROM postings q WHERE q.term = ? AND q.doc_id = p.doc_id)')
+                params.append(term)
+            if order == 'recent':
+                order_by = 'p.doc_id DESC'
+        for keyword in keywords:
+            # 二元组都命中不代表关键字连续出现，再用原文确认
+            conditions.append("(d.title LIKE ? ESCAPE '\\' OR d.company LIKE ? ESCAPE '\\')")
+            params.extend([f'%{escape_like(keyword)}%'] * 2)
+
+        if min_budget is not None:
+            conditions.append('d.amount >= ?')
+            params.append(min_budget)
+        if max_budget is not None:
+            conditions.append('d.amount <= ?')
+            params.append(max_budget)
+        if deadline_from:
+            conditions.append('d.iso_date >= ?')
+            params.append(deadline_from)
+        if deadline_to:
+            conditions.append('d.iso_date <= ?')
+            params.append(deadline_to)
+
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f' ORDER BY {order_by}'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        fields = ['标题', '招标公司', '预算金额', '截止日期', '详情链接', AMOUNT_FIELD, DATE_FIELD]
+        return [dict(zip(fields, row)) for row in self.conn.execute(sql, params)]
+
+    def write(self, tender_list):
+        """输出接口：与 tender_sink 中的各输出用法一致"""
+        self.add(tender_list)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+
+def main():
+    """命令行入口"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="招投标信息全文索引")
+    parser.add_argument('--db', default=DEFAULT_INDEX_PATH, help="索引数据库路径")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    query = sub.add_parser('query', help="检索招标信息")
+    query.add_argument('keywords', nargs='*', help="关键字，多个关键字须同时出现")
+    query.add_argument('--min-budget', help="最低预算，如 500000 或 50万")
+    query.add_argument('--max-budget', help="最高预算，如 1亿")
+    query.add_argument('--deadline-from', help="截止日期不早于 YYYY-MM-DD")
+    query.add_argument('--deadline-to', help="截止日期不晚于 YYYY-MM-DD")
+    query.add_argument('--order', choices=sorted(ORDERS), default='recent', help="排序方式")
+    query.add_argument('--limit', type=int, default=20, help="最多返回条数")
+
+    importer = sub.add_parser('import', help="导入已保存的CSV文件")
+    importer.add_argument('files', nargs='+', help="CSV 文件路径")
+
+    args = parser.parse_args()
+    index = TenderIndex(args.db)
+
+    try:
+        if args.command == 'query':
+            start = time.perf_counter()
+            results = index.search(args.keywords, parse_amount(args.min_budget), parse_amount(args.max_budget),
+                                   args.deadline_from, args.deadline_to, args.order, args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            if not results:
+                print("未找到匹配的招标信息")
+            for tender in results:
+                print(f"{tender[DATE_FIELD] or '-':<10}  {tender['预算金额'] or '-':<12}  "
+                      f"{tender['标题']}  [{tender['招标公司']}]  {tender['详情链接']}")
+            print(f"\n共 {len(results)} 条（索引共 {len(index)} 条），耗时 {elapsed:.1f} 毫秒")
+        else:
+            for file_path in args.files:
+                added = index.import_csv(file_path)
+                print(f"✅ {file_path}: 新索引 {added} 条")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
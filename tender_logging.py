@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫日志与计数
+功能：
+- 队列日志：抓取线程只把日志记录放入队列，格式化与写文件在后台监听线程中进行
+- 按消息类型采样：logger.info(..., extra={'kind': 'fetch'}) 这类高频消息每 N 条只记录 1 条，
+  被丢弃的记录不会进入队列
+- CrawlMetrics：线程安全的结构化计数（页数、条数、字节数、请求耗时、解析耗时），
+  用于每页输出一行汇总，代替逐条输出
+"""
+
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 默认采样率：消息类型 -> 每多少条记录 1 条
+DEFAULT_SAMPLE_RATES = {
+    'fetch': 20,
+    'item': 100,
+}
+
+
+class SamplingFilter(logging.Filter):
+    """按消息类型（日志记录的 kind 属性）采样，未设置 kind 的消息全部保留"""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(DEFAULT_SAMPLE_RATES if rates is None else rates)
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, 'kind', None))
+        if not rate or rate <= 1:
+            return True
+        with self.lock:
+            count = self.counts.get(record.kind, 0)
+            self.counts[record.kind] = count + 1
+        return count % rate == 0
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    进程内队列处理器
+    标准 QueueHandler.prepare 会在调用线程中格式化消息（为了能跨进程传递），
+    这里监听线程与调用方在同一进程，直接传递原始记录，把格式化留给监听线程
+    """
+
+    def __init__(self, log_queue, listener=None):
+        super().__init__(log_queue)
+        self.listener = listener
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(log_file='tender_spider.log', level=logging.INFO, sample_rates=None, logger=None):
+    """
+    配置队列日志，可重复调用：目标 Logger 已经配置过队列日志时直接返回已有的监听器
+    参数:
+        log_file - 日志文件路径
+        level - 日志级别
+        sample_rates - 按消息类型的采样率，默认 DEFAULT_SAMPLE_RATES
+        logger - 要配置的 Logger，默认为根 Logger
+    返回: QueueListener，进程退出时会自动停止并写完剩余日志
+    """
+    target = logger or logging.getLogger()
+    for handler in target.handlers:
+        if isinstance(handler, _InProcessQueueHandler):
+            return handler.listener
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    queue_handler = _InProcessQueueHandler(log_queue, listener)
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    target.setLevel(level)
+    target.addHandler(queue_handler)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class CrawlMetrics:
+    """抓取过程的结构化计数，多个线程可同时记录"""
+
+    FIELDS = ('pages', 'items', 'empty_titles', 'requests', 'failures',
+              'bytes', 'fetch_seconds', 'max_fetch_seconds', 'parse_seconds')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            for field in self.FIELDS:
+                setattr(self, field, 0)
+
+    def record_fetch(self, nbytes, seconds, ok=True):
+        """记录一次请求：响应字节数与耗时"""
+        with self.lock:
+            self.requests += 1
+            self.bytes += nbytes
+            self.fetch_seconds += seconds
+            self.max_fetch_seconds = max(self.max_fetch_seconds, seconds)
+            if not ok:
+                self.failures += 1
+
+    def record_parse(self, items, empty_titles, seconds):
+        """记录一次列表页解析：项目数、标题为空的项目数与耗时"""
+        with self.lock:
+            self.pages += 1
+            self.items += items
+            self.empty_titles += empty_titles
+            self.parse_seconds += seconds
+
+    def snapshot(self):
+        """返回当前计数的字典"""
+        with self.lock:
+            return {field: getattr(self, field) for field in self.FIELDS}
+
+    def since(self, before):
+        """
+        返回从 before（snapshot() 的结果）到现在的增量
+        max_fetch_seconds 无法做差，返回的是累计最大值
+        """
+        now = self.snapshot()
+        delta = {field: now[field] - before[field] for field in self.FIELDS}
+        delta['max_fetch_seconds'] = now['max_fetch_seconds']
+        return delta
+
+    @staticmethod
+    def format(counts):
+        """将计数格式化为一行汇总"""
+        avg_fetch = counts['fetch_seconds'] / counts['requests'] if counts['requests'] else 0.0
+        return (f"项目 {counts['items']} 条（空标题 {counts['empty_titles']}），"
+                f"请求 {counts['requests']} 次（失败 {counts['failures']}），"
+                f"{counts['bytes'] / 1024:.1f} KB，平均请求 {avg_fetch * 1000:.0f} 毫秒，"
+                f"解析 {counts['parse_seconds'] * 1000:.1f} 毫秒")
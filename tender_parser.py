@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+招投标列表页解析引擎
+功能：为 TenderSpider.parse_list_page 提供可插拔的解析后端
+- LxmlParser：基于 lxml（C 实现）与预编译的 XPath，默认后端
+- SoupParser：原有的 BeautifulSoup + html.parser 实现，未安装 lxml 时使用
+- ExtractionProfile：按网站配置的提取规则，新增网站只需新增一个配置
+
+基准测试（对保存下来的列表页比较两个后端的单页解析耗时）：
+    python tender_parser.py saved_page1.html saved_page2.html
+"""
+
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from tender_fields import fill_from_text
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = None
+
+FIELDS = ['标题', '招标公司', '预算金额', '截止日期', '详情链接']
+
+
+def _class_contains(*words):
+    """生成 XPath 条件：class 属性包含任一关键字"""
+    return ' or '.join(f"contains(@class, '{w}')" for w in words)
+
+
+def _class_token(*tokens):
+    """生成 XPath 条件：class 属性中含有任一完整的类名"""
+    return ' or '.join(f"contains(concat(' ', normalize-space(@class), ' '), ' {t} ')" for t in tokens)
+
+
+class ExtractionProfile:
+    """
+    网站提取规则
+
+    item_xpaths 依次尝试，第一个有结果的表达式决定招标项目列表；
+    field_xpaths 为相对于单个项目的表达式，取第一个匹配元素的文本，
+    link_xpath 取第一个匹配的链接地址。
+    """
+
+    def __init__(self, name, item_xpaths, field_xpaths, link_xpath):
+        self.name = name
+        self.item_xpaths = item_xpaths
+        self.field_xpaths = field_xpaths
+        self.link_xpath = link_xpath
+
+
+# yfbzb.com 的规则，与原 BeautifulSoup 版本的选择器一一对应
+YFBZB_PROFILE = ExtractionProfile(
+    name='yfbzb',
+    item_xpaths=[
+        f"//div[{_class_token('tender-item', 'list-item')}]",
+        f"//li[{_class_token('tender', 'item')}]",
+        f"//div[{_class_contains('tender', 'item')}]",
+    ],
+    field_xpaths={
+        '标题': f"(.//*[self::h3 or self::h4 or self::a][{_class_contains('title', 'name')}])[1]",
+        '招标公司': f"(.//*[self::div or self::span][{_class_contains('company', 'org')}])[1]",
+        '预算金额': f"(.//*[self::div or self::span][{_class_contains('budget', 'amount', 'price')}])[1]",
+        '截止日期': f"(.//*[self::div or self::span][{_class_contains('deadline', 'end', 'date')}])[1]",
+    },
+    link_xpath="(.//a[@href])[1]/@href",
+)
+
+PROFILES = {
+    YFBZB_PROFILE.name: YFBZB_PROFILE,
+}
+
+
+class LxmlParser:
+    """基于 lxml 与预编译 XPath 的解析后端"""
+
+    name = 'lxml'
+
+    def __init__(self, profile=YFBZB_PROFILE):
+        if etree is None:
+            raise ImportError("LxmlParser 需要安装 lxml")
+        self.profile = profile
+        # XPath 只在构造时编译一次，之后每个页面、每个项目直接复用
+        self.item_xpaths = [etree.XPath(x) for x in profile.item_xpaths]
+        self.field_xpaths = [(field, etree.XPath(x)) for field, x in profile.field_xpaths.items()]
+        self.link_xpath = etree.XPath(profile.link_xpath)
+
+    @staticmethod
+    def _text(element):
+        # 与 BeautifulSoup 的 get_text(strip=True) 一致：各段文本去空白后直接拼接
+        return ''.join(s.strip() for s in element.itertext())
+
+    def extract(self, html, base_url):
+        """
+        解析列表页
+        参数:
+            html - 页面HTML内容
+            base_url - 用于补全相对链接
+        返回: 招标信息字典列表
+        """
+        root = lxml_html.document_fromstring(html)
+        items = []
+        for xpath in self.item_xpaths:
+            items = xpath(root)
+            if items:
+                break
+
+        text = self._text
+        tender_list = []
+        for item in items:
+            tender = {}
+            for field, xpath in self.field_xpaths:
+                found = xpath(item)
+                tender[field] = text(found[0]) if found else ""
+            link = self.link_xpath(item)
+            tender['详情链接'] = urljoin(base_url, link[0]) if link else ""
+            # 某些字段未找到时，按标签从项目全文中提取
+            if not (tender['招标公司'] and tender['预算金额'] and tender['截止日期']):
+                fill_from_text(tender, ' '.join(s.strip() for s in item.itertext() if s.strip()))
+            tender_list.append({field: tender[field] for field in FIELDS})
+        return tender_list
+
+
+class SoupParser:
+    """原有的 BeautifulSoup + html.parser 解析后端"""
+
+    name = 'soup'
+
+    def extract(self, html, base_url):
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # 分析页面结构，找到招标信息列表
+        # 注意：网站结构可能会变化，需要根据实际情况调整选择器
+        tender_items = soup.find_all('div', class_=['tender-item', 'list-item'])
+
+        if not tender_items:
+            # 尝试其他可能的选择器
+            tender_items = soup.find_all('li', class_=['tender', 'item'])
+
+        if not tender_items:
+            # 尝试查找包含招标信息的其他元素
+            tender_items = soup.find_all('div', class_=lambda x: x and ('tender' in x or 'item' in x))
+
+        tender_list = []
+        for item in tender_items:
+            # 提取标题
+            title_elem = item.find(['h3', 'h4', 'a'], class_=lambda x: x and ('title' in x or 'name' in x))
+            title = title_elem.get_text(strip=True) if title_elem else ""
+
+            # 提取详情链接
+            link_elem = item.find('a', href=True)
+            link = urljoin(base_url, link_elem['href']) if link_elem else ""
+
+            # 提取招标公司
+            company_elem = item.find(['div', 'span'], class_=lambda x: x and ('company' in x or 'org' in x))
+            company = company_elem.get_text(strip=True) if company_elem else ""
+
+            # 提取预算金额
+            budget_elem = item.find(['div', 'span'], class_=lambda x: x and ('budget' in x or 'amount' in x or 'price' in x))
+            budget = budget_elem.get_text(strip=True) if budget_elem else ""
+
+            # 提取截止日期
+            deadline_elem = item.find(['div', 'span'], class_=lambda x: x and ('deadline' in x or 'end' in x or 'date' in x))
+            deadline = deadline_elem.get_text(strip=True) if deadline_elem else ""
+
+            tender = {
+                '标题': title,
+                '招标公司': company,
+                '预算金额': budget,
+                '截止日期': deadline,
+                '详情链接': link
+            }
+
+            # 如果某些字段未找到，按标签从项目全文中提取
+            if not company or not budget or not deadline:
+                fill_from_text(tender, item.get_text(' ', strip=True))
+
+            tender_list.append(tender)
+        return tender_list
+
+
+def create_parser(backend=None, profile='yfbzb'):
+    """
+    创建解析后端
+    参数:
+        backend - 'lxml'、'soup' 或 None（有 lxml 时用 lxml，否则用 soup）
+        profile - 网站提取规则名称，仅 lxml 后端使用
+    返回: 解析后端对象
+    """
+    if backend is None:
+        backend = 'lxml' if etree is not None else 'soup'
+    if backend == 'lxml':
+        return LxmlParser(PROFILES[profile])
+    if backend == 'soup':
+        return SoupParser()
+    raise ValueError(f"未知的解析后端: {backend}")
+
+
+def benchmark(pages, base_url='https://www.yfbzb.com/', repeat=5):
+    """
+    比较各解析后端的单页解析耗时
+    参数:
+        pages - HTML 字符串列表
+        base_url - 用于补全链接
+        repeat - 每个页面重复解析的次数
+    返回: {后端名称: 平均每页毫秒数}
+    """
+    backends = [SoupParser()]
+    if etree is not None:
+        backends.append(LxmlParser())
+
+    results = {}
+    outputs = {}
+    for parser in backends:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outputs[parser.name] = [parser.extract(page, base_url) for page in pages]
+        results[parser.name] = (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+    if len(outputs) > 1 and outputs['lxml'] != outputs['soup']:
+        print("⚠️  两个后端的解析结果不一致")
+    return results
+
+
+def main():
+    """基准测试入口"""
+    import sys
+
+    files = sys.argv[1:]
+    if not files:
+        print("用法: python tender_parser.py 保存的列表页.html [...]")
+        return
+
+    pages = []
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            pages.append(f.read())
+
+    for name, ms in benchmark(pages).items():
+        print(f"{name:>5}: {ms:8.2f} 毫秒/页")
+
+
+if __name__ == "__main__":
+    main()
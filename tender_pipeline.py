@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+招投标详情页补全流水线
+功能：列表页解析出的详情链接经有界队列交给两组独立的工作线程
+- 列表阶段：逐页抓取并解析列表页，把招标项目放入抓取队列
+- 抓取阶段：fetch_workers 个线程下载详情页（按主机限速）
+- 解析阶段：parse_workers 个线程解析详情页，补全预算金额与截止日期
+队列有容量上限，下游处理不过来时上游会阻塞等待（背压），内存占用有界；
+每个阶段分别统计吞吐量、忙碌时间与等待下游的时间，便于分别调整两组线程数
+"""
+
+import queue
+import threading
+import time
+
+from tender_async import HostSchedule
+from tender_fields import normalize_tender
+from tender_logging import setup_logging
+from tender_sink import CsvSink
+from tender_spider import TenderSpider, logger
+
+# 通知工作线程退出的哨兵
+_STOP = object()
+
+
+class StageStats:
+    """单个阶段的统计：处理条数、忙碌时间、因下游队列已满而阻塞的时间"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, busy, blocked=0.0, error=False):
+        with self.lock:
+            self.items += 1
+            self.busy += busy
+            self.blocked += blocked
+            if error:
+                self.errors += 1
+
+    def summary(self, elapsed):
+        """
+        参数: elapsed - 流水线总耗时（秒）
+        返回: 统计字典，utilization 为工作线程忙碌时间占比
+        """
+        capacity = elapsed * self.workers
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items': self.items,
+            'errors': self.errors,
+            'items_per_sec': self.items / elapsed if elapsed else 0.0,
+            'utilization': self.busy / capacity if capacity else 0.0,
+            'blocked_sec': self.blocked,
+        }
+
+
+class ThreadRateLimiter:
+    """按主机的请求速率限制器（线程版），时间片的计算与异步版共用 HostSchedule"""
+
+    def __init__(self, rate=2.0):
+        self.schedule = HostSchedule(rate)
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        # 锁只在预约期间持有，等待在锁外进行
+        with self.lock:
+            delay = self.schedule.reserve(url, time.monotonic())
+        if delay > 0:
+            time.sleep(delay)
+
+
+class DetailPipeline:
+    """列表页 -> 详情页抓取 -> 详情页解析 的分阶段流水线"""
+
+    def __init__(self, spider=None, fetch_workers=4, parse_workers=2, queue_size=64, rate=2.0):
+        """
+        参数:
+            spider - TenderSpider 实例，负责页面请求与解析
+            fetch_workers - 详情页抓取线程数（受网络延迟限制，可以多开）
+            parse_workers - 详情页解析线程数（受 CPU 限制）
+            queue_size - 每个队列的容量上限
+            rate - 每个主机每秒的详情页请求数上限，0 表示不限速
+        """
+        self.spider = spider or TenderSpider()
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.limiter = ThreadRateLimiter(rate)
+
+        # 连接池容纳所有抓取线程和列表阶段，避免线程之间等待连接
+        self.spider.mount_adapter(fetch_workers + 1)
+
+        self.stats = {}
+        self.elapsed = 0.0
+
+    @staticmethod
+    def needs_detail(tender):
+        """列表页已经给出预算金额和截止日期的项目不必再抓取详情页"""
+        return bool(tender.get('详情链接')) and not (tender.get('预算金额') and tender.get('截止日期'))
+
+    @staticmethod
+    def _put(q, item):
+        """放入队列并返回阻塞等待的时间"""
+        start = time.perf_counter()
+        q.put(item)
+        return time.perf_counter() - start
+
+    def _list_stage(self, start_page, end_page, seen_index, fetch_queue, parse_queue):
+        stats = self.stats['list']
+        index = 0
+        pages = self.spider.iter_pages(start_page, end_page, seen_index)
+        while True:
+            start = time.perf_counter()
+            try:
+                page, tender_list = next(pages)
+            except StopIteration:
+                break
+            busy = time.perf_counter() - start
+            blocked = 0.0
+            for tender in tender_list:
+                if self.needs_detail(tender):
+                    blocked += self._put(fetch_queue, (index, tender))
+                else:
+                    # 不需要详情页的项目直接交给解析阶段，保持输出完整
+                    blocked += self._put(parse_queue, (index, tender, None))
+                index += 1
+            stats.record(busy, blocked)
+
+    def _fetch_worker(self, fetch_queue, parse_queue):
+        stats = self.stats['fetch']
+        while True:
+            job = fetch_queue.get()
+            if job is _STOP:
+                break
+            index, tender = job
+            link = tender['详情链接']
+            self.limiter.acquire(link)
+            start = time.perf_counter()
+            html = self.spider.fetch(link)
+            busy = time.perf_counter() - start
+            blocked = self._put(parse_queue, (index, tender, html))
+            stats.record(busy, blocked, error=html is None)
+
+    def _parse_worker(self, parse_queue, consume):
+        stats = self.stats['parse']
+        while True:
+            job = parse_queue.get()
+            if job is _STOP:
+                break
+            index, tender, html = job
+            start = time.perf_counter()
+            error = False
+            if html:
+                try:
+                    for field, value in self.spider.parse_detail_page(html).items():
+                        if not tender.get(field):
+                            tender[field] = value
+                    normalize_tender(tender)
+                except Exception as e:
+                    logger.error(f"解析详情页失败: {tender.get('详情链接')}, 错误: {str(e)}")
+                    error = True
+            busy = time.perf_counter() - start
+            try:
+                consume(index, tender)
+            except Exception as e:
+                # 输出失败也要继续取队列，否则上游会一直阻塞
+                logger.error(f"写出招标信息失败: {tender.get('详情链接')}, 错误: {str(e)}")
+                error = True
+            stats.record(busy, error=error)
+
+    def _run(self, start_page, end_page, seen_index, consume):
+        """运行流水线，每个补全后的项目调用一次 consume(序号, 项目)（在解析线程中调用）"""
+        self.stats = {
+            'list': StageStats('list', 1),
+            'fetch': StageStats('fetch', self.fetch_workers),
+            'parse': StageStats('parse', self.parse_workers),
+        }
+        fetch_queue = queue.Queue(self.queue_size)
+        parse_queue = queue.Queue(self.queue_size)
+
+        fetchers = [threading.Thread(target=self._fetch_worker, args=(fetch_queue, parse_queue), daemon=True)
+                    for _ in range(self.fetch_workers)]
+        parsers = [threading.Thread(target=self._parse_worker, args=(parse_queue, consume), daemon=True)
+                   for _ in range(self.parse_workers)]
+
+        start = time.perf_counter()
+        for thread in fetchers + parsers:
+            thread.start()
+        try:
+            # 列表阶段在当前线程中运行
+            self._list_stage(start_page, end_page, seen_index, fetch_queue, parse_queue)
+        finally:
+            # 上游全部结束后再通知下游退出，队列中剩余的项目仍会被处理完
+            for _ in fetchers:
+                fetch_queue.put(_STOP)
+            for thread in fetchers:
+                thread.join()
+            for _ in parsers:
+                parse_queue.put(_STOP)
+            for thread in parsers:
+                thread.join()
+            self.elapsed = time.perf_counter() - start
+
+        for row in self.report():
+            logger.info(f"阶段 {row['stage']:<5} 线程 {row['workers']:>2}, 处理 {row['items']} 条, "
+                        f"{row['items_per_sec']:.1f} 条/秒, 利用率 {row['utilization']:.0%}, "
+                        f"失败 {row['errors']}, 等待下游 {row['blocked_sec']:.2f} 秒")
+
+    def run(self, start_page=1, end_page=5, seen_index=None):
+        """
+        运行流水线并收集结果
+        参数:
+            start_page - 起始页码
+            end_page - 结束页码
+            seen_index - 已抓取项目索引，提供时只处理新项目，结束后标记为已抓取
+        返回: 补全后的招标信息列表，按列表页顺序
+        """
+        results = {}
+        lock = threading.Lock()
+
+        def consume(index, tender):
+            with lock:
+                results[index] = tender
+
+        self._run(start_page, end_page, seen_index, consume)
+        tender_list = [results[i] for i in sorted(results)]
+        if seen_index is not None and tender_list:
+            seen_index.mark_seen(tender_list)
+        return tender_list
+
+    def run_streaming(self, start_page=1, end_page=5, sinks=None, seen_index=None, batch_size=50):
+        """
+        运行流水线，补全后的项目按批写入输出，不在内存中累积
+        参数:
+            sinks - 输出列表（tender_sink 中的 CsvSink / SqliteSink / ParquetSink）
+            batch_size - 每批写出的条数
+        返回: 写出的招标信息条数（写出顺序为完成顺序）
+        """
+        if sinks is None:
+            sinks = [CsvSink()]
+
+        batch = []
+        written = [0]
+        lock = threading.Lock()
+
+        def flush():
+            for sink in sinks:
+                sink.write(batch)
+            # 写出成功后再标记为已抓取
+            if seen_index is not None:
+                seen_index.mark_seen(batch)
+            written[0] += len(batch)
+            batch.clear()
+
+        def consume(index, tender):
+            with lock:
+                batch.append(tender)
+                if len(batch) >= batch_size:
+                    flush()
+
+        try:
+            self._run(start_page, end_page, seen_index, consume)
+            if batch:
+                flush()
+        finally:
+            for sink in sinks:
+                sink.close()
+        return written[0]
+
+    def report(self):
+        """返回各阶段的统计字典列表"""
+        return [stats.summary(self.elapsed) for stats in self.stats.values()]
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='抓取列表页并并发补全详情页字段')
+    parser.add_argument('--start-page', type=int, default=1)
+    parser.add_argument('--end-page', type=int, default=5)
+    parser.add_argument('--fetch-workers', type=int, default=4, help='详情页抓取线程数')
+    parser.add_argument('--parse-workers', type=int, default=2, help='详情页解析线程数')
+    parser.add_argument('--queue-size', type=int, default=64, help='队列容量上限')
+    parser.add_argument('--rate', type=float, default=2.0, help='每个主机每秒的详情页请求数')
+    parser.add_argument('--output', default='tender_info.csv', help='输出CSV文件')
+    args = parser.parse_args()
+
+    setup_logging('tender_spider.log')
+    logger.info("开始执行招投标详情页补全流水线")
+    pipeline = DetailPipeline(fetch_workers=args.fetch_workers, parse_workers=args.parse_workers,
+                              queue_size=args.queue_size, rate=args.rate)
+    count = pipeline.run_streaming(args.start_page, args.end_page, sinks=[CsvSink(args.output)])
+    logger.info(f"流水线执行完成，共写出 {count} 条招标信息")
+
+
+if __name__ == "__main__":
+    main()
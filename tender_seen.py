@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+招投标信息去重索引
+功能：持久化记录已经抓取过的招标项目，支持增量抓取
+- 以规范化后的详情链接为键，保存在本地 SQLite 中
+- 可选的布隆过滤器放在前面，对绝大多数新链接免去一次数据库查询
+- 配合 TenderSpider.crawl(seen_index=...) 使用：只输出新项目，
+  遇到整页都是已抓取项目时停止翻页
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 规范化时去掉的跟踪参数（按完整参数名匹配，source_id、fromDate 之类的业务参数不受影响）
+TRACKING_PARAMS = frozenset({'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                             'spm', 'from', 'source'})
+
+# 一条 IN (...) 查询中的键数上限，低于 SQLite 绑定参数数量的限制（旧版本为 999）
+QUERY_CHUNK = 500
+
+
+def normalize_link(url):
+    """
+    规范化详情链接：协议与主机小写、去掉锚点和跟踪参数、查询参数排序、去掉末尾斜杠
+    参数: url - 详情链接
+    返回: 规范化后的链接
+    """
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+
+def tender_key(tender):
+    """
+    计算招标项目的去重键
+    有详情链接时使用规范化链接，否则退回使用 标题+招标公司
+    返回: 16 字节的摘要
+    """
+    link = tender.get('详情链接')
+    if link:
+        text = normalize_link(link)
+    else:
+        text = f"{tender.get('标题', '')}|{tender.get('招标公司', '')}"
+    return hashlib.sha1(text.encode('utf-8')).digest()[:16]
+
+
+class BloomFilter:
+    """简单的布隆过滤器，位数组保存在文件中"""
+
+    def __init__(self, path, capacity=1000000, hashes=7):
+        """
+        参数:
+            path - 位数组文件路径
+            capacity - 预计元素数量，每个元素约 10 位，误判率约 1%
+            hashes - 哈希函数个数
+        """
+        self.path = path
+        self.size = capacity * 10
+        self.hashes = hashes
+        self.bits = bytearray((self.size + 7) // 8)
+        self.loaded = os.path.exists(path) and os.path.getsize(path) == len(self.bits)
+        if self.loaded:
+            with open(path, 'rb') as f:
+                self.bits = bytearray(f.read())
+        self.dirty = False
+
+    def _positions(self, key):
+        # 双重哈希：由摘要的前后两段导出 k 个位置
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.dirty = True
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.bits)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class SeenIndex:
+    """已抓取项目的持久化索引"""
+
+    def __init__(self, db_path='tender_seen.db', use_bloom=False, bloom_capacity=1000000):
+        """
+        参数:
+            db_path - SQLite 数据库路径
+            use_bloom - 是否启用布隆过滤器（历史数据很大时建议开启）
+            bloom_capacity - 布隆过滤器的预计容量
+        """
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS seen (key BLOB PRIMARY KEY, first_seen REAL) WITHOUT ROWID')
+        self.bloom = None
+        if use_bloom:
+            self.bloom = BloomFilter(db_path + '.bloom', bloom_capacity)
+            # 位数组文件不存在或容量变化时，从数据库重建
+            if not self.bloom.loaded:
+                for (key,) in self.conn.execute('SELECT key FROM seen'):
+                    self.bloom.add(key)
+                self.bloom.save()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def _seen_keys(self, keys):
+        """返回 keys 中已经存在的键集合"""
+        candidates = keys
+        if self.bloom is not None:
+            # 布隆过滤器判定不存在的键一定是新的，不必查询数据库
+            candidates = [k for k in keys if k in self.bloom]
+        seen = set()
+        for start in range(0, len(candidates), QUERY_CHUNK):
+            chunk = candidates[start:start + QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f'SELECT key FROM seen WHERE key IN ({placeholders})', chunk)
+            seen.update(row[0] for row in rows)
+        return seen
+
+    def filter_new(self, tender_list):
+        """
+        过滤出尚未抓取过的项目（不会将其标记为已抓取）
+        参数: tender_list - 招标信息列表
+        返回: 新项目列表（同一页内重复的项目只保留第一条）
+        """
+        keys = [tender_key(t) for t in tender_list]
+        seen = self._seen_keys(list(set(keys)))
+        new_list = []
+        for key, tender in zip(keys, tender_list):
+            if key not in seen:
+                seen.add(key)
+                new_list.append(tender)
+        return new_list
+
+    def mark_seen(self, tender_list):
+        """将项目标记为已抓取"""
+        now = time.time()
+        keys = [tender_key(t) for t in tender_list]
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO seen VALUES (?, ?)', [(k, now) for k in keys])
+        if self.bloom is not None:
+            for key in keys:
+                self.bloom.add(key)
+            self.bloom.save()
+
+    def close(self):
+        if self.bloom is not None:
+            self.bloom.save()
+        self.conn.close()
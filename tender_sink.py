@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+招投标信息流式输出
+功能：配合 TenderSpider.crawl_streaming 使用，每解析完一页就立即写出
+- CsvSink：追加写入 CSV，每页落盘一次
+- SqliteSink：写入 SQLite，以去重键（规范化详情链接，无链接时为 标题+招标公司）去重
+- ParquetSink：每页写一个行组（需要 pyarrow）
+- Checkpoint：记录最后完成的页码，重启后从下一页继续
+内存占用只与单页数据量有关，与抓取总页数无关
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from tender_fields import AMOUNT_FIELD, DATE_FIELD
+from tender_seen import tender_key
+
+FIELDS = ['标题', '招标公司', '预算金额', '截止日期', '详情链接', AMOUNT_FIELD, DATE_FIELD]
+
+# 非文本字段的类型，其余字段均为文本
+NUMERIC_FIELDS = {AMOUNT_FIELD}
+
+
+class CsvSink:
+    """追加写入的 CSV 输出"""
+
+    def __init__(self, filename='tender_info.csv', fields=FIELDS):
+        self.filename = filename
+        self.fields = fields
+        write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        # 只有新文件才写 BOM，追加时不能在文件中间插入 BOM
+        self.file = open(filename, 'a', newline='', encoding='utf-8-sig' if write_header else 'utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=fields, extrasaction='ignore')
+        if write_header:
+            self.writer.writeheader()
+
+    def write(self, tender_list):
+        self.writer.writerows(tender_list)
+        # 每页都落盘，崩溃时最多丢失正在处理的一页
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class SqliteSink:
+    """
+    SQLite 输出，同一招标项目只保存一次
+    唯一索引建在 tender_seen.tender_key 计算的去重键上，没有详情链接的项目按 标题+招标公司 去重，
+    不会因为链接同为空而被当作重复项丢弃
+    """
+
+    def __init__(self, db_path='tender_info.db', fields=FIELDS):
+        self.fields = fields
+        self.conn = sqlite3.connect(db_path)
+        columns = ', '.join(f'"{f}" {"REAL" if f in NUMERIC_FIELDS else "TEXT"}' for f in fields)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS tenders ({columns}, "抓取时间" REAL, "去重键" BLOB UNIQUE)')
+        placeholders = ', '.join('?' * (len(fields) + 2))
+        self.insert_sql = f'INSERT OR IGNORE INTO tenders VALUES ({placeholders})'
+
+    def write(self, tender_list):
+        now = time.time()
+        rows = [tuple(t.get(f) for f in self.fields) + (now, tender_key(t)) for t in tender_list]
+        with self.conn:
+            self.conn.executemany(self.insert_sql, rows)
+
+    def close(self):
+        self.conn.close()
+
+
+class ParquetSink:
+    """
+    Parquet 输出，每页写一个行组
+    Parquet 文件无法追加，每次运行在目录下写一个新的分片文件
+    """
+
+    def __init__(self, directory='tender_parquet', fields=FIELDS):
+        if pa is None:
+            raise ImportError("ParquetSink 需要安装 pyarrow")
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.fields = fields
+        self.schema = pa.schema([(f, pa.float64() if f in NUMERIC_FIELDS else pa.string()) for f in fields])
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        index = 0
+        while os.path.exists(os.path.join(directory, f"part-{stamp}-{index:03d}.parquet")):
+            index += 1
+        self.path = os.path.join(directory, f"part-{stamp}-{index:03d}.parquet")
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+
+    def write(self, tender_list):
+        if not tender_list:
+            return
+        columns = {f: [t.get(f) for t in tender_list] for f in self.fields}
+        self.writer.write_table(pa.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class Checkpoint:
+    """抓取进度检查点"""
+
+    def __init__(self, path='tender_checkpoint.json'):
+        self.path = path
+
+    def load(self, start_page, end_page):
+        """
+        读取同一抓取范围内未完成的进度
+        返回: 应当开始抓取的页码
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return start_page
+        if state.get('start_page') != start_page or state.get('end_page') != end_page or state.get('finished'):
+            return start_page
+        return state['last_page'] + 1
+
+    def save(self, start_page, end_page, last_page, rows, finished=False):
+        state = {
+            'start_page': start_page,
+            'end_page': end_page,
+            'last_page': last_page,
+            'rows': rows,
+            'finished': finished,
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        # 先写临时文件再改名，保证检查点文件始终完整
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def rows(self):
+        """返回检查点中已写出的行数"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('rows', 0)
+        except (OSError, ValueError):
+            return 0
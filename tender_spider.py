@@ -4,7 +4,7 @@
 招投标信息爬虫
 目标网站：https://www.yfbzb.com/
 功能：抓取招标标题、招标公司、预算金额、截止日期、项目详情链接
-技术：使用requests和BeautifulSoup
+技术：使用requests，页面解析使用lxml（未安装时使用BeautifulSoup）
 """
 
 import requests
@@ -12,26 +12,47 @@ from bs4 import BeautifulSoup
 import csv
 import time
 import random
+import re
+import os
 import logging
-from urllib.parse import urljoin
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+from http_cache import CachingAdapter
+from tender_parser import create_parser
+from tender_seen import SeenIndex
+from tender_fields import normalize_page
+from tender_logging import CrawlMetrics, setup_logging
+from tender_index import TenderIndex
+from tender_sink import FIELDS, Checkpoint, CsvSink
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('tender_spider.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# 详情页中"预算金额：xxx"、"截止时间：xxx"之类的字段
+DETAIL_BUDGET_PATTERN = re.compile(r'(?:预算金额|预算|最高限价|控制价)\s*[:：]\s*([^\s，,；;]+)')
+DETAIL_DEADLINE_PATTERN = re.compile(r'(?:投标截止(?:时间|日期)?|截止(?:时间|日期))\s*[:：]\s*([^\s，,；;]+)')
+
 class TenderSpider:
     """招投标信息爬虫类"""
     
-    def __init__(self):
-        """初始化爬虫"""
-        self.base_url = "https://www.yfbzb.com/"
+    def __init__(self, base_url="https://www.yfbzb.com/", parser=None, cache_dir=None, polite=True):
+        """
+        初始化爬虫
+        参数:
+            base_url - 网站首页地址，测试时可指向本地服务器
+            parser - 列表页解析后端，默认由 tender_parser.create_parser() 选择
+            cache_dir - HTTP响应缓存目录，提供时启用磁盘缓存与条件请求
+            polite - 是否在请求之间随机等待，抓取本地测试服务器时可关闭
+        """
+        self.base_url = base_url
+        self.parser = parser or create_parser()
+        self.cache_dir = cache_dir
+        self.polite = polite
+        # 每个主机检测出的页面编码，编码检测只在每个主机第一次请求时进行
+        self.host_encodings = {}
+        # 请求数、字节数、耗时等计数，用于每页一行的汇总日志
+        self.metrics = CrawlMetrics()
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
@@ -41,6 +62,19 @@ class TenderSpider:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        self.mount_adapter()
+        
+    def mount_adapter(self, pool_size=10):
+        """
+        为会话挂载传输适配器，启用缓存时使用 CachingAdapter
+        参数: pool_size - 连接池大小
+        """
+        if self.cache_dir:
+            adapter = CachingAdapter(self.cache_dir, pool_connections=pool_size, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
     def get_page(self, url):
         """
@@ -48,21 +82,62 @@ class TenderSpider:
         参数: url - 页面URL
         返回: 页面HTML内容
         """
-        try:
-            # 随机延迟，避免被封
+        # 随机延迟，避免被封
+        if self.polite:
             delay = random.uniform(1, 3)
             logger.info(f"等待 {delay:.2f} 秒后请求页面")
             time.sleep(delay)
-            
+        return self.fetch(url)
+    
+    def fetch(self, url, raise_errors=False):
+        """
+        不加延迟地获取页面内容，限速由调用方负责
+        参数:
+            url - 页面URL
+            raise_errors - 为True时请求失败抛出异常（由调用方决定是否重试），否则记录日志并返回None
+        返回: 页面HTML内容，失败时返回None
+        """
+        start = time.perf_counter()
+        try:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()  # 检查响应状态
-            response.encoding = response.apparent_encoding  # 自动检测编码
-            logger.info(f"成功获取页面: {url}")
+            response.encoding = self._encoding(response)
+            self.metrics.record_fetch(len(response.content), time.perf_counter() - start)
+            logger.info(f"成功获取页面: {url}", extra={'kind': 'fetch'})
             return response.text
         except requests.exceptions.RequestException as e:
+            self.metrics.record_fetch(0, time.perf_counter() - start, ok=False)
+            if raise_errors:
+                raise
             logger.error(f"获取页面失败: {url}, 错误: {str(e)}")
             return None
     
+    def _encoding(self, response):
+        """
+        确定页面编码：响应头声明了charset时直接使用，
+        否则每个主机只做一次全文编码检测，之后复用检测结果
+        """
+        content_type = response.headers.get('Content-Type', '')
+        if 'charset=' in content_type.lower():
+            return response.encoding
+        
+        host = urlparse(response.url).netloc
+        encoding = self.host_encodings.get(host)
+        if encoding is None:
+            encoding = response.apparent_encoding  # 自动检测编码
+            self.host_encodings[host] = encoding
+        return encoding
+    
+    def page_url(self, page):
+        """
+        构建分页URL
+        参数: page - 页码
+        返回: 页面URL
+        """
+        if page == 1:
+            return self.base_url
+        return f"{self.base_url}/list-{page}.html"  # 假设分页URL格式
+    
     def parse_list_page(self, html):
         """
         解析列表页面，提取招标信息
@@ -73,68 +148,18 @@ class TenderSpider:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            tender_list = []
-            
-            # 分析页面结构，找到招标信息列表
-            # 注意：网站结构可能会变化，需要根据实际情况调整选择器
-            tender_items = soup.find_all('div', class_=['tender-item', 'list-item'])
+            # 解析后端负责从页面中提取字段，默认使用 lxml 预编译 XPath
+            start = time.perf_counter()
+            tender_list = self.parser.extract(html, self.base_url)
+            # 预算金额换算为元、截止日期转换为 ISO 日期，便于筛选和排序
+            normalize_page(tender_list)
+            empty_titles = sum(1 for tender_info in tender_list if not tender_info['标题'])
+            self.metrics.record_parse(len(tender_list), empty_titles, time.perf_counter() - start)
             
-            if not tender_items:
-                # 尝试其他可能的选择器
-                tender_items = soup.find_all('li', class_=['tender', 'item'])
-            
-            if not tender_items:
-                # 尝试查找包含招标信息的其他元素
-                tender_items = soup.find_all('div', class_=lambda x: x and ('tender' in x or 'item' in x))
-            
-            logger.info(f"找到 {len(tender_items)} 个招标项目")
-            
-            for item in tender_items:
-                try:
-                    # 提取标题
-                    title_elem = item.find(['h3', 'h4', 'a'], class_=lambda x: x and ('title' in x or 'name' in x))
-                    title = title_elem.get_text(strip=True) if title_elem else ""
-                    
-                    # 提取详情链接
-                    link_elem = item.find('a', href=True)
-                    if link_elem:
-                        link = urljoin(self.base_url, link_elem['href'])
-                    else:
-                        link = ""
-                    
-                    # 提取招标公司
-                    company_elem = item.find(['div', 'span'], class_=lambda x: x and ('company' in x or 'org' in x))
-                    company = company_elem.get_text(strip=True) if company_elem else ""
-                    
-                    # 提取预算金额
-                    budget_elem = item.find(['div', 'span'], class_=lambda x: x and ('budget' in x or 'amount' in x or 'price' in x))
-                    budget = budget_elem.get_text(strip=True) if budget_elem else ""
-                    
-                    # 提取截止日期
-                    deadline_elem = item.find(['div', 'span'], class_=lambda x: x and ('deadline' in x or 'end' in x or 'date' in x))
-                    deadline = deadline_elem.get_text(strip=True) if deadline_elem else ""
-                    
-                    # 如果某些字段未找到，尝试从文本中提取
-                    if not company or not budget or not deadline:
-                        item_text = item.get_text(strip=True)
-                        # 这里可以添加正则表达式提取逻辑
-                        pass
-                    
-                    tender_info = {
-                        '标题': title,
-                        '招标公司': company,
-                        '预算金额': budget,
-                        '截止日期': deadline,
-                        '详情链接': link
-                    }
-                    
-                    tender_list.append(tender_info)
-                    logger.info(f"提取招标信息: {title}")
-                    
-                except Exception as e:
-                    logger.error(f"解析单个招标项目失败: {str(e)}")
-                    continue
+            # 逐条日志只在 DEBUG 级别输出并按类型采样，每页的汇总由 iter_pages 输出
+            if logger.isEnabledFor(logging.DEBUG):
+                for tender_info in tender_list:
+                    logger.debug(f"提取招标信息: {tender_info['标题']}", extra={'kind': 'item'})
             
             return tender_list
             
@@ -142,23 +167,45 @@ class TenderSpider:
             logger.error(f"解析列表页面失败: {str(e)}")
             return []
     
-    def save_to_csv(self, tender_list, filename='tender_info.csv'):
+    def parse_detail_page(self, html):
+        """
+        解析详情页面，提取列表页上经常缺失的预算金额和截止日期
+        参数: html - 详情页HTML内容
+        返回: 字段字典，只包含找到的字段
+        """
+        if not html:
+            return {}
+        
+        text = BeautifulSoup(html, 'html.parser').get_text(' ', strip=True)
+        fields = {}
+        budget = DETAIL_BUDGET_PATTERN.search(text)
+        if budget:
+            fields['预算金额'] = budget.group(1)
+        deadline = DETAIL_DEADLINE_PATTERN.search(text)
+        if deadline:
+            fields['截止日期'] = deadline.group(1)
+        return fields
+    
+    def save_to_csv(self, tender_list, filename='tender_info.csv', append=False):
         """
         将招标信息保存到CSV文件
         参数: 
             tender_list - 招标信息列表
             filename - 保存文件名
+            append - 是否追加到已有文件末尾（文件不存在时会写入表头）
         """
         if not tender_list:
             logger.warning("没有招标信息可保存")
             return
         
         try:
-            with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                fieldnames = ['标题', '招标公司', '预算金额', '截止日期', '详情链接']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            write_header = not append or not os.path.exists(filename) or os.path.getsize(filename) == 0
+            with open(filename, 'a' if append else 'w', newline='',
+                      encoding='utf-8-sig' if write_header else 'utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=FIELDS, extrasaction='ignore')
                 
-                writer.writeheader()
+                if write_header:
+                    writer.writeheader()
                 for tender in tender_list:
                     writer.writerow(tender)
             
@@ -166,23 +213,22 @@ class TenderSpider:
         except Exception as e:
             logger.error(f"保存CSV文件失败: {str(e)}")
     
-    def crawl(self, start_page=1, end_page=5):
+    def iter_pages(self, start_page=1, end_page=5, seen_index=None):
         """
-        执行爬虫，抓取多页数据
+        逐页抓取并解析，每解析完一页就返回该页的数据
         参数: 
             start_page - 起始页码
             end_page - 结束页码
+            seen_index - 已抓取项目索引（tender_seen.SeenIndex），提供时只返回新项目，
+                         并在某一页全部是已抓取项目时停止翻页（不会标记为已抓取）
+        返回: 生成器，依次产生 (页码, 招标信息列表)
         """
-        all_tender_list = []
-        
         for page in range(start_page, end_page + 1):
             logger.info(f"开始抓取第 {page} 页")
+            before = self.metrics.snapshot()
             
             # 构建分页URL
-            if page == 1:
-                page_url = self.base_url
-            else:
-                page_url = f"{self.base_url}/list-{page}.html"  # 假设分页URL格式
+            page_url = self.page_url(page)
             
             # 获取页面
             html = self.get_page(page_url)
@@ -192,33 +238,124 @@ class TenderSpider:
             
             # 解析页面
             tender_list = self.parse_list_page(html)
+            logger.info(f"第 {page} 页: {CrawlMetrics.format(self.metrics.since(before))}")
+            
+            # 增量抓取：过滤已抓取项目，整页都已抓取说明后面的页面也都抓过了
+            if seen_index is not None and tender_list:
+                new_list = seen_index.filter_new(tender_list)
+                logger.info(f"第 {page} 页新项目 {len(new_list)} / {len(tender_list)} 条")
+                if not new_list:
+                    logger.info(f"第 {page} 页全部为已抓取项目，停止翻页")
+                    break
+                tender_list = new_list
+            
+            yield page, tender_list
+            
+            # 每抓取一页后随机延迟
+            if self.polite and page < end_page:
+                time.sleep(random.uniform(2, 4))
+    
+    def crawl(self, start_page=1, end_page=5, seen_index=None):
+        """
+        执行爬虫，抓取多页数据，全部抓取完成后统一保存
+        参数: 
+            start_page - 起始页码
+            end_page - 结束页码
+            seen_index - 已抓取项目索引（tender_seen.SeenIndex），提供时进行增量抓取：
+                         只保留新项目，并在某一页全部是已抓取项目时停止翻页
+        """
+        all_tender_list = []
+        
+        for page, tender_list in self.iter_pages(start_page, end_page, seen_index):
             all_tender_list.extend(tender_list)
             
             # 显示进度
             progress = (page - start_page + 1) / (end_page - start_page + 1) * 100
             logger.info(f"进度: {progress:.1f}%, 已抓取: {len(all_tender_list)} 条")
-            
-            # 每抓取一页后随机延迟
-            time.sleep(random.uniform(2, 4))
         
         # 保存数据
         if all_tender_list:
-            self.save_to_csv(all_tender_list)
+            # 增量抓取时追加到已有文件，保留之前抓取的项目
+            self.save_to_csv(all_tender_list, append=seen_index is not None)
+            # 保存成功后再标记为已抓取，中途失败时下次仍会重新抓取
+            if seen_index is not None:
+                seen_index.mark_seen(all_tender_list)
         else:
             logger.warning("未抓取到任何招标信息")
         
+        logger.info(f"抓取统计: {CrawlMetrics.format(self.metrics.snapshot())}")
         return all_tender_list
+    
+    def crawl_streaming(self, start_page=1, end_page=5, sinks=None, checkpoint=None, seen_index=None):
+        """
+        流式抓取：每解析完一页就写入输出并记录进度，不在内存中累积数据
+        参数: 
+            start_page - 起始页码
+            end_page - 结束页码
+            sinks - 输出列表（tender_sink 中的 CsvSink / SqliteSink / ParquetSink），
+                    默认追加写入 tender_info.csv
+            checkpoint - 进度检查点（tender_sink.Checkpoint），提供时从上次完成的页码之后继续
+            seen_index - 已抓取项目索引，用法与 crawl 相同
+        返回: 本次写出的招标信息条数
+        """
+        if sinks is None:
+            sinks = [CsvSink()]
+        
+        first_page = start_page
+        total = 0
+        if checkpoint is not None:
+            first_page = checkpoint.load(start_page, end_page)
+            if first_page > start_page:
+                total = checkpoint.rows()
+                logger.info(f"从检查点恢复，从第 {first_page} 页继续")
+        
+        written = 0
+        try:
+            for page, tender_list in self.iter_pages(first_page, end_page, seen_index):
+                if tender_list:
+                    for sink in sinks:
+                        sink.write(tender_list)
+                    # 写出成功后再标记为已抓取，中途失败时下次仍会重新抓取
+                    if seen_index is not None:
+                        seen_index.mark_seen(tender_list)
+                written += len(tender_list)
+                if checkpoint is not None:
+                    checkpoint.save(start_page, end_page, page, total + written)
+                
+                # 显示进度
+                progress = (page - start_page + 1) / (end_page - start_page + 1) * 100
+                logger.info(f"进度: {progress:.1f}%, 已写出: {total + written} 条")
+            
+            if checkpoint is not None:
+                checkpoint.save(start_page, end_page, end_page, total + written, finished=True)
+        finally:
+            for sink in sinks:
+                sink.close()
+        
+        if not written:
+            logger.warning("未抓取到任何招标信息")
+        logger.info(f"抓取统计: {CrawlMetrics.format(self.metrics.snapshot())}")
+        return written
 
 def main():
     """主函数"""
+    # 配置日志：记录经队列交给后台线程写出，高频消息按类型采样
+    setup_logging('tender_spider.log')
     logger.info("开始执行招投标信息爬虫")
     
-    spider = TenderSpider()
+    spider = TenderSpider(cache_dir='http_cache')
+    seen_index = SeenIndex('tender_seen.db')
     
-    # 抓取前5页数据
-    tender_list = spider.crawl(start_page=1, end_page=5)
+    # 增量抓取前5页数据，每页解析完立即追加到CSV并更新全文索引，中断后从检查点继续
+    try:
+        count = spider.crawl_streaming(start_page=1, end_page=5,
+                                       sinks=[CsvSink('tender_info.csv'), TenderIndex('tender_index.db')],
+                                       checkpoint=Checkpoint('tender_checkpoint.json'),
+                                       seen_index=seen_index)
+    finally:
+        seen_index.close()
     
-    logger.info(f"爬虫执行完成，共抓取 {len(tender_list)} 条招标信息")
+    logger.info(f"爬虫执行完成，共抓取 {count} 条招标信息")
 
 if __name__ == "__main__":
     main()
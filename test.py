@@ -1,9 +1,9 @@
 import pygame
-import random
 import sys
 import time
 
-pygame.init()
+from render_cache import DirtyRectRenderer, TextCache, load_font
+from snake_sim import SnakeSim, UP, DOWN, LEFT, RIGHT
 
 WIDTH = 800
 HEIGHT = 600
@@ -16,70 +16,29 @@ WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("贪吃蛇游戏")
-pygame.mouse.set_visible(False)
-
-class Snake:
-    def __init__(self):
-        self.body = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
-        self.direction = (1, 0)
-        self.next_direction = (1, 0)
-
-    def move(self):
-        self.direction = self.next_direction
-        head_x, head_y = self.body[0]
-        dx, dy = self.direction
-        new_head = (head_x + dx, head_y + dy)
-        
-        self.body.insert(0, new_head)
-        self.body.pop()
-
-    def grow(self):
-        head_x, head_y = self.body[0]
-        dx, dy = self.direction
-        new_head = (head_x + dx, head_y + dy)
-        self.body.insert(0, new_head)
-
-    def check_collision(self):
-        head_x, head_y = self.body[0]
-        
-        if head_x < 0 or head_x >= GRID_WIDTH or head_y < 0 or head_y >= GRID_HEIGHT:
-            return True
-        
-        if (head_x, head_y) in self.body[1:]:
-            return True
-        
-        return False
-
-    def draw(self):
-        for segment in self.body:
-            x, y = segment
-            pygame.draw.rect(screen, GREEN, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-            pygame.draw.rect(screen, BLACK, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
-
-class Food:
-    def __init__(self):
-        self.position = self.generate_position()
-
-    def generate_position(self):
-        x = random.randint(0, GRID_WIDTH - 1)
-        y = random.randint(0, GRID_HEIGHT - 1)
-        return (x, y)
-
-    def draw(self):
-        x, y = self.position
-        pygame.draw.rect(screen, RED, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+KEY_DIRECTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
 
 class Game:
-    def __init__(self):
-        self.snake = Snake()
-        self.food = Food()
-        self.score = 0
-        self.game_over = False
-        self.default_move_interval = 0.5
-        self.move_interval = 0.5
+    def __init__(self, screen):
+        self.screen = screen
+        self.font = load_font(36, ("C:/Windows/Fonts/msyh.ttc",), "microsoftyahei")
+        self.text_cache = TextCache()
+        background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        background.fill(BLACK)
+        self.renderer = DirtyRectRenderer(screen, background)
+        self.reset()
+
+    def reset(self):
+        # 游戏规则在 snake_sim 中，与无界面模拟共用
+        self.sim = SnakeSim(GRID_WIDTH, GRID_HEIGHT)
         self.last_move_time = time.time()
+        # 上次绘制时的状态，状态不变时不重绘
+        self.drawn_state = None
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -87,69 +46,44 @@ class Game:
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    if self.snake.direction == (0, -1):
-                        self.move_interval = self.default_move_interval / 2
-                    elif self.snake.direction != (0, 1):
-                        self.snake.next_direction = (0, -1)
-                        self.move_interval = self.default_move_interval
-                elif event.key == pygame.K_DOWN:
-                    if self.snake.direction == (0, 1):
-                        self.move_interval = self.default_move_interval / 2
-                    elif self.snake.direction != (0, -1):
-                        self.snake.next_direction = (0, 1)
-                        self.move_interval = self.default_move_interval
-                elif event.key == pygame.K_LEFT:
-                    if self.snake.direction == (-1, 0):
-                        self.move_interval = self.default_move_interval / 2
-                    elif self.snake.direction != (1, 0):
-                        self.snake.next_direction = (-1, 0)
-                        self.move_interval = self.default_move_interval
-                elif event.key == pygame.K_RIGHT:
-                    if self.snake.direction == (1, 0):
-                        self.move_interval = self.default_move_interval / 2
-                    elif self.snake.direction != (-1, 0):
-                        self.snake.next_direction = (1, 0)
-                        self.move_interval = self.default_move_interval
-                elif event.key == pygame.K_r and self.game_over:
-                    self.__init__()
+                if event.key in KEY_DIRECTIONS:
+                    self.sim.turn(KEY_DIRECTIONS[event.key])
+                elif event.key == pygame.K_r and self.sim.game_over:
+                    self.reset()
 
     def update(self):
-        if not self.game_over:
+        if not self.sim.game_over:
             current_time = time.time()
-            if current_time - self.last_move_time >= self.move_interval:
-                self.snake.move()
+            if current_time - self.last_move_time >= self.sim.move_interval:
+                self.sim.step()
                 self.last_move_time = current_time
-                
-                if self.snake.check_collision():
-                    self.game_over = True
-                
-                if self.snake.body[0] == self.food.position:
-                    self.snake.grow()
-                    self.score += 10
-                    self.food.position = self.food.generate_position()
 
     def draw(self):
-        screen.fill(BLACK)
+        # 蛇每隔 move_interval 秒才移动一次，其余帧画面不变
+        state = (self.sim.ticks, self.sim.game_over)
+        if state == self.drawn_state:
+            return
+        self.drawn_state = state
         
-        self.snake.draw()
-        self.food.draw()
+        renderer = self.renderer
+        renderer.clear()
         
-        font_path = "C:/Windows/Fonts/msyh.ttc"
-        try:
-            font = pygame.font.Font(font_path, 36)
-        except:
-            font = pygame.font.SysFont("microsoftyahei", 36)
+        for x, y in self.sim.body:
+            renderer.add(pygame.draw.rect(self.screen, GREEN, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)))
+            pygame.draw.rect(self.screen, BLACK, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
         
-        score_text = font.render(f"得分: {self.score}", True, WHITE)
-        screen.blit(score_text, (10, 10))
+        x, y = self.sim.food
+        renderer.add(pygame.draw.rect(self.screen, RED, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)))
         
-        if self.game_over:
-            game_over_text = font.render("游戏结束! 按R键重新开始", True, WHITE)
+        score_text = self.text_cache.render(self.font, f"得分: {self.sim.score}", WHITE)
+        renderer.blit(score_text, (10, 10))
+        
+        if self.sim.game_over:
+            game_over_text = self.text_cache.render(self.font, "游戏结束! 按R键重新开始", WHITE)
             text_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-            screen.blit(game_over_text, text_rect)
+            renderer.blit(game_over_text, text_rect)
         
-        pygame.display.flip()
+        renderer.present()
 
     def run(self):
         while True:
@@ -158,6 +92,12 @@ class Game:
             self.draw()
             pygame.time.wait(10)
 
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("贪吃蛇游戏")
+    pygame.mouse.set_visible(False)
+    Game(screen).run()
+
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 测试从仓库根目录运行：根目录下的模块与 src 下的模块都可以直接导入
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
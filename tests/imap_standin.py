@@ -0,0 +1,154 @@
+"""测试用的最小 IMAP4rev1 服务器：只实现 EmailTool 用到的命令，记录收到的每条命令"""
+
+import email
+import re
+import socketserver
+import threading
+from email.message import EmailMessage
+
+FETCH_ITEM_PATTERN = re.compile(r'BODY(?:\.PEEK)?\[[^\]]*\](?:<\d+\.\d+>)?|UID|FLAGS')
+BODY_ITEM_PATTERN = re.compile(r'BODY(?:\.PEEK)?\[([^\]]*)\](?:<(\d+)\.(\d+)>)?')
+
+
+def make_message(i):
+    """第 i 封测试邮件"""
+    msg = EmailMessage()
+    msg['Subject'] = f'测试邮件{i}'
+    msg['From'] = f'sender{i}@example.com'
+    msg['To'] = 'me@example.com'
+    msg['Date'] = 'Mon, 19 Oct 2026 10:00:00 +0800'
+    msg['Message-ID'] = f'<msg{i}@example.com>'
+    msg.set_content(f'正文 {i} ' + '内容' * 400)
+    return msg.as_bytes()
+
+
+def parse_set(spec, largest):
+    """展开 "1:5,7,9:*" 形式的集合"""
+    values = set()
+    for part in spec.split(','):
+        low, _, high = part.partition(':')
+        low = largest if low == '*' else int(low)
+        high = low if not high else (largest if high == '*' else int(high))
+        values.update(range(min(low, high), max(low, high) + 1))
+    return values
+
+
+def _fetch_response(items, seq, uid, flags, raw):
+    head, _, body = raw.partition(b'\n\n')
+    head += b'\n\n'
+    parts = []
+    for item in FETCH_ITEM_PATTERN.findall(items.upper()):
+        if item == 'UID':
+            parts.append(f'UID {uid}'.encode())
+        elif item == 'FLAGS':
+            parts.append(f'FLAGS ({" ".join(flags)})'.encode())
+        else:
+            section, offset, length = BODY_ITEM_PATTERN.match(item).groups()
+            if section == 'TEXT':
+                data = body
+            elif section.startswith('HEADER.FIELDS'):
+                names = re.search(r'\((.*)\)', section).group(1).split()
+                msg = email.message_from_bytes(head)
+                data = b''.join(f'{k}: {v}\r\n'.encode() for k, v in msg.items() if k.upper() in names) + b'\r\n'
+            else:
+                data = raw
+            label = f'BODY[{section}]'
+            if offset is not None:
+                data = data[int(offset):int(offset) + int(length)]
+                label += f'<{offset}>'
+            parts.append(f'{label} {{{len(data)}}}\r\n'.encode() + data)
+    return f'* {seq} FETCH ('.encode() + b' '.join(parts) + b')\r\n'
+
+
+class IMAPStandIn:
+    """
+    在后台线程中运行的 IMAP 服务器，只有一个 INBOX
+    参数: send_uidnext - SELECT 的响应中是否包含 UIDNEXT
+    """
+
+    def __init__(self, send_uidnext=True):
+        self.messages = []  # (uid, flags, raw)
+        self.next_uid = 1
+        self.uidvalidity = 1
+        self.commands = []
+        self.send_uidnext = send_uidnext
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def add(self, raw, flags=()):
+        self.messages.append((self.next_uid, list(flags), raw))
+        self.next_uid += 1
+
+    def expunge(self, uids):
+        """删除邮件，之后的 UID 不再连续"""
+        self.messages = [m for m in self.messages if m[0] not in set(uids)]
+
+    def recreate(self):
+        """模拟文件夹被删除后重建：UIDVALIDITY 改变，UID 从 1 重新分配"""
+        raws = [raw for _, _, raw in self.messages]
+        self.messages = []
+        self.next_uid = 1
+        self.uidvalidity += 1
+        for raw in raws:
+            self.add(raw)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def send(self, data):
+                self.wfile.write(data if isinstance(data, bytes) else data.encode())
+                self.wfile.flush()
+
+            def handle(self):
+                self.send('* OK IMAP4rev1 stand-in ready\r\n')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    tag, _, rest = line.decode().rstrip('\r\n').partition(' ')
+                    command, _, args = rest.partition(' ')
+                    command = command.upper()
+                    if command == 'UID':
+                        command, _, args = args.partition(' ')
+                        command = 'UID ' + command.upper()
+                    standin.commands.append(command)
+                    if not self.dispatch(tag, command, args):
+                        return
+
+            def dispatch(self, tag, command, args):
+                messages = standin.messages
+                if command == 'CAPABILITY':
+                    self.send(f'* CAPABILITY IMAP4rev1\r\n{tag} OK done\r\n')
+                elif command in ('LOGIN', 'NOOP', 'CLOSE'):
+                    self.send(f'{tag} OK done\r\n')
+                elif command in ('SELECT', 'EXAMINE'):
+                    uidnext = f'* OK [UIDNEXT {standin.next_uid}] ok\r\n' if standin.send_uidnext else ''
+                    self.send(f'* {len(messages)} EXISTS\r\n* 0 RECENT\r\n* OK [UIDVALIDITY {standin.uidvalidity}] ok\r\n'
+                              f'{uidnext}* FLAGS (\\Seen)\r\n{tag} OK [READ-ONLY] done\r\n')
+                elif command == 'UID SEARCH':
+                    wanted = parse_set(args, len(messages))
+                    uids = [str(uid) for seq, (uid, _, _) in enumerate(messages, 1) if seq in wanted]
+                    self.send(f'* SEARCH {" ".join(uids)}\r\n{tag} OK done\r\n')
+                elif command in ('FETCH', 'UID FETCH'):
+                    spec, _, items = args.partition(' ')
+                    largest = messages[-1][0] if command == 'UID FETCH' and messages else len(messages)
+                    wanted = parse_set(spec, largest)
+                    out = b''.join(_fetch_response(items, seq, uid, flags, raw)
+                                   for seq, (uid, flags, raw) in enumerate(messages, 1)
+                                   if (uid if command == 'UID FETCH' else seq) in wanted)
+                    self.send(out + f'{tag} OK done\r\n'.encode())
+                elif command == 'LOGOUT':
+                    self.send(f'* BYE\r\n{tag} OK bye\r\n')
+                    return False
+                else:
+                    self.send(f'{tag} BAD unknown command\r\n')
+                return True
+
+        return Handler
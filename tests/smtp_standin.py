@@ -0,0 +1,89 @@
+"""测试用的最小 SMTP 服务器：记录收到的邮件，可配置断开连接与拒收收件人"""
+
+import socketserver
+import threading
+
+
+class SMTPStandIn:
+    """
+    在后台线程中运行的 SMTP 服务器
+    参数:
+        drop_after - 每个连接发送这么多封邮件后，下一次 MAIL 返回 421 并断开连接，None 表示不断开
+        refuse - 地址中含有该字符串的收件人返回 550
+    """
+
+    def __init__(self, drop_after=None, refuse='bad'):
+        self.drop_after = drop_after
+        self.refuse = refuse
+        self.received = []  # (收件人列表, 邮件原文)
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def send(self, line):
+                self.wfile.write(line.encode() + b'\r\n')
+                self.wfile.flush()
+
+            def handle(self):
+                with standin.lock:
+                    standin.connections += 1
+                self.send('220 stand-in ready')
+                sent = 0
+                recipients = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode().strip()
+                    verb = command.split(' ', 1)[0].upper()
+                    if verb in ('EHLO', 'HELO'):
+                        self.send('250-stand-in')
+                        self.send('250-AUTH PLAIN LOGIN')
+                        self.send('250 8BITMIME')
+                    elif verb == 'AUTH':
+                        self.send('235 authenticated')
+                    elif verb == 'MAIL':
+                        if standin.drop_after is not None and sent >= standin.drop_after:
+                            self.send('421 too many messages, closing connection')
+                            return
+                        recipients = []
+                        self.send('250 ok')
+                    elif verb == 'RCPT':
+                        address = command.split(':', 1)[1].strip(' <>')
+                        if standin.refuse and standin.refuse in address:
+                            self.send('550 no such user')
+                        else:
+                            recipients.append(address)
+                            self.send('250 ok')
+                    elif verb == 'DATA':
+                        self.send('354 end with .')
+                        data = b''
+                        while True:
+                            line = self.rfile.readline()
+                            if line in (b'.\r\n', b''):
+                                break
+                            data += line
+                        with standin.lock:
+                            standin.received.append((recipients, data))
+                        sent += 1
+                        self.send('250 queued')
+                    elif verb in ('RSET', 'NOOP'):
+                        self.send('250 ok')
+                    elif verb == 'QUIT':
+                        self.send('221 bye')
+                        return
+                    else:
+                        self.send('502 not implemented')
+
+        return Handler
@@ -0,0 +1,148 @@
+"""分析服务缓存：LRU 淘汰、并发请求合并与图表渲染串行化"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from analysis_service import AnalysisCache, create_server
+
+
+class FakeAnalyzer:
+    """记录调用次数；get_stock_data 可以被 release 事件挡住，模拟慢速数据接口"""
+
+    def __init__(self, block=False):
+        self.calls = []
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.lock = threading.Lock()
+        self.rendering = 0
+        self.max_rendering = 0
+
+    def get_stock_data(self, ts_code, years=3):
+        with self.lock:
+            self.calls.append(ts_code)
+        self.release.wait(5)
+        if ts_code == 'BAD.SH':
+            raise ValueError('接口错误')
+        if ts_code == 'NONE.SH':
+            return None
+        return pd.DataFrame({'交易日期': pd.to_datetime(['2026-10-15', '2026-10-16']),
+                             '收盘价': [10.0, 10.5], '信号': ['', '买入信号']})
+
+    def calculate_moving_averages(self, df):
+        return df
+
+    def detect_signals(self, df):
+        return df
+
+    def render_chart_png(self, df, stock_code):
+        with self.lock:
+            self.rendering += 1
+            self.max_rendering = max(self.max_rendering, self.rendering)
+        time.sleep(0.02)
+        with self.lock:
+            self.rendering -= 1
+        return f'png:{stock_code}'.encode()
+
+
+def test_lru_evicts_least_recently_used():
+    analyzer = FakeAnalyzer()
+    cache = AnalysisCache(analyzer, max_entries=2)
+    cache.get_data('A.SH')
+    cache.get_data('B.SH')
+    cache.get_data('A.SH')      # A 变为最近使用
+    cache.get_data('C.SH')      # 淘汰 B
+    assert list(cache.entries) == [('data', 'A.SH'), ('data', 'C.SH')]
+
+    cache.get_data('A.SH')
+    cache.get_data('B.SH')
+    assert analyzer.calls == ['A.SH', 'B.SH', 'C.SH', 'B.SH']
+    assert cache.stats() == {'entries': 2, 'inflight': 0, 'hits': 2, 'misses': 4, 'coalesced': 0}
+
+
+def test_expired_and_missing_results_are_recomputed():
+    analyzer = FakeAnalyzer()
+    cache = AnalysisCache(analyzer, ttl=0)
+    cache.get_data('A.SH')
+    cache.get_data('A.SH')
+    assert analyzer.calls == ['A.SH', 'A.SH']
+
+    cache = AnalysisCache(analyzer)
+    assert cache.get_data('NONE.SH') is None
+    assert cache.get_data('NONE.SH') is None
+    # 获取失败的结果不缓存
+    assert analyzer.calls.count('NONE.SH') == 2
+
+
+def test_concurrent_requests_are_coalesced():
+    analyzer = FakeAnalyzer(block=True)
+    cache = AnalysisCache(analyzer)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(cache.get_data, 'A.SH') for _ in range(8)]
+        # 等所有请求都挂在同一个计算上再放行
+        deadline = time.time() + 5
+        while cache.stats()['coalesced'] < 7 and time.time() < deadline:
+            time.sleep(0.01)
+        analyzer.release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    assert analyzer.calls == ['A.SH']
+    assert all(r is results[0] for r in results)
+    assert cache.stats() == {'entries': 1, 'inflight': 0, 'hits': 0, 'misses': 1, 'coalesced': 7}
+
+
+def test_coalesced_requests_share_the_error():
+    analyzer = FakeAnalyzer(block=True)
+    cache = AnalysisCache(analyzer)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.get_data, 'BAD.SH') for _ in range(4)]
+        deadline = time.time() + 5
+        while cache.stats()['coalesced'] < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        analyzer.release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+    assert analyzer.calls == ['BAD.SH']
+    assert cache.stats()['inflight'] == 0
+
+
+def test_charts_render_one_at_a_time():
+    analyzer = FakeAnalyzer()
+    cache = AnalysisCache(analyzer)
+    codes = [f'{i:06d}.SZ' for i in range(6)]
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        charts = list(executor.map(cache.get_chart, codes))
+    assert charts == [f'png:{c.split(".")[0]}'.encode() for c in codes]
+    assert analyzer.max_rendering == 1
+    # 图表复用同一股票已缓存的数据
+    assert cache.get_chart(codes[0]) == charts[0]
+    assert sorted(analyzer.calls) == codes
+
+
+def test_http_endpoints():
+    server = create_server(FakeAnalyzer(), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    try:
+        with urllib.request.urlopen(f'{base}/signals/A.SH') as response:
+            payload = json.loads(response.read())
+        assert payload['rows'] == [{'交易日期': '2026-10-16', '收盘价': 10.5, '信号': '买入信号'}]
+        with urllib.request.urlopen(f'{base}/chart/A.SH.png') as response:
+            assert response.headers['Content-Type'] == 'image/png'
+            assert response.read() == b'png:A'
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f'{base}/data/NONE.SH')
+        assert error.value.code == 404
+        with urllib.request.urlopen(f'{base}/stats') as response:
+            assert json.loads(response.read())['entries'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,103 @@
+"""分块 top-k 相关邻居与逐对暴力计算的对照"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cross_section import RollingCorrelation
+
+N = 30
+WINDOW = 40
+
+
+def make_returns(seed, days, missing=0.0):
+    """days × N 的收益率：三组股票各自跟随一个共同因子；missing 为随机缺失的比例"""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.02, size=(days, 3))
+    returns = factors[:, np.arange(N) % 3] * rng.uniform(0.5, 1.5, N) + rng.normal(0, 0.01, size=(days, N))
+    if missing:
+        returns[rng.random((days, N)) < missing] = np.nan
+    returns[:, 5] = 0.0           # 方差为 0
+    returns[:-5, 7] = np.nan      # 有效观测不足
+    return returns
+
+
+def build(returns, block_size=7):
+    corr = RollingCorrelation([f'{i:06d}.SZ' for i in range(N)], window=WINDOW, block_size=block_size)
+    for day, row in enumerate(returns):
+        corr.add_day(day, row)
+    return corr
+
+
+def brute_force(returns, min_periods):
+    """
+    逐对计算窗口内的相关系数（float64），缺失值的处理与 RollingCorrelation 相同：
+    每列按自身的有效观测标准化，缺失位置记为 0（视为窗口均值）
+    返回: (N×N 相关矩阵，不可用的列、自身为 -inf, 可用列的掩码)
+    """
+    window = returns[-WINDOW:]
+    valid = ~np.isnan(window)
+    count = valid.sum(axis=0)
+    mean = np.nanmean(window, axis=0)
+    std = np.nanstd(window, axis=0)
+    usable = (count >= min_periods) & (std > 0)
+    corr = np.full((N, N), -np.inf)
+    for i in np.flatnonzero(usable):
+        for j in np.flatnonzero(usable):
+            if i == j:
+                continue
+            zi = np.where(valid[:, i], (window[:, i] - mean[i]) / (std[i] * np.sqrt(count[i])), 0.0)
+            zj = np.where(valid[:, j], (window[:, j] - mean[j]) / (std[j] * np.sqrt(count[j])), 0.0)
+            corr[i, j] = zi @ zj
+    return corr, usable
+
+
+def assert_matches_brute_force(corr, returns, k):
+    best_idx, best_corr = corr.top_k(k)
+    expected, usable = brute_force(returns, corr.min_periods)
+    assert best_idx.shape == best_corr.shape == (N, k)
+    for i in range(N):
+        ranked = np.sort(expected[i])[::-1][:k]
+        ranked = ranked[np.isfinite(ranked)]
+        found = best_idx[i][best_idx[i] >= 0]
+        # 相关系数与暴力排序的前 k 个一致，邻居下标指向同样的相关系数
+        assert len(found) == len(ranked)
+        np.testing.assert_allclose(best_corr[i][:len(ranked)], ranked, atol=1e-5)
+        np.testing.assert_allclose(expected[i, found], ranked, atol=1e-5)
+        assert i not in found
+    assert not usable[5] and not usable[7]
+    assert (best_idx[[5, 7]] == -1).all()
+
+
+def test_top_k_matches_brute_force():
+    returns = make_returns(1, WINDOW + 25)
+    corr = build(returns)
+    assert_matches_brute_force(corr, returns, k=4)
+
+    # 没有缺失值时即为普通的皮尔逊相关系数
+    expected = pd.DataFrame(returns[-WINDOW:]).corr().to_numpy()
+    best_idx, best_corr = corr.top_k(4)
+    np.testing.assert_allclose(best_corr[0], expected[0, best_idx[0]], atol=1e-5)
+
+
+def test_top_k_with_missing_values_matches_brute_force():
+    # 成对缺失的观测按 0 近似，结果与逐对暴力计算的同一近似一致
+    returns = make_returns(2, WINDOW + 25, missing=0.15)
+    corr = build(returns, block_size=8)
+    assert_matches_brute_force(corr, returns, k=5)
+
+
+@pytest.mark.parametrize('k', [0, -1])
+def test_top_k_non_positive_k(k):
+    corr = build(make_returns(3, WINDOW))
+    best_idx, best_corr = corr.top_k(k)
+    assert best_idx.shape == best_corr.shape == (N, 0)
+    assert corr.clusters(k=k) == []
+
+
+def test_top_k_larger_than_universe():
+    returns = make_returns(4, WINDOW)
+    corr = build(returns)
+    best_idx, _ = corr.top_k(N + 5)
+    # 可用的股票有 N-2 只，每只最多 N-3 个邻居，其余位置为 -1
+    assert ((best_idx >= 0).sum(axis=1)[[0, 1]] == N - 3).all()
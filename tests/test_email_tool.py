@@ -0,0 +1,107 @@
+"""EmailTool 在本地 IMAP 服务器上的批量获取"""
+
+import imaplib
+
+import pytest
+
+from email_tool import EmailTool
+from imap_standin import IMAPStandIn, make_message
+
+
+@pytest.fixture
+def server():
+    server = IMAPStandIn()
+    for i in range(1, 21):
+        server.add(make_message(i), flags=['\\Seen'] if i % 2 else [])
+    yield server
+    server.stop()
+
+
+def connect(server):
+    tool = EmailTool()
+    tool.imap_conn = imaplib.IMAP4('127.0.0.1', server.port)
+    tool.imap_conn.login('me@example.com', 'secret')
+    del server.commands[:]
+    return tool
+
+
+def fetch_commands(server):
+    return [c for c in server.commands if c.endswith('FETCH') or c.endswith('SEARCH')]
+
+
+def test_parse_fetch_response():
+    msg_data = [
+        (b'3 (UID 13 FLAGS (\\Seen) BODY[HEADER.FIELDS (SUBJECT)] {16}', b'Subject: hello\r\n'),
+        (b' BODY[TEXT]<0> {5}', b'body1'),
+        b')',
+        (b'4 (BODY[HEADER.FIELDS (SUBJECT)] {14}', b'Subject: bye\r\n'),
+        b' UID 14 FLAGS ())',
+        b'5 (FLAGS ())',
+    ]
+    items = EmailTool.parse_fetch_response(msg_data)
+    # 没有 UID 的响应被丢弃；UID 出现在字面量之后也能识别
+    assert [(i['seq'], i['uid'], i['flags']) for i in items] == [(3, 13, ['\\Seen']), (4, 14, [])]
+    assert items[0]['header'] == b'Subject: hello\r\n' and items[0]['text'] == b'body1'
+    assert items[1]['header'] == b'Subject: bye\r\n' and items[1]['text'] == b''
+
+
+def test_latest_messages_in_one_uid_fetch(server):
+    tool = connect(server)
+    emails = tool.fetch_emails(count=5)
+    assert [e['uid'] for e in emails] == [20, 19, 18, 17, 16]
+    assert emails[0]['subject'] == '测试邮件20'
+    assert emails[0]['content'].startswith('正文 20')
+    assert emails[1]['flags'] == ['\\Seen']
+    assert fetch_commands(server) == ['UID FETCH']
+
+
+def test_latest_messages_with_expunged_uids(server):
+    server.expunge([17, 18, 19])
+    tool = connect(server)
+    emails = tool.fetch_emails(count=5)
+    assert [e['uid'] for e in emails] == [20, 16, 15, 14, 13]
+    assert fetch_commands(server) == ['UID FETCH', 'UID SEARCH', 'UID FETCH']
+
+
+def test_latest_messages_in_sparse_mailbox():
+    server = IMAPStandIn()
+    try:
+        for i in range(1, 101):
+            server.add(make_message(i))
+        server.next_uid = 19991
+        for i in range(101, 111):
+            server.add(make_message(i))
+        tool = connect(server)
+        emails = tool.fetch_emails(count=100)
+        # UID 很稀疏时往返次数也不随 UID 的跨度增长
+        assert [e['uid'] for e in emails] == list(range(20000, 19990, -1)) + list(range(100, 10, -1))
+        assert fetch_commands(server) == ['UID FETCH', 'UID SEARCH', 'UID FETCH']
+    finally:
+        server.stop()
+
+
+def test_latest_messages_without_uidnext(server):
+    server.send_uidnext = False
+    server.expunge([19])
+    tool = connect(server)
+    emails = tool.fetch_emails(count=3)
+    assert [e['uid'] for e in emails] == [20, 18, 17]
+    assert fetch_commands(server) == ['UID SEARCH', 'UID FETCH']
+
+
+def test_since_uid(server):
+    tool = connect(server)
+    assert [e['uid'] for e in tool.fetch_emails(since_uid=18)] == [20, 19]
+    # "n:*" 在 n 大于最大 UID 时服务器仍会返回最后一封邮件
+    assert tool.fetch_emails(since_uid=20) == []
+    assert fetch_commands(server) == ['UID FETCH', 'UID FETCH']
+
+
+def test_empty_mailbox():
+    server = IMAPStandIn()
+    try:
+        tool = connect(server)
+        assert tool.fetch_emails(count=5) == []
+        assert fetch_commands(server) == []
+    finally:
+        server.stop()
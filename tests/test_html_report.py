@@ -0,0 +1,35 @@
+"""HTML 报告的依赖与信号汇总表"""
+
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from html_report import ReportGenerator
+
+
+def make_frame(pct):
+    dates = pd.date_range('2026-01-01', periods=3)
+    return pd.DataFrame({
+        '交易日期': dates,
+        '收盘价': [10.0, 10.5, 10.2],
+        '涨跌幅(%)': [0.0, 5.0, pct],
+        '信号': ['', '买入信号', ''],
+    })
+
+
+def test_import_does_not_load_scheduler_or_plotting(tmp_path):
+    code = 'import sys, html_report; print(sorted(m for m in ("scheduler", "matplotlib", "tushare") if m in sys.modules))'
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=tmp_path, env={'PYTHONPATH': ':'.join(sys.path)})
+    assert out.stdout.strip() == '[]'
+
+
+def test_missing_pct_has_empty_sort_value():
+    row = ReportGenerator()._row('600000.SH', make_frame(np.nan))
+    assert '<td data-value="">-</td>' in row
+    assert 'nan' not in row
+
+    row = ReportGenerator()._row('600000.SH', make_frame(-2.5))
+    assert '<td data-value="-2.5">-2.50</td>' in row
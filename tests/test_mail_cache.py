@@ -0,0 +1,89 @@
+"""本地邮件缓存在本地 IMAP 服务器上的首次同步、增量同步与 UIDVALIDITY 变化"""
+
+import imaplib
+
+import pytest
+
+from email_tool import EmailTool
+from imap_standin import IMAPStandIn, make_message
+from mail_cache import MailCache
+
+
+@pytest.fixture
+def server():
+    server = IMAPStandIn()
+    for i in range(1, 13):
+        server.add(make_message(i))
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def tool(server, tmp_path):
+    tool = EmailTool()
+    tool.imap_conn = imaplib.IMAP4('127.0.0.1', server.port)
+    tool.imap_conn.login('me@example.com', 'secret')
+    tool.cache = MailCache(str(tmp_path), account='me', initial_limit=10)
+    yield tool
+    tool.cache.close()
+
+
+def sync_commands(server):
+    """取出并清空服务器记录的命令"""
+    commands = [c for c in server.commands if c not in ('CAPABILITY', 'LOGIN')]
+    del server.commands[:]
+    return commands
+
+
+def test_first_sync_fetches_latest_messages(server, tool):
+    emails = tool.fetch_emails(count=3)
+    assert [e['uid'] for e in emails] == [12, 11, 10]
+    assert emails[0]['subject'] == '测试邮件12'
+    assert sync_commands(server) == ['EXAMINE', 'UID FETCH']
+    # 首次同步最多取 initial_limit 封
+    assert [e['uid'] for e in tool.cache.list(count=100)] == list(range(12, 2, -1))
+
+    # 没有新邮件：UIDNEXT 没有变化，不发 FETCH
+    assert [e['uid'] for e in tool.fetch_emails(count=3)] == [12, 11, 10]
+    assert sync_commands(server) == ['EXAMINE']
+
+
+def test_incremental_sync_fetches_only_new_messages(server, tool):
+    tool.fetch_emails(count=3)
+    sync_commands(server)
+
+    server.add(make_message(13))
+    server.add(make_message(14))
+    assert tool.cache.sync(tool) == 2
+    assert sync_commands(server) == ['EXAMINE', 'UID FETCH']
+    emails = tool.cache.list(count=3)
+    assert [e['uid'] for e in emails] == [14, 13, 12]
+    assert emails[0]['subject'] == '测试邮件14'
+
+
+def test_cache_is_keyed_on_uid_after_expunge(server, tool):
+    tool.fetch_emails(count=3)
+    server.expunge([11])
+    server.add(make_message(13))
+    tool.cache.sync(tool)
+    emails = tool.cache.list(count=4)
+    # 删除后序号变化，缓存中的邮件仍以 UID 标识
+    assert [(e['id'], e['uid']) for e in emails] == [('13', 13), ('12', 12), ('11', 11), ('10', 10)]
+
+
+def test_uidvalidity_change_resyncs_folder(server, tool, tmp_path):
+    tool.fetch_emails(count=3)
+    assert tool.cache.get_body(tool, 12).startswith(b'Subject: ')
+    old_blobs = list(tmp_path.rglob('*.eml'))
+    assert len(old_blobs) == 1
+
+    # 文件夹重建后 UID 重新从 1 分配，旧缓存中的 UID 不再可信
+    server.expunge([1, 2])
+    server.recreate()
+    sync_commands(server)
+    emails = tool.fetch_emails(count=3)
+    assert [e['uid'] for e in emails] == [10, 9, 8]
+    assert emails[0]['subject'] == '测试邮件12'
+    assert sync_commands(server) == ['EXAMINE', 'UID FETCH']
+    assert [e['uid'] for e in tool.cache.list(count=100)] == list(range(10, 0, -1))
+    assert not any(path.exists() for path in old_blobs)
@@ -0,0 +1,94 @@
+"""收盘后调度：未发布的交易日保持待处理，历史K线只追加新的日线"""
+
+import numpy as np
+import pandas as pd
+
+from data_source import TushareSource
+from scheduler import PipelineScheduler
+from stock_analyzer import StockAnalyzer
+
+CODES = ['600000.SH', '000001.SZ']
+DAYS = pd.bdate_range('2026-01-05', periods=60).strftime('%Y%m%d').tolist()
+
+
+class FakePro:
+    """按交易日发布日线的 Tushare 替身"""
+
+    def __init__(self, published):
+        rng = np.random.default_rng(0)
+        rows = []
+        for code in CODES + ['688001.SH']:
+            closes = 10 + np.cumsum(rng.normal(0, 0.3, len(DAYS)))
+            for day, close in zip(DAYS, closes):
+                rows.append({'ts_code': code, 'trade_date': day, 'open': close, 'high': close + 0.2,
+                             'low': close - 0.2, 'close': close, 'vol': 1000.0})
+        self.market = pd.DataFrame(rows)
+        self.published = published
+        self.symbol_requests = []
+
+    def trade_cal(self, exchange, start_date, end_date, is_open):
+        return pd.DataFrame({'cal_date': [d for d in DAYS if start_date <= d <= end_date]})
+
+    def daily(self, ts_code=None, trade_date=None, start_date=None, end_date=None):
+        df = self.market[self.market['trade_date'] <= self.published]
+        if trade_date is not None:
+            return df[df['trade_date'] == trade_date].reset_index(drop=True)
+        self.symbol_requests.append(ts_code)
+        df = df[(df['ts_code'] == ts_code) & (df['trade_date'] >= start_date)]
+        return df.sort_values('trade_date', ascending=False).reset_index(drop=True)
+
+
+def make_scheduler(tmp_path, pro):
+    analyzer = StockAnalyzer(source=TushareSource(pro))
+    analyzer.pro = pro
+    exported = []
+    analyzer.save_to_excel = lambda df, code: exported.append((code, len(df)))
+    analyzer.save_to_database = lambda df: None
+    analyzer.plot_chart = lambda df, code: None
+    scheduler = PipelineScheduler(analyzer, CODES, state_dir=str(tmp_path), max_workers=2)
+    return scheduler, exported
+
+
+def test_unpublished_day_stays_pending(tmp_path):
+    pro = FakePro(published=DAYS[40])
+    scheduler, exported = make_scheduler(tmp_path, pro)
+    assert scheduler.run_once(DAYS[40])['symbols'] == 2
+
+    # 下一个交易日的日线还没有发布：不处理，也不记为成功
+    result = scheduler.run_once(DAYS[41])
+    assert result['days'] == []
+    assert scheduler.log.last_trade_date() == DAYS[40]
+    assert scheduler.pending_days(DAYS[41]) == [DAYS[41]]
+
+    pro.published = DAYS[41]
+    assert scheduler.run_once(DAYS[41])['days'] == [DAYS[41]]
+    assert scheduler.log.last_trade_date() == DAYS[41]
+    scheduler.log.close()
+
+
+def test_history_is_appended_not_refetched(tmp_path):
+    pro = FakePro(published=DAYS[40])
+    scheduler, exported = make_scheduler(tmp_path, pro)
+    scheduler.run_once(DAYS[40])
+    assert sorted(pro.symbol_requests) == sorted(CODES)
+    first = scheduler.log.get_fingerprint(CODES[0], 'history')
+
+    pro.published = DAYS[43]
+    result = scheduler.run_once(DAYS[43])
+    assert result['days'] == DAYS[41:44]
+    # 全量历史只在第一次运行时获取，之后只追加全市场日线中的新K线
+    assert sorted(pro.symbol_requests) == sorted(CODES)
+    assert scheduler.log.get_fingerprint(CODES[0], 'history') != first
+
+    history = pd.read_pickle(scheduler._output_path(CODES[0], 'history'))
+    expected = pro.market[pro.market['ts_code'] == CODES[0]].iloc[:44]
+    assert history['交易日期'].dt.strftime('%Y%m%d').tolist() == DAYS[:44]
+    assert np.allclose(history['收盘价'], expected['close'])
+    assert (CODES[0].split('.')[0], 44) in exported
+
+    # 重复处理同一交易日不算新增K线，历史指纹不变，后续阶段全部复用
+    value = scheduler.log.get_fingerprint(CODES[0], 'history')
+    bars = scheduler.analyzer.format_daily(pro.daily(trade_date=DAYS[43]))
+    _, again, appended = scheduler.update_history(CODES[0], bars[bars['股票代码'] == CODES[0]])
+    assert appended == 0 and again == value
+    scheduler.log.close()
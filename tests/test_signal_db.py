@@ -0,0 +1,107 @@
+"""信号历史数据库：重新导入、股票基础信息与按行业查询"""
+
+import sys
+
+import pandas as pd
+
+import signal_db
+from data_source import FileDataSource
+from signal_db import SignalStore
+from stock_analyzer import StockAnalyzer
+
+DATES = pd.bdate_range('2026-07-01', periods=6)
+
+
+def make_analysis(ts_code, signals):
+    """signals: {日期序号: 信号}"""
+    return pd.DataFrame({
+        '股票代码': ts_code,
+        '交易日期': DATES,
+        '收盘价': [10.0 + i for i in range(len(DATES))],
+        '涨跌幅(%)': 1.0,
+        'MA5': 10.0,
+        'MA10': 10.0,
+        'MA20': 10.0,
+        '信号': [signals.get(i, '') for i in range(len(DATES))],
+    })
+
+
+def stored_signals(store, ts_code=None):
+    df = store.query_signals(ts_codes=[ts_code] if ts_code else None)
+    return list(zip(df['股票代码'], df['交易日期'], df['信号']))
+
+
+def test_reimport_removes_vanished_signals(tmp_path):
+    store = SignalStore(str(tmp_path / 'signals.db'))
+    store.save_analysis(make_analysis('600000.SH', {1: '买入信号', 4: '卖出信号'}))
+    store.save_analysis(make_analysis('000001.SZ', {2: '买入信号'}))
+
+    # 数据修正后重新导入：第 1 天的信号消失，第 3 天出现新信号
+    assert store.save_analysis(make_analysis('600000.SH', {3: '买入信号', 4: '卖出信号'})) == (6, 2)
+    assert stored_signals(store, '600000.SH') == [('600000.SH', '2026-07-06', '买入信号'),
+                                                  ('600000.SH', '2026-07-07', '卖出信号')]
+    # 其他股票不受影响
+    assert stored_signals(store, '000001.SZ') == [('000001.SZ', '2026-07-03', '买入信号')]
+
+    # 只覆盖部分日期时，范围之外的旧信号保留
+    partial = make_analysis('600000.SH', {})
+    store.save_analysis(partial[partial['交易日期'] >= DATES[4]])
+    assert stored_signals(store, '600000.SH') == [('600000.SH', '2026-07-06', '买入信号')]
+    store.close()
+
+
+def test_missing_stocks_and_industry_query(tmp_path):
+    store = SignalStore(str(tmp_path / 'signals.db'))
+    store.save_analysis(make_analysis('600000.SH', {1: '买入信号'}))
+    store.save_analysis(make_analysis('603986.SH', {2: '买入信号'}))
+
+    codes = ['600000.SH', '603986.SH'] + [f'{i:06d}.SZ' for i in range(1200)]
+    assert store.missing_stocks(codes + ['600000.SH']) == codes
+    store.upsert_stocks(pd.DataFrame({'ts_code': ['600000.SH', '603986.SH'],
+                                      'name': ['浦发银行', '兆易创新'], 'industry': ['银行', '半导体']}))
+    assert store.missing_stocks(codes) == codes[2:]
+
+    result = store.query_signals(signal='金叉', industry='半导体')
+    assert list(zip(result['股票代码'], result['股票名称'], result['交易日期'])) == [
+        ('603986.SH', '兆易创新', '2026-07-03')]
+    store.close()
+
+
+def test_import_stocks_command_from_file(tmp_path, monkeypatch, capsys):
+    db_path = str(tmp_path / 'signals.db')
+    csv_path = tmp_path / 'stocks.csv'
+    csv_path.write_text('ts_code,name,industry\n000001.SZ,平安银行,银行\n603986.SH,兆易创新,半导体\n',
+                        encoding='utf-8-sig')
+    monkeypatch.setattr(sys, 'argv', ['signal_db.py', '--db', db_path, 'import-stocks', '--file', str(csv_path)])
+    signal_db.main()
+    assert '已写入 2 只股票' in capsys.readouterr().out
+
+    store = SignalStore(db_path)
+    # 代码以文本读入，前导零不会丢失
+    assert store.missing_stocks(['000001.SZ', '603986.SH', '600000.SH']) == ['600000.SH']
+    store.close()
+
+
+class FakePro:
+    def __init__(self):
+        self.calls = 0
+
+    def stock_basic(self, fields):
+        self.calls += 1
+        return pd.DataFrame({'ts_code': ['600000.SH'], 'name': ['浦发银行'], 'industry': ['银行']})
+
+
+def test_save_to_database_fills_stock_basic_once(tmp_path):
+    analyzer = StockAnalyzer(source=FileDataSource(str(tmp_path)))
+    analyzer.pro = FakePro()
+    db_path = str(tmp_path / 'signals.db')
+    df = make_analysis('600000.SH', {1: '买入信号'})
+
+    assert analyzer.save_to_database(df, db_path) == 1
+    assert analyzer.save_to_database(df, db_path) == 1
+    # 第二次写入时基础信息已存在，不再请求 Tushare
+    assert analyzer.pro.calls == 1
+
+    store = SignalStore(db_path)
+    assert list(store.query_signals(industry='银行')['股票代码']) == ['600000.SH']
+    store.close()
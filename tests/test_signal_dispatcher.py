@@ -0,0 +1,136 @@
+"""信号摘要分发：订阅文件、按订阅者分组与分批发送"""
+
+import pandas as pd
+
+from signal_dispatcher import (SignalDispatcher, format_digest, group_by_subscriber, invert_subscriptions,
+                               load_subscriptions, signal_rows)
+
+DAY = pd.Timestamp('2026-10-16')
+
+
+def make_result(signal_today, close=10.0):
+    """三个交易日的信号结果，最后一天的信号为 signal_today"""
+    return pd.DataFrame({
+        '交易日期': pd.to_datetime(['2026-10-14', '2026-10-15', '2026-10-16']),
+        '收盘价': [close - 1, close - 0.5, close],
+        'MA5': [9.0, 9.2, 9.5],
+        'MA20': [9.4, 9.3, 9.3],
+        '信号': ['卖出信号', '', signal_today],
+    })
+
+
+RESULTS = {
+    '600000.SH': make_result('买入信号', 10.0),
+    '603986.SH': make_result('卖出信号', 120.5),
+    '000001.SZ': make_result('', 12.0),
+    '300750.SZ': make_result('买入信号', 200.0),
+}
+
+SUBSCRIPTIONS = {
+    'alice@example.com': ['600000.SH', '603986.SH'],
+    'bob@example.com': ['603986.SH', '000001.SZ'],
+    'carol@example.com': ['000001.SZ'],
+    'dave@example.com': ['600000.SH', '300750.SZ', '603986.SH'],
+}
+
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.rendered = []
+
+    def render_chart_png(self, df, ts_code, dpi=80):
+        self.rendered.append(ts_code)
+        return f'png:{ts_code}'.encode()
+
+
+class FakeMailer:
+    """提供 make_attachment、build_message、send_bulk，记录收到的调用"""
+
+    def __init__(self):
+        self.attachments = []
+        self.messages = []
+        self.batches = []
+
+    def make_attachment(self, filename, data, maintype, subtype):
+        part = {'filename': filename, 'data': data}
+        self.attachments.append(part)
+        return part
+
+    def build_message(self, to, subject, body, attachments):
+        msg = {'To': to, 'subject': subject, 'body': body, 'attachments': attachments}
+        self.messages.append(msg)
+        return msg
+
+    def send_bulk(self, messages, workers=4):
+        self.batches.append(list(messages))
+        return [], {'sent': len(messages), 'failed': 0}
+
+
+def test_load_subscriptions(tmp_path):
+    path = tmp_path / 'subscribers.csv'
+    path.write_text('\ufeff邮箱,关注列表\n'
+                    'alice@example.com,600000.sh 603986.SH\n'
+                    '# bob@example.com,000001.SZ\n'
+                    '\n'
+                    'bob@example.com,000001.SZ;603986.SH，600000.SH\n'
+                    'alice@example.com,603986.SH,300750.SZ\n', encoding='utf-8')
+    assert load_subscriptions(str(path)) == {
+        'alice@example.com': ['600000.SH', '603986.SH', '300750.SZ'],
+        'bob@example.com': ['000001.SZ', '603986.SH', '600000.SH'],
+    }
+
+
+def test_group_by_subscriber():
+    trade_date, signals = signal_rows(RESULTS)
+    assert trade_date == DAY
+    assert sorted(signals['股票代码']) == ['300750.SZ', '600000.SH', '603986.SH']
+
+    digests = group_by_subscriber(signals, invert_subscriptions(SUBSCRIPTIONS))
+    # 没有信号的订阅者不出现，每个订阅者只收到自己关注的股票
+    assert {address: sorted(r[0] for r in rows) for address, rows in digests.items()} == {
+        'alice@example.com': ['600000.SH', '603986.SH'],
+        'bob@example.com': ['603986.SH'],
+        'dave@example.com': ['300750.SZ', '600000.SH', '603986.SH'],
+    }
+
+
+def test_format_digest():
+    rows = [('600000.SH', '买入信号', 10.0, 9.5, 9.3), ('603986.SH', '卖出信号', 120.5, 9.5, 9.3)]
+    subject, body = format_digest(DAY, rows)
+    assert subject == '📊 2026-10-16 关注列表信号：买入 1 只，卖出 1 只'
+    assert body.index('【买入信号') < body.index('600000.SH') < body.index('【卖出信号') < body.index('603986.SH')
+    assert '收盘    120.50' in body
+
+    _, body = format_digest(DAY, rows[:1])
+    assert '卖出信号（' not in body
+
+
+def test_dispatch_one_digest_per_subscriber_with_shared_charts():
+    analyzer = FakeAnalyzer()
+    mailer = FakeMailer()
+    dispatcher = SignalDispatcher(analyzer, mailer, batch_size=2, max_charts=2)
+    summary = dispatcher.dispatch(RESULTS, SUBSCRIPTIONS)
+
+    assert (summary['recipients'], summary['sent'], summary['failed']) == (3, 3, 0)
+    assert (summary['signals'], summary['charts']) == (3, 3)
+    # 每只有信号的股票只渲染一次图表，所有订阅者共用同一个附件对象
+    assert sorted(analyzer.rendered) == ['300750.SZ', '600000.SH', '603986.SH']
+    assert len(mailer.attachments) == 3
+    by_address = {msg['To']: msg for msg in mailer.messages}
+    assert sorted(by_address) == ['alice@example.com', 'bob@example.com', 'dave@example.com']
+    assert by_address['alice@example.com']['attachments'][1] is by_address['bob@example.com']['attachments'][0]
+    assert [a['filename'] for a in by_address['bob@example.com']['attachments']] == ['603986.SH_20261016.png']
+    # 附件数不超过 max_charts
+    assert len(by_address['dave@example.com']['attachments']) == 2
+
+    # 按 batch_size 分批发送，每封邮件只发送一次
+    assert [len(batch) for batch in mailer.batches] == [2, 1]
+    assert [msg['To'] for batch in mailer.batches for msg in batch] == [msg['To'] for msg in mailer.messages]
+
+
+def test_dispatch_without_signals_for_subscribers():
+    analyzer = FakeAnalyzer()
+    mailer = FakeMailer()
+    summary = SignalDispatcher(analyzer, mailer).dispatch(RESULTS, {'carol@example.com': ['000001.SZ']})
+    assert summary['recipients'] == 0
+    assert analyzer.rendered == [] and mailer.batches == []
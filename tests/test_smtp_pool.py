@@ -0,0 +1,85 @@
+"""SMTP 连接池在本地 SMTP 服务器上的重连、重试与逐封结果"""
+
+from email.message import EmailMessage
+
+import pytest
+
+from smtp_pool import SMTPPool, send_bulk
+from smtp_standin import SMTPStandIn
+
+
+def make_message(to, i):
+    msg = EmailMessage()
+    msg['From'] = 'me@example.com'
+    msg['To'] = to
+    msg['Subject'] = f'message {i}'
+    msg.set_content(f'body {i}')
+    return msg
+
+
+@pytest.fixture
+def server():
+    server = SMTPStandIn()
+    yield server
+    server.stop()
+
+
+def make_pool(server, **kwargs):
+    return SMTPPool('127.0.0.1', server.port, 'me@example.com', 'secret', starttls=False, timeout=5, **kwargs)
+
+
+def test_reconnects_when_server_drops_connection(server):
+    server.drop_after = 3
+    pool = make_pool(server, size=2)
+    messages = [make_message(f'user{i}@example.com', i) for i in range(10)]
+    results, summary = send_bulk(pool, messages)
+    pool.close()
+
+    assert summary['sent'] == 10 and summary['failed'] == 0
+    assert len(server.received) == 10
+    # 每个连接最多发 3 封，之后的 421 使连接被丢弃并重连重试
+    assert summary['connects'] >= 4
+    assert any(r['attempts'] > 1 for r in results)
+    assert all(r['ok'] and r['refused'] == {} for r in results)
+
+
+def test_max_per_connection_reconnects_before_server_limit(server):
+    server.drop_after = 3
+    pool = make_pool(server, size=1, max_per_connection=3)
+    results, summary = send_bulk(pool, [make_message(f'user{i}@example.com', i) for i in range(7)])
+    pool.close()
+    assert summary['sent'] == 7
+    assert all(r['attempts'] == 1 for r in results)
+    assert summary['connects'] == 3
+
+
+def test_refused_recipients_in_results(server):
+    pool = make_pool(server, size=2)
+    messages = [
+        make_message('ok1@example.com', 0),
+        make_message('ok2@example.com, bad1@example.com', 1),
+        make_message('bad2@example.com', 2),
+    ]
+    results, summary = send_bulk(pool, messages)
+    pool.close()
+
+    assert [r['ok'] for r in results] == [True, True, False]
+    assert results[0]['refused'] == {}
+    # 部分收件人被拒绝：邮件发给了其余收件人，结果中列出被拒绝的收件人
+    assert results[1]['refused'] == {'bad1@example.com': '550 no such user'}
+    # 全部收件人被拒绝：发送失败且不重试
+    assert results[2]['refused'] == {'bad2@example.com': '550 no such user'}
+    assert results[2]['attempts'] == 1
+    assert (summary['sent'], summary['failed'], summary['refused']) == (2, 1, 2)
+    assert sorted(rcpt for rcpts, _ in server.received for rcpt in rcpts) == ['ok1@example.com', 'ok2@example.com']
+
+
+def test_gives_up_after_retries(server):
+    server.drop_after = 0
+    pool = make_pool(server, size=1)
+    results, summary = send_bulk(pool, [make_message('user@example.com', 0)], retries=2)
+    pool.close()
+    assert summary['failed'] == 1
+    assert results[0]['attempts'] == 3
+    assert results[0]['error'].startswith('SMTPSenderRefused')
+    assert server.received == []
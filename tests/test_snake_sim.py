@@ -0,0 +1,120 @@
+"""SnakeSim 与原贪吃蛇游戏规则逐回合对照"""
+
+import random
+
+from snake_sim import DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, SnakeSim, greedy_policy
+
+
+class OriginalGame:
+    """
+    原 test.py 中 Snake / Food / Game 的规则，去掉绘制与 pygame 事件，其余照原样保留：
+    蛇身为列表，撞到自身用 in self.body[1:] 判断，食物用同一个随机数生成器生成
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.body = [(GRID_WIDTH // 2, GRID_HEIGHT // 2)]
+        self.direction = (1, 0)
+        self.next_direction = (1, 0)
+        self.food = self.generate_position()
+        self.score = 0
+        self.game_over = False
+        self.default_move_interval = 0.5
+        self.move_interval = 0.5
+
+    def generate_position(self):
+        x = self.rng.randint(0, GRID_WIDTH - 1)
+        y = self.rng.randint(0, GRID_HEIGHT - 1)
+        return (x, y)
+
+    def key(self, direction):
+        # handle_events 中四个方向键的分支
+        if self.direction == direction:
+            self.move_interval = self.default_move_interval / 2
+        elif self.direction != (-direction[0], -direction[1]):
+            self.next_direction = direction
+            self.move_interval = self.default_move_interval
+
+    def move(self):
+        self.direction = self.next_direction
+        head_x, head_y = self.body[0]
+        dx, dy = self.direction
+        self.body.insert(0, (head_x + dx, head_y + dy))
+        self.body.pop()
+
+    def grow(self):
+        head_x, head_y = self.body[0]
+        dx, dy = self.direction
+        self.body.insert(0, (head_x + dx, head_y + dy))
+
+    def check_collision(self):
+        head_x, head_y = self.body[0]
+        if head_x < 0 or head_x >= GRID_WIDTH or head_y < 0 or head_y >= GRID_HEIGHT:
+            return True
+        return (head_x, head_y) in self.body[1:]
+
+    def update(self):
+        # 到达移动间隔时的 update 分支
+        if not self.game_over:
+            self.move()
+            if self.check_collision():
+                self.game_over = True
+            if self.body[0] == self.food:
+                self.grow()
+                self.score += 10
+                self.food = self.generate_position()
+
+
+def state(game):
+    return (list(game.body), game.direction, game.next_direction, game.food, game.score,
+            game.game_over, game.move_interval)
+
+
+def replay(seed, max_ticks=400):
+    """
+    用同一随机种子与随机按键驱动两份规则，返回第一处状态不一致的回合（一致时为 None）和回合数
+    """
+    keys = random.Random(seed + 1000000)
+    original = OriginalGame(random.Random(seed))
+    sim = SnakeSim(seed=seed)
+    if state(original) != state(sim):
+        return 0, 0
+    for tick in range(1, max_ticks + 1):
+        # 两次移动之间可能按下 0~2 个方向键
+        presses = [keys.choice(DIRECTIONS) for _ in range(keys.choice((0, 0, 1, 1, 2)))]
+        for direction in presses[:-1]:
+            original.key(direction)
+            sim.turn(direction)
+        if presses:
+            original.key(presses[-1])
+        original.update()
+        sim.step(presses[-1] if presses else None)
+        if state(original) != state(sim):
+            return tick, tick
+        if original.game_over:
+            return None, tick
+    return None, max_ticks
+
+
+def test_random_input_games_match_original_rules():
+    ticks = 0
+    for seed in range(300):
+        mismatch, played = replay(seed)
+        assert mismatch is None, f"种子 {seed} 在第 {mismatch} 回合与原规则不一致"
+        ticks += played
+    assert ticks > 300
+
+
+def test_greedy_games_match_original_rules():
+    # 贪心策略的对局更长、蛇身更长，覆盖吃到食物与撞到自身的情况
+    for seed in range(20):
+        original = OriginalGame(random.Random(seed))
+        sim = SnakeSim(seed=seed)
+        while not sim.game_over and sim.ticks < 3000:
+            direction = greedy_policy(sim)
+            if direction is not None:
+                original.key(direction)
+            original.update()
+            sim.step(direction)
+            assert state(original) == state(sim), f"种子 {seed} 在第 {sim.ticks} 回合与原规则不一致"
+        assert sim.score == original.score
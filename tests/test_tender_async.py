@@ -0,0 +1,94 @@
+"""并发爬虫在本地测试服务器上的限速与重试"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tender_async import AsyncTenderCrawler
+from tender_bench import FixtureConfig, FixtureSite
+from tender_spider import TenderSpider
+
+RATE = 10.0
+
+
+class FlakyServer:
+    """按模板生成页面；failures 中的路径先返回若干次 503 再正常响应"""
+
+    def __init__(self, failures):
+        self.site = FixtureSite(FixtureConfig(pages=3, items_per_page=2, latency=0, jitter=0))
+        self.failures = dict(failures)
+        self.arrivals = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                path = '/' + self.path.lstrip('/')
+                with server.lock:
+                    server.arrivals.append((time.monotonic(), path))
+                    failing = server.failures.get(path, 0)
+                    if failing:
+                        server.failures[path] = failing - 1
+                status, body = (503, b'busy') if failing else server.site.resolve(path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def requests_for(self, path):
+        return sum(1 for _, p in self.arrivals if p == path)
+
+
+@pytest.fixture
+def server():
+    server = FlakyServer({'/list-2.html': 2, '/detail/3-1.html': 1, '/list-4.html': 0})
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def crawl(server, end_page, retries=2):
+    spider = TenderSpider(base_url=server.url, polite=False)
+    crawler = AsyncTenderCrawler(spider, max_connections=4, rate=RATE, retries=retries, backoff=0.05)
+    return crawler, asyncio.run(crawler.crawl_async(1, end_page, fetch_details=True))
+
+
+def test_retries_transient_errors(server):
+    crawler, tender_list = crawl(server, end_page=4)
+
+    # 第 4 页超出分页深度返回 404，不重试；其余页面的 503 重试后成功
+    assert len(tender_list) == 3 * 2
+    assert server.requests_for('/list-2.html') == 3
+    assert server.requests_for('/detail/3-1.html') == 2
+    assert server.requests_for('/list-4.html') == 1
+    assert crawler.requests == len(server.arrivals) == 4 + 6 + 3
+    assert all(t['预算金额'] for t in tender_list)
+
+
+def test_gives_up_after_retries(server):
+    crawler, tender_list = crawl(server, end_page=2, retries=1)
+    assert server.requests_for('/list-2.html') == 2
+    assert len(tender_list) == 2
+
+
+def test_requests_respect_host_rate(server):
+    crawl(server, end_page=4)
+    arrivals = sorted(t for t, _ in server.arrivals)
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+    # 包括重试在内，同一主机的相邻请求至少间隔 1/RATE 秒（留出线程调度的误差）
+    assert min(gaps) >= 0.7 / RATE
+    assert arrivals[-1] - arrivals[0] >= (len(arrivals) - 1) * 0.9 / RATE
@@ -0,0 +1,16 @@
+"""招投标金额与日期规范化"""
+
+import pytest
+
+from tender_fields import SAMPLE_CORPUS, parse_amount, parse_date
+
+
+@pytest.mark.parametrize('row', SAMPLE_CORPUS, ids=lambda row: row['预算金额'] or '空')
+def test_sample_corpus(row):
+    assert parse_amount(row['预算金额']) == row['amount']
+    assert parse_date(row['截止日期']) == row['date']
+
+
+@pytest.mark.parametrize('text', ['2026年', '预算：2026年', '项目编号 2026-017'])
+def test_numbers_without_unit_or_keyword_are_not_amounts(text):
+    assert parse_amount(text) is None
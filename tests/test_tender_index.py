@@ -0,0 +1,32 @@
+"""招投标全文索引的关键字检索"""
+
+from tender_index import TenderIndex
+
+TENDERS = [
+    {'标题': '跨江大桥维修工程', '招标公司': '市交通局', '详情链接': 'http://example.com/1'},
+    {'标题': '桥梁检测服务', '招标公司': '区公路站', '详情链接': 'http://example.com/2'},
+    {'标题': '医院设备采购（100%国产）', '招标公司': '市人民医院', '详情链接': 'http://example.com/3'},
+    {'标题': '医院设备采购1001', '招标公司': 'abc_def 公司', '详情链接': 'http://example.com/4'},
+]
+
+
+def titles(index, *keywords):
+    return sorted(t['标题'] for t in index.search(list(keywords)))
+
+
+def test_single_character_keyword(tmp_path):
+    index = TenderIndex(str(tmp_path / 'index.db'))
+    index.add([dict(t) for t in TENDERS])
+    assert titles(index, '桥') == ['桥梁检测服务', '跨江大桥维修工程']
+    assert titles(index, '桥', '维修') == ['跨江大桥维修工程']
+    index.close()
+
+
+def test_like_wildcards_are_literal(tmp_path):
+    index = TenderIndex(str(tmp_path / 'index.db'))
+    index.add([dict(t) for t in TENDERS])
+    assert titles(index, '100%') == ['医院设备采购（100%国产）']
+    assert titles(index, 'c_d') == ['医院设备采购1001']
+    assert titles(index, 'c%d') == []
+    index.close()
+
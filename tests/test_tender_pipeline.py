@@ -0,0 +1,144 @@
+"""详情页补全流水线在本地测试服务器上的补全、顺序、分批写出与限速"""
+
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tender_async import HostSchedule
+from tender_bench import FixtureConfig, FixtureSite
+from tender_pipeline import DetailPipeline, ThreadRateLimiter
+from tender_spider import TenderSpider
+
+PAGES = 3
+ITEMS_PER_PAGE = 4
+
+# 列表页中奇数项去掉预算金额，需要抓取详情页补全
+ODD_BUDGET_PATTERN = re.compile(rb'(/detail/\d+-\d*[13579]\.html.*?)<span class="budget">[^<]*</span>')
+
+
+class DetailServer:
+    """按模板生成页面，记录详情页请求"""
+
+    def __init__(self):
+        self.site = FixtureSite(FixtureConfig(pages=PAGES, items_per_page=ITEMS_PER_PAGE, latency=0, jitter=0))
+        self.details = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                path = '/' + self.path.lstrip('/')
+                status, body = server.site.resolve(path)
+                if path.startswith('/detail'):
+                    with server.lock:
+                        server.details.append(path)
+                elif status == 200:
+                    body = ODD_BUDGET_PATTERN.sub(rb'\1', body)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+class ListSink:
+    """记录每次写出的批次"""
+
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def write(self, tender_list):
+        self.batches.append(list(tender_list))
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def server():
+    server = DetailServer()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def make_pipeline(server, **kwargs):
+    spider = TenderSpider(base_url=server.url, polite=False)
+    return DetailPipeline(spider, fetch_workers=3, parse_workers=2, queue_size=2, rate=0, **kwargs)
+
+
+def test_details_fill_missing_fields_in_list_order(server):
+    pipeline = make_pipeline(server)
+    tender_list = pipeline.run(1, PAGES)
+
+    assert [t['标题'] for t in tender_list] == [f'第{page}页第{i}项 设备采购项目'
+                                                for page in range(1, PAGES + 1) for i in range(ITEMS_PER_PAGE)]
+    assert all(t['预算金额'] and t['截止日期'] for t in tender_list)
+    # 只有缺少预算金额的奇数项请求了详情页
+    assert sorted(server.details) == sorted(f'/detail/{page}-{i}.html'
+                                            for page in range(1, PAGES + 1) for i in (1, 3))
+    stats = {row['stage']: row for row in pipeline.report()}
+    assert stats['list']['items'] == PAGES
+    assert stats['fetch']['items'] == len(server.details)
+    assert stats['parse']['items'] == len(tender_list)
+    assert stats['fetch']['errors'] == stats['parse']['errors'] == 0
+
+
+def test_streaming_writes_every_tender_in_batches(server):
+    pipeline = make_pipeline(server)
+    sink = ListSink()
+    written = pipeline.run_streaming(1, PAGES, sinks=[sink], batch_size=5)
+
+    assert written == PAGES * ITEMS_PER_PAGE
+    assert [len(batch) for batch in sink.batches] == [5, 5, 2]
+    titles = [t['标题'] for batch in sink.batches for t in batch]
+    assert len(set(titles)) == written
+    assert sink.closed
+
+
+def test_schedule_spaces_requests_per_host():
+    schedule = HostSchedule(rate=4)
+    assert schedule.reserve('http://a.example/1', 10.0) == 0
+    assert schedule.reserve('http://a.example/2', 10.0) == pytest.approx(0.25)
+    assert schedule.reserve('http://a.example/3', 10.1) == pytest.approx(0.4)
+    # 不同主机互不影响
+    assert schedule.reserve('http://b.example/1', 10.1) == 0
+    assert HostSchedule(rate=0).reserve('http://a.example/1', 10.0) == 0
+
+
+def test_thread_limiter_spaces_concurrent_requests():
+    rate = 20.0
+    limiter = ThreadRateLimiter(rate)
+    times = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(3):
+            limiter.acquire('http://a.example/x')
+            with lock:
+                times.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times.sort()
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert min(gaps) >= 0.7 / rate
+    assert times[-1] - times[0] >= (len(times) - 1) * 0.9 / rate
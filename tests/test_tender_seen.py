@@ -0,0 +1,59 @@
+"""详情链接规范化与已抓取项目索引"""
+
+import pytest
+
+from tender_seen import QUERY_CHUNK, SeenIndex, normalize_link, tender_key
+
+
+def test_normalize_link_drops_tracking_params():
+    assert (normalize_link('HTTP://Example.com/detail/1/?utm_source=a&id=7&spm=x.y&from=list#top')
+            == 'http://example.com/detail/1?id=7')
+    assert normalize_link('http://example.com/d?b=2&a=1&source=feed') == 'http://example.com/d?a=1&b=2'
+    assert normalize_link('http://example.com/') == 'http://example.com/'
+
+
+def test_normalize_link_keeps_params_sharing_a_tracking_prefix():
+    # 只去掉完整名称匹配的跟踪参数，名称以 from / source 开头的业务参数要保留
+    assert (normalize_link('http://example.com/d?source_id=3&fromDate=2026-03-01')
+            == 'http://example.com/d?fromDate=2026-03-01&source_id=3')
+    assert (tender_key({'详情链接': 'http://example.com/d?source_id=3'})
+            != tender_key({'详情链接': 'http://example.com/d?source_id=4'}))
+
+
+def test_tender_key_falls_back_to_title_and_company():
+    a = {'标题': '设备采购', '招标公司': '甲单位', '详情链接': ''}
+    b = {'标题': '设备采购', '招标公司': '乙单位', '详情链接': ''}
+    assert tender_key(a) != tender_key(b)
+    assert tender_key(a) == tender_key(dict(a))
+    assert (tender_key({'详情链接': 'http://example.com/d?id=1&utm_source=x'})
+            == tender_key({'详情链接': 'http://EXAMPLE.com/d/?id=1'}))
+
+
+@pytest.mark.parametrize('use_bloom', [False, True])
+def test_filter_new_and_mark_seen(tmp_path, use_bloom):
+    index = SeenIndex(str(tmp_path / 'seen.db'), use_bloom=use_bloom, bloom_capacity=1000)
+    page = [
+        {'标题': 'a', '详情链接': 'http://example.com/d?id=1'},
+        {'标题': 'a 重复', '详情链接': 'http://example.com/d?id=1&from=list'},
+        {'标题': 'b', '详情链接': 'http://example.com/d?id=2'},
+    ]
+    # 同一页内的重复项目只保留第一条
+    assert [t['标题'] for t in index.filter_new(page)] == ['a', 'b']
+    index.mark_seen(page[:1])
+    assert len(index) == 1
+    assert [t['标题'] for t in index.filter_new(page)] == ['b']
+    index.close()
+
+    # 重新打开后仍然记得已抓取的项目
+    index = SeenIndex(str(tmp_path / 'seen.db'), use_bloom=use_bloom, bloom_capacity=1000)
+    assert [t['标题'] for t in index.filter_new(page)] == ['b']
+    index.close()
+
+
+def test_filter_new_on_page_larger_than_query_chunk(tmp_path):
+    index = SeenIndex(str(tmp_path / 'seen.db'))
+    page = [{'详情链接': f'http://example.com/d?id={i}'} for i in range(QUERY_CHUNK * 5 + 7)]
+    index.mark_seen(page[::2])
+    new_list = index.filter_new(page)
+    assert new_list == page[1::2]
+    index.close()
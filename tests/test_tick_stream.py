@@ -0,0 +1,63 @@
+"""逐笔回放的增量均线交叉与批量 detect_signals 结果一致"""
+
+import asyncio
+import csv
+
+import numpy as np
+import pandas as pd
+
+from stock_analyzer import StockAnalyzer
+from tick_stream import ReplayFileSource, TickStreamConsumer
+
+BAR_SECONDS = 60
+
+
+def write_replay(path, closes, ts_code='603986.SH'):
+    """每根K线一笔成交，成交价即收盘价"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ts_code', 'time', 'price', 'volume'])
+        for i, close in enumerate(closes):
+            writer.writerow([ts_code, i * BAR_SECONDS + 1, f'{close:.2f}', 100])
+
+
+def batch_signals(closes):
+    analyzer = StockAnalyzer(source=object())
+    df = pd.DataFrame({
+        '股票代码': '603986.SH',
+        '交易日期': pd.bdate_range('2026-01-05', periods=len(closes)),
+        '收盘价': np.round(closes, 2),
+    })
+    df = analyzer.detect_signals(analyzer.calculate_moving_averages(df))
+    return [(i, s) for i, s in enumerate(df['信号']) if s]
+
+
+def replay_signals(path):
+    signals = []
+    consumer = TickStreamConsumer(bar_seconds=BAR_SECONDS, on_signal=signals.append)
+    count = asyncio.run(consumer.run(ReplayFileSource(path)))
+    bar_index = [int(s['时间'].timestamp()) // BAR_SECONDS for s in signals]
+    return count, [(i, s['信号']) for i, s in zip(bar_index, signals)]
+
+
+def test_replay_matches_batch_detect_signals(tmp_path):
+    rng = np.random.default_rng(7)
+    closes = 50 + np.cumsum(rng.normal(0, 1, 400))
+    path = tmp_path / 'ticks.csv'
+    write_replay(path, closes)
+
+    expected = batch_signals(closes)
+    count, actual = replay_signals(path)
+
+    assert count == len(closes)
+    assert len(expected) > 10
+    assert actual == expected
+
+
+def test_watchlist_filters_other_symbols(tmp_path):
+    path = tmp_path / 'ticks.csv'
+    write_replay(path, 50 + np.arange(30.0), ts_code='000001.SZ')
+    consumer = TickStreamConsumer(watchlist=['603986.SH'], bar_seconds=BAR_SECONDS)
+    asyncio.run(consumer.run(ReplayFileSource(path)))
+    assert consumer.tick_count == 0
+    assert consumer.rings == {}